@@ -0,0 +1,180 @@
+import asyncio
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from modules.metrics import render_prometheus
+from modules.preprocessing import preprocess
+from modules.sentiment import classify_batch, classify_text, get_warmup_error, is_model_ready, start_model_warmup
+from modules import storage_async
+from modules.storage import close_all_connections, get_pool_stats, get_writer_stats
+
+API_WORKERS = int(os.environ.get("SENTIMENT_API_WORKERS", "32"))
+API_MAX_PENDING = int(os.environ.get("SENTIMENT_API_MAX_PENDING", "256"))
+API_MAX_BATCH = int(os.environ.get("SENTIMENT_API_MAX_BATCH", "64"))
+API_MAX_TEXT_LENGTH = int(os.environ.get("SENTIMENT_API_MAX_TEXT_LENGTH", "2000"))
+API_MAX_HISTORY = int(os.environ.get("SENTIMENT_API_MAX_HISTORY", "200"))
+
+_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="sentiment-api")
+_pending = 0
+
+
+class _Overloaded(Exception):
+    pass
+
+
+async def _run_in_executor(fn: Callable[..., Any], *args: Any) -> Any:
+    global _pending
+
+    if _pending >= API_MAX_PENDING:
+        raise _Overloaded()
+
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+
+
+def _validate_text(text: Any) -> str:
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("Field 'text' must be a non-empty string")
+    if len(text) > API_MAX_TEXT_LENGTH:
+        raise ValueError(f"Text exceeds {API_MAX_TEXT_LENGTH} characters")
+    return text
+
+
+def _score_many(texts: List[str]) -> List[Dict[str, Any]]:
+    processed = [preprocess(text) for text in texts]
+    if not all(processed):
+        raise ValueError("Every text must be non-empty after preprocessing")
+
+    return classify_batch(processed)
+
+
+def _error(status_code: int, message: str) -> JSONResponse:
+    headers = {"Retry-After": "1"} if status_code == 429 else None
+    return JSONResponse({"error": message}, status_code=status_code, headers=headers)
+
+
+async def _read_json(request: Request) -> Dict[str, Any]:
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise ValueError("Request body must be valid JSON")
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    return payload
+
+
+async def classify_endpoint(request: Request) -> JSONResponse:
+    try:
+        payload = await _read_json(request)
+        text = _validate_text(payload.get("text"))
+        result = await _run_in_executor(classify_text, text)
+        if payload.get("store", True):
+            await storage_async.save_result(result)
+    except _Overloaded:
+        return _error(429, "Too many pending requests")
+    except ValueError as e:
+        return _error(400, str(e))
+    except RuntimeError as e:
+        return _error(500, str(e))
+
+    return JSONResponse(result)
+
+
+async def classify_batch_endpoint(request: Request) -> JSONResponse:
+    try:
+        payload = await _read_json(request)
+        texts = payload.get("texts")
+        if not isinstance(texts, list) or not texts:
+            raise ValueError("Field 'texts' must be a non-empty list")
+        if len(texts) > API_MAX_BATCH:
+            raise ValueError(f"At most {API_MAX_BATCH} texts per batch")
+        texts = [_validate_text(text) for text in texts]
+        results = await _run_in_executor(_score_many, texts)
+        if payload.get("store", True):
+            await storage_async.save_results(results)
+    except _Overloaded:
+        return _error(429, "Too many pending requests")
+    except ValueError as e:
+        return _error(400, str(e))
+    except RuntimeError as e:
+        return _error(500, str(e))
+
+    return JSONResponse({"results": results})
+
+
+async def history_endpoint(request: Request) -> JSONResponse:
+    params = request.query_params
+    try:
+        limit = int(params.get("limit", "20"))
+        if not 1 <= limit <= API_MAX_HISTORY:
+            raise ValueError(f"Field 'limit' must be between 1 and {API_MAX_HISTORY}")
+        page = await storage_async.get_history_page(
+            limit=limit,
+            cursor=params.get("cursor") or None,
+            direction=params.get("direction", "next"),
+            search_query=params.get("q") or None,
+            sentiment_filter=params.get("sentiment") or None,
+            include_archive=params.get("include_archive", "0").lower() in ("1", "true")
+        )
+    except ValueError as e:
+        return _error(400, str(e))
+
+    page["rows"] = [dict(row) for row in page["rows"]]
+    return JSONResponse(page)
+
+
+async def health_endpoint(request: Request) -> JSONResponse:
+    return JSONResponse({
+        "status": "error" if get_warmup_error() else "ok" if is_model_ready() else "loading",
+        "pending": _pending,
+        "max_pending": API_MAX_PENDING,
+        "db_pool": get_pool_stats(),
+        "write_behind": get_writer_stats()
+    })
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    start_model_warmup()
+    try:
+        yield
+    finally:
+        _executor.shutdown(wait=True)
+        storage_async.shutdown()
+        close_all_connections()
+
+
+app = Starlette(
+    routes=[
+        Route("/classify", classify_endpoint, methods=["POST"]),
+        Route("/classify/batch", classify_batch_endpoint, methods=["POST"]),
+        Route("/history", history_endpoint, methods=["GET"]),
+        Route("/health", health_endpoint, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"])
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=os.environ.get("SENTIMENT_API_HOST", "127.0.0.1"),
+        port=int(os.environ.get("SENTIMENT_API_PORT", "8000"))
+    )
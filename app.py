@@ -1,11 +1,25 @@
+import io
+import os
+
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
-from modules.sentiment import load_sentiment_model, classify
-from modules.preprocessing import preprocess
-from modules.storage import save_result, get_history, get_total_count, get_filtered_count
+from modules import metrics
+from modules.bulk import SUPPORTED_FORMATS, detect_format, score_stream
+from modules.sentiment import classify_text, get_warmup_error, is_model_ready, start_model_warmup
+from modules.storage import (
+    HistoryRecord,
+    save_result,
+    get_history,
+    get_history_page,
+    encode_cursor,
+    get_total_count,
+    get_filtered_count,
+    get_sentiment_counts,
+    get_sentiment_timeseries,
+    get_write_version
+)
 from modules.validation import validate_input
 
 SENTIMENT_CONFIG = {
@@ -29,26 +43,15 @@ SENTIMENT_CONFIG = {
     }
 }
 
+ADMIN_PANEL_ENABLED = os.environ.get("SENTIMENT_ADMIN", "0") == "1"
+
 SENTIMENT_FILTER_MAP = {
     "Tích cực": "POSITIVE",
     "Trung tính": "NEUTRAL",
     "Tiêu cực": "NEGATIVE"
 }
 
-@st.cache_data(ttl=3600)
-def load_css_content():
-    try:
-        with open("assets/css/style.css", "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        return ""
-
-def load_assets():
-    css_content = load_css_content()
-    if css_content:
-        st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
-    st.markdown("""
-        <style>
+TABS_CSS = """
         .stTabs [data-baseweb="tab-list"] {
             gap: 8px;
             width: 100%;
@@ -68,8 +71,104 @@ def load_assets():
             width: 100%;
             text-align: center;
         }
-        </style>
-    """, unsafe_allow_html=True)
+"""
+
+TABLE_CSS = """
+    .dataframe {
+        border-radius: 12px !important;
+        overflow: hidden !important;
+        box-shadow: var(--md-elevation-level1) !important;
+    }
+    
+    .dataframe th {
+        background-color: var(--md-surface-variant) !important;
+        color: var(--md-on-surface-variant) !important;
+        font-weight: 500 !important;
+        text-align: left !important;
+        padding: 16px !important;
+        font-size: 14px !important;
+        text-transform: uppercase !important;
+        letter-spacing: 0.5px !important;
+    }
+    
+    .dataframe td {
+        padding: 16px !important;
+        border-top: 1px solid var(--md-surface-variant) !important;
+        color: var(--md-on-surface) !important;
+    }
+    
+    .dataframe tr:hover {
+        background-color: var(--md-surface-container) !important;
+    }
+"""
+
+
+@st.cache_data(ttl=3600)
+def load_css_content():
+    try:
+        with open("assets/css/style.css", "r", encoding="utf-8") as f:
+            css_content = f.read()
+    except FileNotFoundError:
+        css_content = ""
+    return "\n".join([css_content, TABS_CSS, TABLE_CSS])
+
+def load_assets():
+    st.markdown(f"<style>{load_css_content()}</style>", unsafe_allow_html=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def cached_record_count(version: str, search_query: Optional[str], sentiment_filter: Optional[str]) -> int:
+    metrics.increment("ui_history_queries")
+    if sentiment_filter or search_query:
+        return get_filtered_count(search_query=search_query, sentiment_filter=sentiment_filter, include_archive=True)
+    return get_total_count()
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def cached_history_rows(
+    version: str,
+    limit: int,
+    offset: int,
+    anchor: Optional[Tuple[str, str]],
+    search_query: Optional[str],
+    sentiment_filter: Optional[str]
+) -> List[HistoryRecord]:
+    metrics.increment("ui_history_queries")
+    if anchor is None:
+        return get_history(
+            limit=limit,
+            offset=offset,
+            search_query=search_query,
+            sentiment_filter=sentiment_filter,
+            ranked=False,
+            include_archive=True
+        )
+    return get_history_page(
+        limit=limit,
+        cursor=anchor[0],
+        direction=anchor[1],
+        search_query=search_query,
+        sentiment_filter=sentiment_filter,
+        include_archive=True
+    )["rows"]
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_sentiment_summary(version: str) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+    metrics.increment("ui_history_queries")
+    return get_sentiment_counts(), get_sentiment_timeseries(granularity="day")[-30:]
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_analytics(version: str, granularity: str, sentiment: Optional[str], top_n: int) -> Dict[str, Any]:
+    from modules.analytics import confidence_histogram, sentiment_distribution, top_texts
+    
+    metrics.increment("ui_analytics_queries")
+    return {
+        "distribution": sentiment_distribution(granularity=granularity),
+        "histogram": confidence_histogram(bins=20, sentiment=sentiment),
+        "frequent": top_texts(limit=top_n, sentiment=sentiment)
+    }
 
 
 def main():
@@ -90,21 +189,66 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    with st.spinner("Đang tải model..."):
-        model = load_sentiment_model()
+    start_model_warmup()
     
-    tab1, tab2 = st.tabs(["🤖 Phân loại", "📜 Lịch sử"])
+    if ADMIN_PANEL_ENABLED:
+        admin_panel()
+    
+    tab1, tab2, tab3 = st.tabs(["🤖 Phân loại", "📜 Lịch sử", "📂 Hàng loạt"])
     
     with tab1:
         classification_tab()
     
     with tab2:
         history_tab()
+    
+    with tab3:
+        bulk_tab()
+
+
+def admin_panel():
+    import pandas as pd
+    
+    with st.sidebar:
+        st.markdown("### 🛠️ Quản trị")
+        enabled = st.toggle("Thu thập số liệu", value=metrics.is_enabled(), key="admin_metrics_enabled")
+        metrics.set_enabled(enabled)
+        
+        snapshot = metrics.snapshot()
+        if snapshot["stages"]:
+            stage_df = pd.DataFrame([
+                {
+                    'Giai đoạn': stage,
+                    'Số lần': values['count'],
+                    'TB (ms)': round(values['mean_ms'], 2),
+                    'p95 (ms)': values['p95_ms']
+                }
+                for stage, values in snapshot["stages"].items()
+            ])
+            st.dataframe(stage_df, hide_index=True)
+        else:
+            st.caption("Chưa có số liệu.")
+        
+        for name, value in {**snapshot["counters"], **snapshot["gauges"]}.items():
+            st.caption(f"{name}: {value:g}")
+        
+        with st.expander("Prometheus"):
+            st.code(metrics.render_prometheus(), language="text")
+        
+        if st.button("Đặt lại số liệu", key="admin_metrics_reset"):
+            metrics.registry.reset()
+            st.rerun()
 
 
 def classification_tab():
     st.markdown('<h2 style="color: var(--md-primary); margin-bottom: 24px;">📝 Phân loại cảm xúc</h2>', unsafe_allow_html=True)
     
+    if not is_model_ready():
+        if get_warmup_error() is not None:
+            st.warning("Không thể tải model trong nền, model sẽ được tải lại khi phân loại.")
+        else:
+            st.info("⏳ Model đang được tải trong nền, bạn vẫn có thể xem lịch sử.")
+    
     with st.form(key="classification_form", clear_on_submit=True):
         user_input = st.text_area(
             "Nhập văn bản tiếng Việt:",
@@ -142,12 +286,12 @@ def classification_tab():
                 """, unsafe_allow_html=True)
                 return
             try:
-                processed_text = preprocess(user_input)
-                result = classify(processed_text)
+                with st.spinner("Đang tải model..." if not is_model_ready() else "Đang phân loại..."):
+                    result = classify_text(user_input)
                 save_result(result)
                 
                 display_result(result)                    
-            except RuntimeError as e:
+            except (ValueError, RuntimeError) as e:
                 st.markdown(f"""
                 <div class="md-card" style="background: var(--md-error-container); color: var(--md-on-error-container); border-left: 4px solid var(--md-error);">
                     <strong>❌ Có lỗi xảy ra:</strong> {str(e)}
@@ -172,7 +316,12 @@ def display_result(result: Dict[str, Any]):
     """, unsafe_allow_html=True)
 
 
+@st.fragment
 def history_tab():
+    import pandas as pd
+    
+    version = get_write_version()
+    
     st.markdown('<h2 style="color: var(--md-primary); margin-bottom: 24px;">📜 Lịch sử phân loại</h2>', unsafe_allow_html=True)
     
     search_query = st.text_input("🔍 Tìm kiếm trong lịch sử:", key="history_search", placeholder="Nhập văn bản cần tìm...")
@@ -187,13 +336,7 @@ def history_tab():
     search_query_value = search_query.strip() if search_query else None
     
     records_per_page = 10
-    if sentiment_filter_value or search_query_value:
-        total_records = get_filtered_count(
-            search_query=search_query_value,
-            sentiment_filter=sentiment_filter_value
-        )
-    else:
-        total_records = get_total_count()
+    total_records = cached_record_count(version, search_query_value, sentiment_filter_value)
     total_pages = (total_records + records_per_page - 1) // records_per_page
     
     if total_pages == 0:
@@ -205,15 +348,40 @@ def history_tab():
         """, unsafe_allow_html=True)
         return
     
+    filter_key = (search_query_value, sentiment_filter_value)
+    if st.session_state.get('history_filter_key') != filter_key:
+        st.session_state.history_filter_key = filter_key
+        st.session_state.current_page = 1
+        st.session_state.history_anchor = None
+    
     if 'current_page' not in st.session_state:
         st.session_state.current_page = 1
+        st.session_state.history_anchor = None
+    
+    if st.session_state.current_page > total_pages:
+        st.session_state.current_page = total_pages
+        st.session_state.history_anchor = None
+    
+    with st.spinner("Đang tải lịch sử..."):
+        history_data = cached_history_rows(
+            version,
+            records_per_page,
+            (st.session_state.current_page - 1) * records_per_page,
+            st.session_state.get('history_anchor'),
+            search_query_value,
+            sentiment_filter_value
+        )
     
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col1:
-        if st.button("← Trang trước", disabled=st.session_state.current_page <= 1):
+        if st.button("← Trang trước", disabled=st.session_state.current_page <= 1 or not history_data):
             st.session_state.current_page = max(1, st.session_state.current_page - 1)
-            st.rerun()
+            if st.session_state.current_page == 1:
+                st.session_state.history_anchor = None
+            else:
+                st.session_state.history_anchor = (encode_cursor(history_data[0]), "prev")
+            st.rerun(scope="fragment")
     
     with col2:
         st.markdown(f"""
@@ -223,20 +391,30 @@ def history_tab():
         """, unsafe_allow_html=True)
     
     with col3:
-        if st.button("Trang sau →", disabled=st.session_state.current_page >= total_pages):
+        if st.button("Trang sau →", disabled=st.session_state.current_page >= total_pages or not history_data):
             st.session_state.current_page = min(total_pages, st.session_state.current_page + 1)
-            st.rerun()
+            st.session_state.history_anchor = (encode_cursor(history_data[-1]), "next")
+            st.rerun(scope="fragment")
+    
+    if total_pages > 1:
+        jump_col1, jump_col2 = st.columns([3, 1])
+        with jump_col1:
+            target_page = st.number_input(
+                "Đến trang:",
+                min_value=1,
+                max_value=total_pages,
+                value=st.session_state.current_page,
+                step=1
+            )
+        with jump_col2:
+            st.markdown("<div style='height: 28px;'></div>", unsafe_allow_html=True)
+            if st.button("Đi", key="history_jump"):
+                st.session_state.current_page = int(target_page)
+                st.session_state.history_anchor = None
+                st.rerun(scope="fragment")
     
     offset = (st.session_state.current_page - 1) * records_per_page
     
-    with st.spinner("Đang tải lịch sử..."):
-        history_data = get_history(
-            limit=records_per_page, 
-            offset=offset,
-            search_query=search_query_value,
-            sentiment_filter=sentiment_filter_value
-        )
-    
     if not history_data:
         st.markdown("""
         <div class="md-card" style="text-align: center; padding: 40px 24px; background: var(--md-surface-container);">
@@ -247,56 +425,16 @@ def history_tab():
     
     st.markdown('<h3 style="color: var(--md-primary); margin-bottom: 16px;">📊 Lịch sử phân loại gần đây</h3>', unsafe_allow_html=True)
     
-    table_data = []
-    for i, record in enumerate(history_data):
-        timestamp = datetime.fromisoformat(record['timestamp']).strftime('%H:%M %d/%m/%Y')
-        confidence = f"{record['confidence']:.1%}"
-        
-        emoji = SENTIMENT_CONFIG.get(record['sentiment'], {}).get('icon', '❓')
-        text = record['text']
-        if len(text) > 30:
-            text = text[:27] + "..."
-        
-        table_data.append({
-            'STT': i + 1,
-            'Văn bản': text,
-            'Cảm xúc': f"{emoji} {record['sentiment']}",
-            'Độ tin cậy': confidence,
-            'Thời gian': timestamp
-        })
-    
-    df = pd.DataFrame(table_data)
-    
-    st.markdown("""
-    <style>
-    .dataframe {
-        border-radius: 12px !important;
-        overflow: hidden !important;
-        box-shadow: var(--md-elevation-level1) !important;
-    }
-    
-    .dataframe th {
-        background-color: var(--md-surface-variant) !important;
-        color: var(--md-on-surface-variant) !important;
-        font-weight: 500 !important;
-        text-align: left !important;
-        padding: 16px !important;
-        font-size: 14px !important;
-        text-transform: uppercase !important;
-        letter-spacing: 0.5px !important;
-    }
-    
-    .dataframe td {
-        padding: 16px !important;
-        border-top: 1px solid var(--md-surface-variant) !important;
-        color: var(--md-on-surface) !important;
-    }
-    
-    .dataframe tr:hover {
-        background-color: var(--md-surface-container) !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    df = pd.DataFrame({
+        'STT': range(offset + 1, offset + len(history_data) + 1),
+        'Văn bản': [record.text if len(record.text) <= 30 else record.text[:27] + "..." for record in history_data],
+        'Cảm xúc': [
+            f"{SENTIMENT_CONFIG.get(record.sentiment, {}).get('icon', '❓')} {record.sentiment}"
+            for record in history_data
+        ],
+        'Độ tin cậy': [f"{record.confidence:.1%}" for record in history_data],
+        'Thời gian': [datetime.fromisoformat(record.timestamp).strftime('%H:%M %d/%m/%Y') for record in history_data]
+    })
     
     if not df.empty:
         st.dataframe(df, width='stretch', hide_index=True)
@@ -307,6 +445,8 @@ def history_tab():
     
     st.markdown('<div class="md-metrics-container">', unsafe_allow_html=True)
     
+    sentiment_counts, timeseries = cached_sentiment_summary(version)
+    
     with st.container():
         col1, col2, col3 = st.columns(3)
         
@@ -319,7 +459,7 @@ def history_tab():
             """, unsafe_allow_html=True)
         
         with col2:
-            positive_count = sum(1 for r in history_data if r['sentiment'] == 'POSITIVE')
+            positive_count = sentiment_counts.get('POSITIVE', 0)
             st.markdown(f"""
             <div class="md-metric-card">
                 <div class="md-metric-value" style="color: var(--md-positive);">{positive_count}</div>
@@ -328,7 +468,7 @@ def history_tab():
             """, unsafe_allow_html=True)
         
         with col3:
-            negative_count = sum(1 for r in history_data if r['sentiment'] == 'NEGATIVE')
+            negative_count = sentiment_counts.get('NEGATIVE', 0)
             st.markdown(f"""
             <div class="md-metric-card">
                 <div class="md-metric-value" style="color: var(--md-negative);">{negative_count}</div>
@@ -338,6 +478,130 @@ def history_tab():
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    with st.expander("📈 Xu hướng theo ngày"):
+        if timeseries:
+            chart_data = pd.DataFrame(timeseries).set_index("bucket").fillna(0)
+            chart_data = chart_data.rename(columns={
+                key: value['label'] for key, value in SENTIMENT_CONFIG.items()
+            })
+            st.bar_chart(chart_data)
+        else:
+            st.info("Chưa có dữ liệu.")
+    
+    if st.toggle("📊 Phân tích nâng cao", key="history_analytics"):
+        analytics_view(version)
+    
+
+def analytics_view(version: str):
+    import pandas as pd
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        granularity = st.selectbox(
+            "Đơn vị thời gian:",
+            ["day", "week", "month"],
+            format_func={"day": "Ngày", "week": "Tuần", "month": "Tháng"}.get,
+            key="analytics_granularity"
+        )
+    with col2:
+        filter_option = st.selectbox("Cảm xúc:", ["Tất cả", *SENTIMENT_FILTER_MAP], key="analytics_sentiment")
+    with col3:
+        top_n = st.number_input("Số văn bản phổ biến:", min_value=5, max_value=100, value=20, step=5, key="analytics_top_n")
+    sentiment = SENTIMENT_FILTER_MAP.get(filter_option)
+    
+    try:
+        with st.spinner("Đang truy vấn dữ liệu..."):
+            results = cached_analytics(version, granularity, sentiment, int(top_n))
+    except RuntimeError as e:
+        st.info(f"Không thể chạy phân tích: {str(e)}")
+        return
+    
+    if not results["distribution"]:
+        st.info("Chưa có dữ liệu.")
+        return
+    
+    st.markdown("**Phân bố cảm xúc theo thời gian**")
+    chart_data = pd.DataFrame(results["distribution"]).set_index("bucket").fillna(0)
+    st.area_chart(chart_data.rename(columns={key: value['label'] for key, value in SENTIMENT_CONFIG.items()}))
+    
+    st.markdown("**Phân bố độ tin cậy**")
+    histogram_data = pd.DataFrame(results["histogram"])
+    histogram_data["bin"] = histogram_data["bin_start"].map(lambda start: f"{start:.2f}")
+    st.bar_chart(histogram_data.set_index("bin")["count"])
+    
+    st.markdown("**Văn bản xuất hiện nhiều nhất**")
+    st.dataframe(
+        pd.DataFrame(results["frequent"]).rename(columns={
+            "text": "Văn bản", "count": "Số lần", "mean_confidence": "Độ tin cậy TB"
+        }),
+        width='stretch',
+        hide_index=True
+    )
+    
+
+
+def bulk_tab():
+    st.markdown('<h2 style="color: var(--md-primary); margin-bottom: 24px;">📂 Phân loại hàng loạt</h2>', unsafe_allow_html=True)
+    
+    uploaded_file = st.file_uploader(
+        "Tải lên tệp CSV hoặc JSONL:",
+        type=list(SUPPORTED_FORMATS),
+        key="bulk_upload"
+    )
+    text_column = st.text_input("Tên cột văn bản:", value="text", key="bulk_text_column")
+    resume = st.checkbox("Tiếp tục từ lần chạy trước", value=True, key="bulk_resume")
+    
+    if uploaded_file is None:
+        return
+    
+    if not st.button("🚀 Bắt đầu phân loại", type="primary", key="bulk_start"):
+        return
+    
+    try:
+        file_format = detect_format(uploaded_file.name)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    
+    total_rows = uploaded_file.getvalue().count(b"\n")
+    if file_format == "csv":
+        total_rows = max(0, total_rows - 1)
+    
+    progress_bar = st.progress(0.0)
+    status = st.empty()
+    
+    def on_progress(progress: Dict[str, Any]):
+        if total_rows:
+            progress_bar.progress(min(1.0, progress['offset'] / total_rows))
+        status.markdown(
+            f"Đã xử lý {progress['offset']}/{total_rows} dòng · "
+            f"đã lưu {progress['saved']} · bỏ qua {progress['skipped']} · "
+            f"{progress['rows_per_second']:.1f} dòng/giây"
+        )
+    
+    uploaded_file.seek(0)
+    stream = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    try:
+        summary = score_stream(
+            stream,
+            file_format,
+            job=f"upload:{uploaded_file.name}:{uploaded_file.size}",
+            text_column=text_column.strip() or "text",
+            resume=resume,
+            on_progress=on_progress
+        )
+    except (ValueError, RuntimeError) as e:
+        st.markdown(f"""
+        <div class="md-card" style="background: var(--md-error-container); color: var(--md-on-error-container); border-left: 4px solid var(--md-error);">
+            <strong>❌ Có lỗi xảy ra:</strong> {str(e)}
+        </div>
+        """, unsafe_allow_html=True)
+        return
+    finally:
+        stream.detach()
+    
+    progress_bar.progress(1.0)
+    st.success(f"Hoàn tất: đã lưu {summary['saved']} kết quả, bỏ qua {summary['skipped']} dòng.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from modules.preprocessing import (
+    COMBINED_NORMALIZATION_DICT,
+    _apply_case_pattern,
+    _normalize_all,
+    register_normalizations
+)
+
+FILLER_WORDS = [
+    "hàng", "đẹp", "giao", "nhanh", "chất", "lượng", "quá", "lắm", "hơi", "chậm",
+    "đóng", "gói", "cẩn", "thận", "giá", "rẻ", "màu", "xấu", "nhân", "viên", "😍", "👍", "😡"
+]
+PUNCTUATION = ["", "", "", ".", "!", "!!", ",", "?"]
+
+
+def legacy_normalize_all(text: str) -> str:
+    result = []
+    for word in text.split():
+        lower_word = word.lower()
+        if lower_word in COMBINED_NORMALIZATION_DICT:
+            result.append(_apply_case_pattern(word, COMBINED_NORMALIZATION_DICT[lower_word]))
+        else:
+            result.append(word)
+    return " ".join(result)
+
+
+def make_corpus(size: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    slang = list(COMBINED_NORMALIZATION_DICT)
+    sentences = []
+    for _ in range(size):
+        words = []
+        for _ in range(rng.randint(3, 12)):
+            word = rng.choice(slang) if rng.random() < 0.3 else rng.choice(FILLER_WORDS)
+            if rng.random() < 0.1:
+                word = word.upper()
+            words.append(word + rng.choice(PUNCTUATION))
+        sentences.append(" ".join(words))
+    return sentences
+
+
+def _time(fn: Callable[[str], str], corpus: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for sentence in corpus:
+            fn(sentence)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the compiled normalizer with the per-word implementation")
+    parser.add_argument("--sentences", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extra-entries", type=int, default=0, help="Register synthetic dictionary entries first")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.sentences)
+    if args.extra_entries:
+        register_normalizations({f"slang{i}": f"từ{i}" for i in range(args.extra_entries)})
+    legacy = _time(legacy_normalize_all, corpus, args.repeat)
+    compiled = _time(_normalize_all, corpus, args.repeat)
+    changed = sum(1 for sentence in corpus if legacy_normalize_all(sentence) != _normalize_all(sentence))
+
+    print(f"sentences: {len(corpus)}, dictionary entries: {len(COMBINED_NORMALIZATION_DICT)}")
+    print(f"legacy per-word lookup: {legacy:.3f}s ({len(corpus) / legacy:,.0f} sentences/s)")
+    print(f"compiled normalizer:    {compiled:.3f}s ({len(corpus) / compiled:,.0f} sentences/s)")
+    print(f"speedup: {legacy / compiled:.2f}x")
+    print(f"sentences normalized differently (punctuation-attached slang): {changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import random
+import unicodedata
+from typing import List, Optional
+
+from modules.preprocessing import ABBREVIATION_DICT
+
+SUBJECTS = [
+    "sản phẩm", "hàng", "shop", "giao hàng", "chất lượng", "nhân viên", "đóng gói", "giá", "màu sắc", "dịch vụ"
+]
+POSITIVE_PHRASES = [
+    "tốt", "rất tốt", "đẹp", "nhanh", "ổn", "hài lòng", "chuẩn", "tuyệt vời", "đáng tiền", "nhiệt tình"
+]
+NEGATIVE_PHRASES = [
+    "tệ", "chậm", "không được", "xấu", "kém", "thất vọng", "lỗi", "không giống hình", "quá đắt", "thái độ kém"
+]
+NEUTRAL_PHRASES = [
+    "bình thường", "tạm được", "cũng được", "như mô tả", "chưa dùng thử", "không có gì đặc biệt"
+]
+INTENSIFIERS = ["", "", "quá", "lắm", "cực kỳ", "hơi", "khá"]
+EMOJI = ["😍", "👍", "❤️", "😡", "👎", "😢", "🙂", "🔥"]
+PUNCTUATION = ["", "", ".", "!", "!!", "...", "?"]
+
+_REVERSE_ABBREVIATIONS = {}
+for _abbreviation, _expansion in ABBREVIATION_DICT.items():
+    _REVERSE_ABBREVIATIONS.setdefault(_expansion, _abbreviation)
+
+
+def strip_diacritics(text: str) -> str:
+    decomposed = unicodedata.normalize("NFD", text.replace("đ", "d").replace("Đ", "D"))
+    return "".join(char for char in decomposed if unicodedata.category(char) != "Mn")
+
+
+def _abbreviate(text: str, rng: random.Random) -> str:
+    for expansion, abbreviation in _REVERSE_ABBREVIATIONS.items():
+        if expansion in text and rng.random() < 0.7:
+            text = text.replace(expansion, abbreviation)
+    return text
+
+
+def make_review(rng: random.Random) -> str:
+    polarity = rng.random()
+    if polarity < 0.45:
+        phrases = POSITIVE_PHRASES
+    elif polarity < 0.85:
+        phrases = NEGATIVE_PHRASES
+    else:
+        phrases = NEUTRAL_PHRASES
+
+    clauses = []
+    for _ in range(rng.randint(1, 3)):
+        clause = f"{rng.choice(SUBJECTS)} {rng.choice(phrases)} {rng.choice(INTENSIFIERS)}".strip()
+        clauses.append(clause + rng.choice(PUNCTUATION))
+    text = " ".join(clauses)
+
+    if rng.random() < 0.5:
+        text = _abbreviate(text, rng)
+    if rng.random() < 0.3:
+        text = strip_diacritics(text)
+    if rng.random() < 0.3:
+        text = f"{text} {rng.choice(EMOJI)}"
+    if rng.random() < 0.1:
+        text = text.upper()
+    return text
+
+
+def generate_corpus(size: int, seed: int = 42, max_length: Optional[int] = None) -> List[str]:
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < size:
+        review = make_review(rng)
+        if max_length is None or len(review) <= max_length:
+            corpus.append(review)
+    return corpus
+
+
+if __name__ == "__main__":
+    for review in generate_corpus(20):
+        print(review)
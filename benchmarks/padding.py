@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.corpus import generate_corpus
+from modules.scheduler import BUCKET_WIDTH, MAX_BATCH_TOKENS, LengthBucketScheduler, padding_efficiency
+
+
+def compare_padding(scheduler: LengthBucketScheduler, texts: Sequence[str], arrival_batch_size: int) -> Dict[str, Any]:
+    naive_lengths = [
+        min(len(ids), scheduler.max_length)
+        for ids in scheduler.tokenizer(list(texts), truncation=False)["input_ids"]
+    ]
+    naive = padding_efficiency([
+        naive_lengths[start:start + arrival_batch_size]
+        for start in range(0, len(naive_lengths), arrival_batch_size)
+    ])
+
+    batches = scheduler.plan(texts)
+    bucketed = padding_efficiency([[len(ids) for _, ids in batch] for batch in batches])
+    bucketed["batches"] = len(batches)
+
+    return {
+        "texts": len(texts),
+        "arrival_batch_size": arrival_batch_size,
+        "arrival_order": naive,
+        "length_bucketed": bucketed,
+        "padded_tokens_saved": 1 - bucketed["padded_tokens"] / naive["padded_tokens"] if naive["padded_tokens"] else 0.0
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from transformers import AutoTokenizer
+
+    from modules.preprocessing import preprocess
+    from modules.sentiment import MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Report padding efficiency of length-bucketed scheduling")
+    parser.add_argument("--texts", default=None, help="Texts, one per line (default: synthetic corpus)")
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32, help="Arrival-order batch size to compare against")
+    parser.add_argument("--bucket-width", type=int, default=BUCKET_WIDTH)
+    parser.add_argument("--max-batch-tokens", type=int, default=MAX_BATCH_TOKENS)
+    args = parser.parse_args(argv)
+
+    if args.texts:
+        with open(args.texts, "r", encoding="utf-8") as f:
+            raw = [line for line in f if line.strip()][:args.size]
+    else:
+        raw = generate_corpus(args.size)
+
+    texts = [text for text in (preprocess(line) for line in raw) if text]
+    scheduler = LengthBucketScheduler(
+        AutoTokenizer.from_pretrained(MODEL_NAME),
+        bucket_width=args.bucket_width,
+        max_batch_tokens=args.max_batch_tokens
+    )
+    print(json.dumps(compare_padding(scheduler, texts, args.batch_size), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.stub_model import StubSentimentPipeline, install_stub_tokenizer, tokenizer_available
+
+STAGES = ("preprocess", "inference", "storage", "e2e")
+TOKENIZER_STAGES = ("preprocess", "e2e")
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], items: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "items": items,
+        "calls": len(latencies),
+        "elapsed_s": elapsed,
+        "throughput": items / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": _percentile(ordered, 0.50) * 1000,
+        "p95_ms": _percentile(ordered, 0.95) * 1000,
+        "p99_ms": _percentile(ordered, 0.99) * 1000
+    }
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def _run_serial(fn: Callable[[Any], Any], items: Sequence[Any], weight: Callable[[Any], int] = lambda _: 1) -> Dict[str, Any]:
+    started = time.perf_counter()
+    latencies = [_timed(fn, item) for item in items]
+    return summarize(latencies, sum(weight(item) for item in items), time.perf_counter() - started)
+
+
+def _run_concurrent(fn: Callable[[Any], Any], items: Sequence[Any], concurrency: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(lambda item: _timed(fn, item), items))
+    return summarize(latencies, len(items), time.perf_counter() - started)
+
+
+def _batches(items: Sequence[Any], size: int) -> List[List[Any]]:
+    return [list(items[i:i + size]) for i in range(0, len(items), size)]
+
+
+def bench_preprocess(corpus: List[str], workers: Sequence[int], parallel: bool = True) -> Dict[str, Any]:
+    from modules.preprocessing import _clean_text, _normalize_all, _word_tokenize, preprocess, preprocess_many
+
+    results = {
+        "clean_text": _run_serial(_clean_text, corpus),
+        "normalize_all": _run_serial(_normalize_all, corpus),
+        "word_tokenize": _run_serial(_word_tokenize, corpus),
+        "preprocess": _run_serial(preprocess, corpus)
+    }
+    for count in workers if parallel else ():
+        preprocess_many(corpus[:count * 64], workers=count)
+        results[f"preprocess_many_w{count}"] = _run_serial(
+            lambda texts: preprocess_many(texts, workers=count), [corpus], weight=len
+        )
+    return results
+
+
+def bench_inference(texts: List[str], batch_sizes: Sequence[int], concurrency: Sequence[int]) -> Dict[str, Any]:
+    from modules.sentiment import classify, classify_batch
+
+    results = {}
+    for size in batch_sizes:
+        results[f"classify_batch_b{size}"] = _run_serial(classify_batch, _batches(texts, size), weight=len)
+    for level in concurrency:
+        results[f"classify_c{level}"] = _run_concurrent(classify, texts, level)
+    return results
+
+
+def bench_storage(records: List[Dict[str, Any]], batch_sizes: Sequence[int]) -> Dict[str, Any]:
+    from modules.storage import (
+        get_filtered_count,
+        get_history,
+        get_history_page,
+        get_total_count,
+        iter_history,
+        save_result,
+        save_results
+    )
+
+    results = {"save_result": _run_serial(save_result, records)}
+    for size in batch_sizes:
+        results[f"save_results_b{size}"] = _run_serial(save_results, _batches(records, size), weight=len)
+
+    queries = {
+        "get_history_first_page": lambda _: get_history(limit=10),
+        "get_history_deep_offset": lambda _: get_history(limit=10, offset=max(0, get_total_count() - 20)),
+        "get_history_page_cursor": lambda _: get_history_page(limit=10),
+        "get_total_count": lambda _: get_total_count(),
+        "get_filtered_count_search": lambda _: get_filtered_count(search_query="giao hang"),
+        "get_history_search": lambda _: get_history(limit=10, search_query="san pham"),
+        "iter_history_1000": lambda _: sum(1 for _ in itertools.islice(iter_history(), 1000))
+    }
+    for name, query in queries.items():
+        results[name] = _run_serial(query, range(50))
+    return results
+
+
+def bench_end_to_end(corpus: List[str], concurrency: Sequence[int]) -> Dict[str, Any]:
+    from modules.preprocessing import preprocess
+    from modules.sentiment import classify
+    from modules.storage import save_result
+
+    def score(text: str) -> None:
+        save_result(classify(preprocess(text)))
+
+    return {f"e2e_c{level}": _run_concurrent(score, corpus, level) for level in concurrency}
+
+
+def flatten(report: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {
+        f"{stage}.{case}": metrics
+        for stage, cases in report["results"].items()
+        for case, metrics in cases.items()
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    current_metrics = flatten(current)
+    same_tokenizer = current["meta"].get("tokenizer") == baseline["meta"].get("tokenizer")
+    for name, before in flatten(baseline).items():
+        after = current_metrics.get(name)
+        if after is None or (not same_tokenizer and name.split(".", 1)[0] in TOKENIZER_STAGES):
+            continue
+        if before["throughput"] and after["throughput"] < before["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {after['throughput']:.1f}/s < baseline {before['throughput']:.1f}/s"
+            )
+        if before["p95_ms"] and after["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {after['p95_ms']:.2f}ms > baseline {before['p95_ms']:.2f}ms")
+    return regressions
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks for the scoring pipeline")
+    parser.add_argument("--size", type=int, default=1000, help="Number of synthetic reviews")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 8, 32])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32])
+    parser.add_argument("--workers", type=_int_list, default=[2, 4])
+    parser.add_argument("--forward-ms", type=float, default=20.0, help="Stub model fixed cost per forward pass")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the result cache enabled")
+    parser.add_argument(
+        "--stub-tokenizer", action="store_true",
+        help="Use a stub word tokenizer (the default when underthesea is not installed)"
+    )
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    parser.add_argument("--baseline", default=None, help="Compare against a previous JSON report")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    from modules import sentiment, storage
+
+    workdir = tempfile.mkdtemp(prefix="sentiment-bench-")
+    storage.DB_PATH = Path(workdir) / "sentiments.db"
+    stub = StubSentimentPipeline(forward_ms=args.forward_ms)
+    sentiment.load_sentiment_model = lambda: stub
+    sentiment.CACHE_ENABLED = args.with_cache
+    stub_tokenizer = args.stub_tokenizer or not tokenizer_available()
+    if stub_tokenizer:
+        install_stub_tokenizer()
+        print("Using the stub word tokenizer; multi-process preprocessing is skipped", file=sys.stderr)
+
+    corpus = generate_corpus(args.size, seed=args.seed)
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "size": args.size,
+            "seed": args.seed,
+            "forward_ms": args.forward_ms,
+            "with_cache": args.with_cache,
+            "tokenizer": "stub" if stub_tokenizer else "underthesea"
+        },
+        "results": {}
+    }
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        from modules.preprocessing import preprocess, shutdown_preprocess_pools
+
+        if "preprocess" in stages:
+            report["results"]["preprocess"] = bench_preprocess(corpus, args.workers, parallel=not stub_tokenizer)
+            shutdown_preprocess_pools()
+
+        processed = [text for text in (preprocess(review) for review in corpus) if text]
+
+        if "inference" in stages:
+            report["results"]["inference"] = bench_inference(processed, args.batch_sizes, args.concurrency)
+
+        if "storage" in stages:
+            records = sentiment.classify_batch(processed)
+            report["results"]["storage"] = bench_storage(records, args.batch_sizes)
+
+        if "e2e" in stages:
+            report["results"]["e2e"] = bench_end_to_end(corpus, args.concurrency)
+
+        storage.close_all_connections()
+
+    report["meta"]["stub_forward_passes"] = stub.forward_passes
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    for name, metrics in flatten(report).items():
+        print(
+            f"{name:45s} {metrics['throughput']:10.1f}/s  "
+            f"p50 {metrics['p50_ms']:8.2f}ms  p95 {metrics['p95_ms']:8.2f}ms  p99 {metrics['p99_ms']:8.2f}ms",
+            file=sys.stderr
+        )
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
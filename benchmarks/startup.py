@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MODULES = ["modules.preprocessing", "modules.sentiment", "modules.storage", "modules.bulk", "app"]
+
+FIRST_CLASSIFICATION_SCRIPT = """
+import json
+import sys
+import time
+
+started = time.perf_counter()
+
+from modules import sentiment
+from modules.preprocessing import preprocess
+
+imported = time.perf_counter()
+
+if {stub!r}:
+    from benchmarks.stub_model import StubSentimentPipeline, install_stub_tokenizer, tokenizer_available
+
+    stub = StubSentimentPipeline()
+    sentiment.load_sentiment_model = lambda: stub
+    if not tokenizer_available():
+        install_stub_tokenizer()
+
+sentiment.start_model_warmup()
+result = sentiment.classify(preprocess("sp tot lam"))
+finished = time.perf_counter()
+
+json.dump({{
+    "import_s": imported - started,
+    "first_classification_s": finished - started,
+    "marks_s": sentiment.get_startup_report()
+}}, sys.stdout)
+"""
+
+
+def _run(code: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *code],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+    )
+
+
+def measure_import_times(modules: List[str], top: int) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    for module in modules:
+        completed = _run(["-X", "importtime", "-c", f"import {module}"])
+        if completed.returncode != 0:
+            report[module] = {"error": completed.stderr.strip().splitlines()[-1:]}
+            continue
+
+        entries = []
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative_us, name = line[len("import time:"):].split("|")
+            entries.append({"module": name.strip(), "cumulative_ms": int(cumulative_us) / 1000})
+
+        target = next((entry for entry in reversed(entries) if entry["module"] == module), None)
+        report[module] = {
+            "cumulative_ms": target["cumulative_ms"] if target else None,
+            "slowest": sorted(entries, key=lambda entry: entry["cumulative_ms"], reverse=True)[:top]
+        }
+    return report
+
+
+def measure_first_classification(stub: bool) -> Dict[str, Any]:
+    completed = _run(["-c", FIRST_CLASSIFICATION_SCRIPT.format(stub=stub)])
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report import time and time to first classification")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES))
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per module")
+    parser.add_argument("--stub", action="store_true", help="Use the stub model instead of PhoBERT")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if any module imports slower")
+    parser.add_argument("--max-first-classification-s", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    report = {
+        "imports": measure_import_times([m for m in args.modules.split(",") if m], args.top),
+        "first_classification": measure_first_classification(args.stub)
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    failures = []
+    if args.max_import_ms is not None:
+        for module, values in report["imports"].items():
+            if values.get("cumulative_ms") and values["cumulative_ms"] > args.max_import_ms:
+                failures.append(f"import {module}: {values['cumulative_ms']:.1f}ms > {args.max_import_ms}ms")
+    first = report["first_classification"].get("first_classification_s")
+    if args.max_first_classification_s is not None and first and first > args.max_first_classification_s:
+        failures.append(f"first classification: {first:.2f}s > {args.max_first_classification_s}s")
+
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import hashlib
+import importlib.util
+import re
+import time
+from typing import Any, Dict, List, Sequence, Union
+
+NEGATIVE_MARKERS = ("tệ", "chậm", "không", "xấu", "kém", "thất_vọng", "thất vọng", "lỗi", "đắt")
+POSITIVE_MARKERS = ("tốt", "đẹp", "nhanh", "ổn", "hài_lòng", "hài lòng", "chuẩn", "tuyệt", "đáng")
+COMPOUND_WORDS = (
+    "sản phẩm", "giao hàng", "đóng gói", "chất lượng", "hài lòng", "thất vọng", "nhân viên", "cửa hàng",
+    "dịch vụ", "tuyệt vời", "đáng tiền", "không thể", "mua hàng", "giá cả", "thời gian"
+)
+
+
+class StubSentimentPipeline:
+    def __init__(self, forward_ms: float = 20.0, per_item_ms: float = 1.0, per_char_us: float = 20.0):
+        self.forward_seconds = forward_ms / 1000
+        self.per_item_seconds = per_item_ms / 1000
+        self.per_char_seconds = per_char_us / 1_000_000
+        self.forward_passes = 0
+
+    def _predict(self, text: str) -> Dict[str, Any]:
+        lowered = text.lower()
+        negative = sum(lowered.count(marker) for marker in NEGATIVE_MARKERS)
+        positive = sum(lowered.count(marker) for marker in POSITIVE_MARKERS)
+        jitter = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:4], 16) / 0xFFFF * 0.1
+
+        if positive > negative:
+            return {"label": "POS", "score": 0.85 + jitter}
+        if negative > positive:
+            return {"label": "NEG", "score": 0.85 + jitter}
+        return {"label": "NEU", "score": 0.6 + jitter}
+
+    def __call__(self, texts: Union[str, List[str]], **kwargs: Any) -> List[Any]:
+        if isinstance(texts, str):
+            texts = [texts]
+
+        batch_size = max(1, kwargs.get("batch_size") or 1)
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            padded_chars = max(len(text) for text in batch) * len(batch)
+            time.sleep(
+                self.forward_seconds
+                + self.per_item_seconds * len(batch)
+                + self.per_char_seconds * padded_chars
+            )
+            self.forward_passes += 1
+
+        predictions = [self._predict(text) for text in texts]
+        if kwargs.get("top_k", 1) is None:
+            return [[prediction] for prediction in predictions]
+        return predictions
+
+
+class StubWordTokenizer:
+    def __init__(self, words: Sequence[str] = COMPOUND_WORDS):
+        alternatives = "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+        self._pattern = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+        self.calls = 0
+
+    def __call__(self, text: str, format: str = "text") -> str:
+        self.calls += 1
+        return self._pattern.sub(lambda match: match.group(0).replace(" ", "_"), text)
+
+
+def tokenizer_available() -> bool:
+    return importlib.util.find_spec("underthesea") is not None
+
+
+def install_stub_tokenizer() -> StubWordTokenizer:
+    from modules import preprocessing
+
+    tokenizer = StubWordTokenizer()
+    preprocessing._tokenizer = tokenizer
+    return tokenizer
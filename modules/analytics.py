@@ -0,0 +1,328 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from modules.storage import export_parquet, get_max_id, get_partitions
+
+ANALYTICS_DIR = Path(os.environ.get("SENTIMENT_ANALYTICS_DIR", "data/analytics"))
+MANIFEST_FILE = "manifest.json"
+MAX_SNAPSHOT_PARTS = int(os.environ.get("SENTIMENT_ANALYTICS_MAX_PARTS", "32"))
+SNAPSHOT_GRACE_S = float(os.environ.get("SENTIMENT_ANALYTICS_GRACE_S", "300"))
+
+TIME_BUCKETS = {
+    "hour": "substr(timestamp, 1, 13)",
+    "day": "substr(timestamp, 1, 10)",
+    "week": "strftime(date_trunc('week', CAST(substr(timestamp, 1, 10) AS DATE)), '%Y-%m-%d')",
+    "month": "substr(timestamp, 1, 7)"
+}
+
+logger = logging.getLogger(__name__)
+
+_refresh_lock = threading.Lock()
+_compact_lock = threading.Lock()
+_compaction: Optional[threading.Thread] = None
+_readers: Dict[int, int] = {}
+
+
+def _require_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("History analytics requires duckdb to be installed")
+    return duckdb
+
+
+def _read_manifest(directory: Path) -> Dict[str, Any]:
+    try:
+        with open(directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"generation": 0, "watermark": 0, "archive": [], "parts": [], "retired": []}
+    manifest.setdefault("generation", 0)
+    manifest.setdefault("retired", [])
+    return manifest
+
+
+def _write_manifest(directory: Path, manifest: Dict[str, Any]) -> None:
+    partial = directory / f"{MANIFEST_FILE}.{os.getpid()}.tmp"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(partial, directory / MANIFEST_FILE)
+
+
+def _archive_paths() -> List[str]:
+    return sorted(partition["path"] for partition in get_partitions())
+
+
+def _append_hot(directory: Path, manifest: Dict[str, Any]) -> bool:
+    watermark = get_max_id()
+    if watermark <= manifest["watermark"]:
+        return False
+
+    part = f"gen-{manifest['generation']}/hot-{manifest['watermark'] + 1}-{watermark}.parquet"
+    (directory / part).parent.mkdir(parents=True, exist_ok=True)
+    if export_parquet(directory / part, after_id=manifest["watermark"], until_id=watermark):
+        manifest["parts"].append(part)
+    else:
+        (directory / part).unlink(missing_ok=True)
+    manifest["watermark"] = watermark
+    return True
+
+
+def _collect_garbage(directory: Path, manifest: Dict[str, Any]) -> bool:
+    now = time.time()
+    kept = []
+    for retired in manifest["retired"]:
+        if now - retired["at"] < SNAPSHOT_GRACE_S or _readers.get(retired["generation"]):
+            kept.append(retired)
+            continue
+        for part in retired["parts"]:
+            (directory / part).unlink(missing_ok=True)
+        shutil.rmtree(directory / f"gen-{retired['generation']}", ignore_errors=True)
+
+    changed = len(kept) != len(manifest["retired"])
+    manifest["retired"] = kept
+    return changed
+
+
+def _needs_compaction(manifest: Dict[str, Any]) -> bool:
+    return manifest["archive"] != _archive_paths() or len(manifest["parts"]) >= MAX_SNAPSHOT_PARTS
+
+
+def _refresh(directory: Path, reader: bool) -> Optional[Dict[str, Any]]:
+    with _refresh_lock:
+        if not (directory / MANIFEST_FILE).exists():
+            return None
+        manifest = _read_manifest(directory)
+        if _append_hot(directory, manifest) | _collect_garbage(directory, manifest):
+            _write_manifest(directory, manifest)
+        if reader:
+            _readers[manifest["generation"]] = _readers.get(manifest["generation"], 0) + 1
+        return manifest
+
+
+def _release(generation: int) -> None:
+    with _refresh_lock:
+        _readers[generation] -= 1
+        if not _readers[generation]:
+            del _readers[generation]
+
+
+def compact_snapshot(directory: Path = ANALYTICS_DIR) -> Dict[str, Any]:
+    with _compact_lock:
+        directory.mkdir(parents=True, exist_ok=True)
+        with _refresh_lock:
+            generation = max(_read_manifest(directory)["generation"] + 1, int(time.time() * 1000))
+
+        while True:
+            archive = _archive_paths()
+            watermark = get_max_id()
+            part = f"gen-{generation}/hot-1-{watermark}.parquet"
+            (directory / part).parent.mkdir(parents=True, exist_ok=True)
+            parts = [part] if watermark and export_parquet(directory / part, until_id=watermark) else []
+            if _archive_paths() == archive:
+                break
+            shutil.rmtree(directory / f"gen-{generation}", ignore_errors=True)
+        if not parts:
+            (directory / part).unlink(missing_ok=True)
+
+        with _refresh_lock:
+            previous = _read_manifest(directory)
+            manifest = {
+                "generation": generation,
+                "watermark": watermark,
+                "archive": archive,
+                "parts": parts,
+                "retired": previous["retired"]
+            }
+            if (directory / MANIFEST_FILE).exists():
+                manifest["retired"].append({"generation": previous["generation"], "parts": previous["parts"], "at": time.time()})
+            _append_hot(directory, manifest)
+            _collect_garbage(directory, manifest)
+            _write_manifest(directory, manifest)
+        return manifest
+
+
+def _compact_in_background(directory: Path) -> None:
+    try:
+        compact_snapshot(directory)
+    except Exception:
+        logger.exception("Compacting the analytics snapshot failed")
+
+
+def _schedule_compaction(directory: Path) -> None:
+    global _compaction
+    with _refresh_lock:
+        if _compaction is not None and _compaction.is_alive():
+            return
+        _compaction = threading.Thread(
+            target=_compact_in_background, args=(directory,), name="sentiment-analytics-compaction", daemon=True
+        )
+        _compaction.start()
+
+
+def refresh_snapshot(directory: Path = ANALYTICS_DIR) -> Dict[str, Any]:
+    manifest = _refresh(directory, reader=False)
+    if manifest is None or _needs_compaction(manifest):
+        return compact_snapshot(directory)
+    return manifest
+
+
+def _files(manifest: Dict[str, Any], directory: Path) -> List[str]:
+    return manifest["archive"] + [str(directory / part) for part in manifest["parts"]]
+
+
+def _where(since: Optional[str], until: Optional[str], sentiment: Optional[str]):
+    conditions: List[str] = []
+    params: List[Any] = []
+    if since:
+        conditions.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        conditions.append("timestamp < ?")
+        params.append(until)
+    if sentiment:
+        conditions.append("sentiment = ?")
+        params.append(sentiment)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def _query(select: str, where: str, tail: str, params: List[Any], directory: Path) -> List[Dict[str, Any]]:
+    duckdb = _require_duckdb()
+
+    manifest = _refresh(directory, reader=True)
+    if manifest is None or _needs_compaction(manifest):
+        _schedule_compaction(directory)
+    if manifest is None:
+        raise RuntimeError("The analytics snapshot is being built, try again shortly")
+
+    try:
+        files = _files(manifest, directory)
+        if not files:
+            return []
+
+        source = ", ".join("'" + path.replace("'", "''") + "'" for path in files)
+        conn = duckdb.connect()
+        try:
+            cursor = conn.execute(f"SELECT {select} FROM read_parquet([{source}]){where} {tail}", params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+    except duckdb.Error as e:
+        raise RuntimeError(f"Analytics query failed: {e}") from e
+    finally:
+        _release(manifest["generation"])
+
+
+def sentiment_distribution(
+    granularity: str = "day",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    directory: Path = ANALYTICS_DIR
+) -> List[Dict[str, Any]]:
+    if granularity not in TIME_BUCKETS:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+    where, params = _where(since, until, None)
+    rows = _query(
+        f"{TIME_BUCKETS[granularity]} AS bucket, sentiment, COUNT(*) AS count",
+        where, "GROUP BY bucket, sentiment ORDER BY bucket", params, directory
+    )
+
+    series: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        point = series.setdefault(row["bucket"], {"bucket": row["bucket"]})
+        point[row["sentiment"]] = row["count"]
+    return list(series.values())
+
+
+def confidence_histogram(
+    bins: int = 20,
+    sentiment: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    directory: Path = ANALYTICS_DIR
+) -> List[Dict[str, Any]]:
+    bins = max(1, bins)
+    where, params = _where(since, until, sentiment)
+    rows = _query(
+        f"LEAST(CAST(floor(confidence * {bins}) AS INTEGER), {bins - 1}) AS bin, COUNT(*) AS count",
+        where, "GROUP BY bin ORDER BY bin", params, directory
+    )
+
+    counts = {row["bin"]: row["count"] for row in rows}
+    return [
+        {"bin_start": index / bins, "bin_end": (index + 1) / bins, "count": counts.get(index, 0)}
+        for index in range(bins)
+    ]
+
+
+def top_texts(
+    limit: int = 20,
+    sentiment: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    directory: Path = ANALYTICS_DIR
+) -> List[Dict[str, Any]]:
+    where, params = _where(since, until, sentiment)
+    return _query(
+        "text, COUNT(*) AS count, AVG(confidence) AS mean_confidence",
+        where, "GROUP BY text ORDER BY count DESC, text LIMIT ?", params + [max(1, limit)], directory
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export history to Parquet and run analytics queries")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="Stream the hot history table into one Parquet file")
+    export.add_argument("path")
+    export.add_argument("--after-id", type=int, default=0)
+
+    subparsers.add_parser("refresh", help="Incrementally refresh the analytics snapshot, compacting it when needed")
+    subparsers.add_parser("compact", help="Rebuild the analytics snapshot as a new generation")
+
+    distribution = subparsers.add_parser("distribution")
+    distribution.add_argument("--granularity", choices=list(TIME_BUCKETS), default="day")
+
+    histogram = subparsers.add_parser("histogram")
+    histogram.add_argument("--bins", type=int, default=20)
+    histogram.add_argument("--sentiment", default=None)
+
+    top = subparsers.add_parser("top")
+    top.add_argument("--limit", type=int, default=20)
+    top.add_argument("--sentiment", default=None)
+
+    for subparser in (distribution, histogram, top):
+        subparser.add_argument("--since", default=None)
+        subparser.add_argument("--until", default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        result: Any = {"rows": export_parquet(Path(args.path), after_id=args.after_id)}
+    elif args.command == "refresh":
+        result = refresh_snapshot()
+    elif args.command == "compact":
+        result = compact_snapshot()
+    elif args.command == "distribution":
+        result = sentiment_distribution(args.granularity, args.since, args.until)
+    elif args.command == "histogram":
+        result = confidence_histogram(args.bins, args.sentiment, args.since, args.until)
+    else:
+        result = top_texts(args.limit, args.sentiment, args.since, args.until)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import re
+import sys
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+ARCHIVE_COLUMNS = ("id", "text", "sentiment", "confidence", "timestamp")
+PARQUET_COMPRESSION = os.environ.get("SENTIMENT_ARCHIVE_COMPRESSION", "zstd")
+ARCHIVE_ROW_GROUP_SIZE = int(os.environ.get("SENTIMENT_ARCHIVE_ROW_GROUP_SIZE", "10000"))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("History archiving requires pyarrow to be installed")
+    return pyarrow, pyarrow.parquet
+
+
+def _schema(pa):
+    return pa.schema([
+        ("id", pa.int64()),
+        ("text", pa.string()),
+        ("sentiment", pa.string()),
+        ("confidence", pa.float64()),
+        ("timestamp", pa.string())
+    ])
+
+
+def write_batches(path: Path, batches: Iterable[Sequence[Dict[str, Any]]]) -> int:
+    pa, pq = _require_pyarrow()
+
+    schema = _schema(pa)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".parquet.tmp")
+    written = 0
+    try:
+        with pq.ParquetWriter(partial, schema, compression=PARQUET_COMPRESSION) as writer:
+            for batch in batches:
+                writer.write_table(pa.Table.from_pylist(
+                    [{column: row[column] for column in ARCHIVE_COLUMNS} for row in batch],
+                    schema=schema
+                ), row_group_size=max(1, ARCHIVE_ROW_GROUP_SIZE))
+                written += len(batch)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.replace(partial, path)
+    return written
+
+
+def _fold(text: str) -> str:
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"[^\W_]+", _fold(text))
+
+
+def _contains(tokens: List[str], phrase: List[str], prefix: bool) -> bool:
+    size = len(phrase)
+    for start in range(len(tokens) - size + 1):
+        window = tokens[start:start + size]
+        if window[:-1] == phrase[:-1] and (window[-1].startswith(phrase[-1]) if prefix else window[-1] == phrase[-1]):
+            return True
+    return False
+
+
+def _matcher(search_query: Optional[str]):
+    if not search_query:
+        return None
+    phrases = [phrase for phrase in (_tokens(term) for term in re.findall(r"\w+", search_query)) if phrase]
+    if not phrases:
+        return lambda text: search_query.casefold() in text.casefold()
+
+    def matches(text: str) -> bool:
+        tokens = _tokens(text)
+        return all(_contains(tokens, phrase, index == len(phrases) - 1) for index, phrase in enumerate(phrases))
+
+    return matches
+
+
+def read_partition(
+    path: Path,
+    search_query: Optional[str] = None,
+    sentiment_filter: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    _, pq = _require_pyarrow()
+
+    filters = []
+    if sentiment_filter:
+        filters.append(("sentiment", "=", sentiment_filter))
+    if since:
+        filters.append(("timestamp", ">=", since))
+    if until:
+        filters.append(("timestamp", "<", until))
+
+    rows = pq.read_table(path, columns=list(ARCHIVE_COLUMNS), filters=filters or None).to_pylist()
+    matches = _matcher(search_query)
+    if matches is not None:
+        rows = [row for row in rows if matches(row["text"])]
+    return rows
+
+
+def iter_partition(
+    path: Path,
+    search_query: Optional[str] = None,
+    sentiment_filter: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    _, pq = _require_pyarrow()
+
+    parquet = pq.ParquetFile(path)
+    matches = _matcher(search_query)
+    for index in reversed(range(parquet.num_row_groups)):
+        rows = parquet.read_row_group(index, columns=list(ARCHIVE_COLUMNS)).to_pylist()
+        for row in reversed(rows):
+            if (
+                (not sentiment_filter or row["sentiment"] == sentiment_filter)
+                and (not since or row["timestamp"] >= since)
+                and (not until or row["timestamp"] < until)
+                and (matches is None or matches(row["text"]))
+            ):
+                yield row
+
+
+def count_partition(path: Path, search_query: Optional[str] = None, sentiment_filter: Optional[str] = None) -> int:
+    _, pq = _require_pyarrow()
+
+    matches = _matcher(search_query)
+    count = 0
+    for batch in pq.ParquetFile(path).iter_batches(columns=["text", "sentiment"]):
+        for text, sentiment in zip(batch.column(0).to_pylist(), batch.column(1).to_pylist()):
+            if (not sentiment_filter or sentiment == sentiment_filter) and (matches is None or matches(text)):
+                count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from modules.storage import ARCHIVE_DIR, RETENTION_MONTHS, archive_old_partitions, get_partitions
+
+    parser = argparse.ArgumentParser(description="Move old history months from SQLite into Parquet partitions")
+    parser.add_argument("--retain-months", type=int, default=RETENTION_MONTHS, help="Months kept in the hot table")
+    parser.add_argument("--archive-dir", default=str(ARCHIVE_DIR))
+    parser.add_argument("--vacuum", action="store_true", help="Reclaim freed space in the database file")
+    parser.add_argument("--list", action="store_true", help="List archived partitions and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print(json.dumps(get_partitions(), ensure_ascii=False, indent=2))
+        return 0
+
+    if args.retain_months <= 0:
+        parser.error("--retain-months must be positive (or set SENTIMENT_RETENTION_MONTHS)")
+
+    archived = archive_old_partitions(args.retain_months, Path(args.archive_dir), vacuum=args.vacuum)
+    print(json.dumps(archived, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
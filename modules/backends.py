@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+BACKENDS = ("pytorch", "pytorch-int8", "onnx")
+DEFAULT_BACKEND = "pytorch"
+BACKEND_ENV = "SENTIMENT_BACKEND"
+ONNX_DIR = Path(os.environ.get("SENTIMENT_ONNX_DIR", "data/onnx"))
+
+DEFAULT_REFERENCE_SIZE = 200
+
+
+def configured_backend() -> str:
+    return os.environ.get(BACKEND_ENV, DEFAULT_BACKEND).strip().lower()
+
+
+def validate_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    return backend
+
+
+def get_backend_name() -> str:
+    return validate_backend(configured_backend())
+
+
+def _load_pytorch(model_name: str):
+    from transformers import pipeline
+
+    return pipeline('sentiment-analysis', model=model_name)
+
+
+def _load_pytorch_int8(model_name: str):
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return pipeline('sentiment-analysis', model=model, tokenizer=tokenizer)
+
+
+def _load_onnx(model_name: str):
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError:
+        raise RuntimeError("The 'onnx' backend requires optimum[onnxruntime] to be installed")
+    from transformers import AutoTokenizer, pipeline
+
+    export_dir = ONNX_DIR / model_name.replace("/", "--")
+    if (export_dir / "model.onnx").exists():
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        model = ORTModelForSequenceClassification.from_pretrained(export_dir)
+    else:
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        export_dir.mkdir(parents=True, exist_ok=True)
+        model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+
+    return pipeline('sentiment-analysis', model=model, tokenizer=tokenizer)
+
+
+_LOADERS = {
+    "pytorch": _load_pytorch,
+    "pytorch-int8": _load_pytorch_int8,
+    "onnx": _load_onnx
+}
+
+
+def build_pipeline(model_name: str, backend: str):
+    return _LOADERS[validate_backend(backend)](model_name)
+
+
+def _score_all(model, texts: List[str], batch_size: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    outputs = model(texts, batch_size=batch_size, truncation=True, top_k=None)
+    elapsed = time.perf_counter() - started
+
+    scores = [{item['label']: float(item['score']) for item in output} for output in outputs]
+    return {"scores": scores, "elapsed": elapsed}
+
+
+def check_parity(
+    texts: Sequence[str],
+    backend: str,
+    model_name: str,
+    reference_backend: str = "pytorch",
+    batch_size: int = 16
+) -> Dict[str, Any]:
+    texts = [text for text in texts if text]
+    if not texts:
+        raise ValueError("Parity check needs at least one reference text")
+
+    reference = _score_all(build_pipeline(model_name, reference_backend), texts, batch_size)
+    candidate = _score_all(build_pipeline(model_name, backend), texts, batch_size)
+
+    agreements = 0
+    drifts: List[float] = []
+    disagreements: List[Dict[str, Any]] = []
+
+    for text, expected, actual in zip(texts, reference["scores"], candidate["scores"]):
+        expected_label = max(expected, key=expected.get)
+        actual_label = max(actual, key=actual.get)
+        drifts.append(max(abs(expected[label] - actual.get(label, 0.0)) for label in expected))
+
+        if expected_label == actual_label:
+            agreements += 1
+        else:
+            disagreements.append({"text": text, "reference": expected_label, "candidate": actual_label})
+
+    drifts.sort()
+    return {
+        "backend": backend,
+        "reference_backend": reference_backend,
+        "samples": len(texts),
+        "label_agreement": agreements / len(texts),
+        "mean_confidence_drift": sum(drifts) / len(drifts),
+        "p95_confidence_drift": drifts[min(len(drifts) - 1, int(len(drifts) * 0.95))],
+        "max_confidence_drift": drifts[-1],
+        "reference_seconds": reference["elapsed"],
+        "candidate_seconds": candidate["elapsed"],
+        "speedup": reference["elapsed"] / candidate["elapsed"] if candidate["elapsed"] > 0 else 0.0,
+        "disagreements": disagreements[:20]
+    }
+
+
+def _load_reference_texts(path: Optional[str], size: int) -> List[str]:
+    from modules.preprocessing import preprocess
+
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [preprocess(line) for line in f if line.strip()][:size]
+
+    from modules.storage import get_history
+
+    return [preprocess(row["text"]) for row in get_history(limit=size)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from modules.sentiment import MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Compare an inference backend against fp32 PyTorch")
+    parser.add_argument("--backend", choices=BACKENDS, required=True)
+    parser.add_argument("--reference-backend", choices=BACKENDS, default="pytorch")
+    parser.add_argument("--texts", default=None, help="Reference texts, one per line (default: recent history)")
+    parser.add_argument("--size", type=int, default=DEFAULT_REFERENCE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    texts = _load_reference_texts(args.texts, args.size)
+    report = check_parity(
+        texts,
+        args.backend,
+        MODEL_NAME,
+        reference_backend=args.reference_backend,
+        batch_size=args.batch_size
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
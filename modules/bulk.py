@@ -0,0 +1,202 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from modules.preprocessing import preprocess_many, shutdown_preprocess_pools
+from modules.sentiment import classify_batch
+from modules.storage import clear_checkpoint, get_checkpoint, save_results
+
+DEFAULT_CHUNK_SIZE = 2000
+SUPPORTED_FORMATS = ("csv", "jsonl")
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def detect_format(name: str) -> str:
+    extension = os.path.splitext(name)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    raise ValueError(f"Unsupported file format: {name}")
+
+
+def _iter_csv(stream: TextIO, text_column: str, start_offset: int) -> Iterator[Optional[str]]:
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    if text_column not in header:
+        raise ValueError(f"Column '{text_column}' not found in CSV header")
+    column_index = header.index(text_column)
+
+    for row in itertools.islice(reader, start_offset, None):
+        yield row[column_index] if column_index < len(row) else None
+
+
+def _iter_jsonl(stream: TextIO, text_column: str, start_offset: int) -> Iterator[Optional[str]]:
+    for line in itertools.islice(stream, start_offset, None):
+        line = line.strip()
+        if not line:
+            yield None
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+            continue
+        value = record.get(text_column) if isinstance(record, dict) else None
+        yield value if isinstance(value, str) else None
+
+
+def iter_chunks(
+    stream: TextIO,
+    file_format: str,
+    text_column: str = "text",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    start_offset: int = 0
+) -> Iterator[Tuple[int, List[Optional[str]]]]:
+    if file_format == "csv":
+        rows = _iter_csv(stream, text_column, start_offset)
+    elif file_format == "jsonl":
+        rows = _iter_jsonl(stream, text_column, start_offset)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+    offset = start_offset
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        offset += len(chunk)
+        yield offset, chunk
+
+
+def score_chunk(texts: List[Optional[str]], workers: Optional[int] = 1) -> List[Dict[str, Any]]:
+    candidates = [text for text in texts if text and text.strip()]
+    processed = [text for text in preprocess_many(candidates, workers=workers) if text]
+
+    return classify_batch(processed)
+
+
+def score_stream(
+    stream: TextIO,
+    file_format: str,
+    job: str,
+    text_column: str = "text",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    resume: bool = True,
+    workers: Optional[int] = 1,
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    if file_format not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+    if resume:
+        start_offset = get_checkpoint(job)
+    else:
+        clear_checkpoint(job)
+        start_offset = 0
+
+    progress = {
+        "job": job,
+        "start_offset": start_offset,
+        "offset": start_offset,
+        "processed": 0,
+        "saved": 0,
+        "skipped": 0,
+        "elapsed": 0.0,
+        "rows_per_second": 0.0
+    }
+    started = time.perf_counter()
+
+    for offset, texts in iter_chunks(stream, file_format, text_column, chunk_size, start_offset):
+        results = score_chunk(texts, workers=workers)
+
+        if not save_results(results, checkpoint=(job, offset)):
+            raise RuntimeError(f"Failed to save results at offset {offset}")
+
+        elapsed = time.perf_counter() - started
+        progress.update({
+            "offset": offset,
+            "processed": progress["processed"] + len(texts),
+            "saved": progress["saved"] + len(results),
+            "skipped": progress["skipped"] + len(texts) - len(results),
+            "elapsed": elapsed
+        })
+        progress["rows_per_second"] = progress["processed"] / elapsed if elapsed > 0 else 0.0
+
+        if on_progress is not None:
+            on_progress(dict(progress))
+
+    return progress
+
+
+def score_file(
+    path: str,
+    job: Optional[str] = None,
+    file_format: Optional[str] = None,
+    text_column: str = "text",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    resume: bool = True,
+    workers: Optional[int] = 1,
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    file_format = file_format or detect_format(path)
+    job = job or f"file:{os.path.abspath(path)}"
+
+    with open(path, "r", encoding="utf-8-sig", newline="") as stream:
+        return score_stream(
+            stream,
+            file_format,
+            job,
+            text_column=text_column,
+            chunk_size=chunk_size,
+            resume=resume,
+            workers=workers,
+            on_progress=on_progress
+        )
+
+
+def _print_progress(progress: Dict[str, Any]) -> None:
+    print(
+        f"offset={progress['offset']} processed={progress['processed']} "
+        f"saved={progress['saved']} skipped={progress['skipped']} "
+        f"rate={progress['rows_per_second']:.1f} rows/s",
+        file=sys.stderr
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk sentiment scoring for CSV/JSONL files")
+    parser.add_argument("path", help="Input CSV or JSONL file")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, default=None)
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--job", default=None, help="Checkpoint name used for resuming")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    parser.add_argument("--workers", type=int, default=None, help="Preprocessing processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    summary = score_file(
+        args.path,
+        job=args.job,
+        file_format=args.format,
+        text_column=args.text_column,
+        chunk_size=max(1, args.chunk_size),
+        resume=not args.restart,
+        workers=args.workers,
+        on_progress=_print_progress
+    )
+    shutdown_preprocess_pools()
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from modules.storage import clear_result_cache, get_cached_results, save_cached_results
+
+CACHE_ENABLED = os.environ.get("SENTIMENT_CACHE_ENABLED", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.environ.get("SENTIMENT_CACHE_SIZE", "10000"))
+CACHE_PERSISTENT = os.environ.get("SENTIMENT_CACHE_PERSIST", "1") == "1"
+
+
+def make_key(text: str, model_id: str) -> str:
+    return hashlib.sha256(f"{model_id}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, persistent: bool = CACHE_PERSISTENT):
+        self.max_entries = max(0, max_entries)
+        self.persistent = persistent
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_id: Optional[str] = None
+        self._hits = 0
+        self._persistent_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        if self.max_entries == 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = entry
+            self._hits += len(found)
+
+        if missing and self.persistent:
+            stored = get_cached_results(missing)
+            with self._lock:
+                for key, entry in stored.items():
+                    self._remember(key, entry)
+                self._hits += len(stored)
+                self._persistent_hits += len(stored)
+            found.update(stored)
+
+        with self._lock:
+            self._misses += len(keys) - len(found)
+
+        return found
+
+    def put_many(self, entries: Dict[str, Dict[str, Any]], model_id: str) -> None:
+        if not entries:
+            return
+
+        with self._lock:
+            for key, entry in entries.items():
+                self._remember(key, entry)
+
+        if self.persistent:
+            save_cached_results(entries, model_id)
+
+    def set_model(self, model_id: str) -> None:
+        with self._lock:
+            if self._model_id == model_id:
+                return
+            self._model_id = model_id
+            self._entries.clear()
+
+        if self.persistent:
+            clear_result_cache(keep_model_id=model_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+        if self.persistent:
+            clear_result_cache()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "persistent_hits": self._persistent_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+
+result_cache = ResultCache()
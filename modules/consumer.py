@@ -0,0 +1,367 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from modules.bulk import score_chunk
+from modules.metrics import increment, timer
+from modules.storage import get_checkpoint, save_results
+
+CONSUMER_BATCH_SIZE = int(os.environ.get("SENTIMENT_CONSUMER_BATCH_SIZE", "256"))
+CONSUMER_MAX_INFLIGHT = int(os.environ.get("SENTIMENT_CONSUMER_MAX_INFLIGHT", "2"))
+CONSUMER_POLL_INTERVAL_S = float(os.environ.get("SENTIMENT_CONSUMER_POLL_S", "1.0"))
+CONSUMER_LAG_WARNING_S = float(os.environ.get("SENTIMENT_CONSUMER_LAG_WARNING_S", "60"))
+SPOOL_RESCAN_S = float(os.environ.get("SENTIMENT_SPOOL_RESCAN_S", "10"))
+
+STREAM_ID_SEQUENCE_BITS = 22
+SPOOL_FINGERPRINT_BYTES = 1024
+
+Batch = Tuple[str, int, List[Optional[str]], float]
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def _field(record: Any, text_field: str) -> Optional[str]:
+    value = record.get(text_field) if isinstance(record, dict) else None
+    return value if isinstance(value, str) else None
+
+
+def _record_time(record: Any, timestamp_field: str) -> Optional[float]:
+    value = record.get(timestamp_field) if isinstance(record, dict) else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+class SpoolSource:
+    def __init__(
+        self,
+        directory: Path,
+        text_field: str = "text",
+        pattern: str = "*.jsonl",
+        timestamp_field: str = "timestamp"
+    ):
+        self.directory = directory
+        self.text_field = text_field
+        self.pattern = pattern
+        self.timestamp_field = timestamp_field
+        self._positions: Dict[str, int] = {}
+        self._pending: Dict[str, Tuple[int, float]] = {}
+        self._jobs: Dict[Path, Tuple[Tuple[int, int, int], Optional[str]]] = {}
+        self._paths: List[Path] = []
+        self._scanned: Optional[Tuple[int, float]] = None
+        self._lock = threading.Lock()
+
+    def _list(self) -> List[Path]:
+        try:
+            modified = self.directory.stat().st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            now = time.monotonic()
+            if self._scanned is None or self._scanned[0] != modified or now - self._scanned[1] >= SPOOL_RESCAN_S:
+                self._paths = sorted(self.directory.glob(self.pattern))
+                self._scanned = (modified, now)
+                listed = set(self._paths)
+                self._jobs = {path: entry for path, entry in self._jobs.items() if path in listed}
+            return self._paths
+
+    def _job(self, path: Path, stat: os.stat_result) -> Optional[str]:
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._jobs.get(path)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+
+        with open(path, "rb") as f:
+            head = f.readline(SPOOL_FINGERPRINT_BYTES)
+        job = None
+        if head.endswith(b"\n") or len(head) >= SPOOL_FINGERPRINT_BYTES:
+            job = f"spool:{path.resolve()}:{stat.st_ino}:{hashlib.blake2b(head, digest_size=8).hexdigest()}"
+        with self._lock:
+            self._jobs[path] = (identity, job)
+        return job
+
+    def _position(self, job: str) -> int:
+        if job not in self._positions:
+            self._positions[job] = get_checkpoint(job)
+        return self._positions[job]
+
+    def poll(self, max_records: int) -> Optional[Batch]:
+        for path in self._list():
+            try:
+                stat = path.stat()
+                job = self._job(path, stat)
+            except OSError:
+                continue
+            if job is None:
+                continue
+            observed_at = time.time()
+            position = self._position(job)
+            if stat.st_size < position:
+                position = 0
+                self._pending.pop(job, None)
+            if stat.st_size <= position:
+                continue
+            pending = self._pending.setdefault(job, (stat.st_size, observed_at))
+
+            texts: List[Optional[str]] = []
+            produced_at: Optional[float] = None
+            with open(path, "rb") as f:
+                f.seek(position)
+                while len(texts) < max_records:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    position += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        texts.append(None)
+                        continue
+                    texts.append(_field(record, self.text_field))
+                    if produced_at is None:
+                        produced_at = _record_time(record, self.timestamp_field)
+
+            if texts:
+                self._positions[job] = position
+                if position >= stat.st_size:
+                    del self._pending[job]
+                elif position >= pending[0]:
+                    self._pending[job] = (stat.st_size, observed_at)
+                return job, position, texts, pending[1] if produced_at is None else produced_at
+        return None
+
+    def backlog(self) -> Optional[int]:
+        remaining = 0
+        for path in self._list():
+            try:
+                stat = path.stat()
+                job = self._job(path, stat)
+            except OSError:
+                continue
+            remaining += stat.st_size if job is None else max(0, stat.st_size - self._position(job))
+        return remaining
+
+    def close(self) -> None:
+        pass
+
+
+def _pack_stream_id(stream_id: str) -> int:
+    milliseconds, _, sequence = stream_id.partition("-")
+    return (int(milliseconds) << STREAM_ID_SEQUENCE_BITS) | int(sequence or 0)
+
+
+def _unpack_stream_id(offset: int) -> str:
+    return f"{offset >> STREAM_ID_SEQUENCE_BITS}-{offset & ((1 << STREAM_ID_SEQUENCE_BITS) - 1)}"
+
+
+class RedisStreamSource:
+    def __init__(self, url: str, stream: str, text_field: str = "text", block_ms: int = 1000):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Redis ingestion requires redis to be installed")
+
+        self.stream = stream
+        self.text_field = text_field
+        self.block_ms = block_ms
+        self.job = f"redis:{stream}"
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._last_id = _unpack_stream_id(get_checkpoint(self.job))
+
+    def poll(self, max_records: int) -> Optional[Batch]:
+        response = self._client.xread({self.stream: self._last_id}, count=max_records, block=self.block_ms)
+        if not response:
+            return None
+
+        entries = response[0][1]
+        self._last_id = entries[-1][0]
+        produced_at = int(entries[0][0].partition("-")[0]) / 1000
+        return self.job, _pack_stream_id(self._last_id), [_field(fields, self.text_field) for _, fields in entries], produced_at
+
+    def backlog(self) -> Optional[int]:
+        return None
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class StreamConsumer:
+    def __init__(
+        self,
+        source,
+        batch_size: int = CONSUMER_BATCH_SIZE,
+        max_inflight: int = CONSUMER_MAX_INFLIGHT,
+        poll_interval: float = CONSUMER_POLL_INTERVAL_S,
+        on_progress: Optional[ProgressCallback] = None
+    ):
+        self.source = source
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.on_progress = on_progress
+
+        self._batches: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_inflight))
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._progress: Dict[str, Any] = {
+            "batches": 0,
+            "processed": 0,
+            "saved": 0,
+            "skipped": 0,
+            "elapsed": 0.0,
+            "rows_per_second": 0.0,
+            "lag_seconds": 0.0,
+            "max_lag_seconds": 0.0,
+            "queued_batches": 0,
+            "backpressure_seconds": 0.0,
+            "backlog": None
+        }
+
+    def _enqueue(self, item: Any) -> bool:
+        blocked_since = None
+        while not self._stop.is_set():
+            try:
+                self._batches.put(item, timeout=self.poll_interval)
+                break
+            except queue.Full:
+                blocked_since = blocked_since or time.perf_counter()
+        if blocked_since is not None:
+            self._progress["backpressure_seconds"] += time.perf_counter() - blocked_since
+        return not self._stop.is_set()
+
+    def _read(self, drain: bool) -> None:
+        try:
+            while not self._stop.is_set():
+                batch = self.source.poll(self.batch_size)
+                if batch is not None:
+                    if not self._enqueue(batch):
+                        return
+                elif drain:
+                    break
+                else:
+                    self._stop.wait(self.poll_interval)
+        except Exception as e:
+            self._enqueue(e)
+            return
+        self._enqueue(None)
+
+    def _commit(self, batch: Batch) -> None:
+        job, offset, texts, produced_at = batch
+        with timer("consumer_batch"):
+            results = score_chunk(texts)
+            if not save_results(results, checkpoint=(job, offset)):
+                raise RuntimeError(f"Failed to save results for {job} at offset {offset}")
+        increment("consumer_rows", len(texts))
+
+        progress = self._progress
+        lag = max(0.0, time.time() - produced_at)
+        elapsed = time.perf_counter() - self._started
+        progress.update({
+            "batches": progress["batches"] + 1,
+            "processed": progress["processed"] + len(texts),
+            "saved": progress["saved"] + len(results),
+            "skipped": progress["skipped"] + len(texts) - len(results),
+            "elapsed": elapsed,
+            "lag_seconds": lag,
+            "max_lag_seconds": max(progress["max_lag_seconds"], lag),
+            "queued_batches": self._batches.qsize(),
+            "backlog": self.source.backlog()
+        })
+        progress["rows_per_second"] = progress["processed"] / elapsed if elapsed > 0 else 0.0
+
+        if self.on_progress is not None:
+            self.on_progress(dict(progress))
+
+    def run(self, drain: bool = False) -> Dict[str, Any]:
+        reader = threading.Thread(target=self._read, args=(drain,), name="sentiment-consumer-reader", daemon=True)
+        reader.start()
+
+        try:
+            while True:
+                try:
+                    item = self._batches.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+                    continue
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                self._commit(item)
+        finally:
+            self._stop.set()
+            reader.join(timeout=self.poll_interval * 2)
+            self.source.close()
+
+        return dict(self._progress)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def _print_progress(progress: Dict[str, Any]) -> None:
+    print(
+        f"batches={progress['batches']} processed={progress['processed']} "
+        f"saved={progress['saved']} rate={progress['rows_per_second']:.1f} rows/s "
+        f"lag={progress['lag_seconds']:.1f}s queued={progress['queued_batches']}"
+        + (f" backlog={progress['backlog']}B" if progress["backlog"] is not None else ""),
+        file=sys.stderr
+    )
+    if progress["lag_seconds"] > CONSUMER_LAG_WARNING_S:
+        print(f"warning: consumer is {progress['lag_seconds']:.0f}s behind", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Continuously score texts from a spool directory or Redis stream")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--spool", default=None, help="Directory of JSONL files to tail")
+    source.add_argument("--redis-stream", default=None, help="Redis stream key to read")
+    parser.add_argument("--redis-url", default=os.environ.get("SENTIMENT_REDIS_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--timestamp-field", default="timestamp", help="Spool record field used to measure lag")
+    parser.add_argument("--batch-size", type=int, default=CONSUMER_BATCH_SIZE)
+    parser.add_argument("--max-inflight", type=int, default=CONSUMER_MAX_INFLIGHT, help="Batches read ahead of inference")
+    parser.add_argument("--drain", action="store_true", help="Exit once the source has no more input")
+    args = parser.parse_args(argv)
+
+    if args.spool:
+        spool = Path(args.spool)
+        if not spool.is_dir():
+            parser.error(f"Spool directory not found: {spool}")
+        input_source: Any = SpoolSource(spool, args.text_field, timestamp_field=args.timestamp_field)
+    else:
+        input_source = RedisStreamSource(args.redis_url, args.redis_stream, args.text_field)
+
+    consumer = StreamConsumer(
+        input_source,
+        batch_size=args.batch_size,
+        max_inflight=args.max_inflight,
+        on_progress=_print_progress
+    )
+    signal.signal(signal.SIGTERM, lambda *_: consumer.stop())
+
+    try:
+        summary = consumer.run(drain=args.drain)
+    except KeyboardInterrupt:
+        consumer.stop()
+        summary = dict(consumer._progress)
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
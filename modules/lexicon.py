@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from modules.preprocessing import NEGATIONS
+
+CASCADE_ENABLED = os.environ.get("SENTIMENT_CASCADE", "0") == "1"
+CASCADE_THRESHOLD = float(os.environ.get("SENTIMENT_CASCADE_THRESHOLD", "0.8"))
+CASCADE_MAX_TOKENS = int(os.environ.get("SENTIMENT_CASCADE_MAX_TOKENS", "20"))
+
+NEGATED_POSITIVE_WEIGHT = 0.9
+NEGATED_NEGATIVE_WEIGHT = 0.4
+DIMINISHED_WEIGHT = 0.6
+
+POSITIVE_TERMS: Dict[str, float] = {
+    "tốt": 0.9,
+    "tuyệt": 0.9,
+    "tuyệt vời": 0.95,
+    "xuất sắc": 0.95,
+    "hoàn hảo": 0.95,
+    "hài lòng": 0.9,
+    "ưng ý": 0.9,
+    "ưng": 0.8,
+    "thích": 0.8,
+    "yêu": 0.8,
+    "đẹp": 0.85,
+    "xịn": 0.85,
+    "ngon": 0.85,
+    "đáng tiền": 0.9,
+    "tận tình": 0.85,
+    "nhiệt tình": 0.85,
+    "chu đáo": 0.85,
+    "bền": 0.7,
+    "chuẩn": 0.7,
+    "ổn": 0.7,
+    "nhanh": 0.6,
+    "hợp lý": 0.6,
+    "cảm ơn": 0.6
+}
+
+NEGATIVE_TERMS: Dict[str, float] = {
+    "tệ": 0.95,
+    "tồi": 0.9,
+    "tồi tệ": 0.95,
+    "dở": 0.9,
+    "kém": 0.85,
+    "kém chất lượng": 0.95,
+    "thất vọng": 0.95,
+    "chán": 0.85,
+    "xấu": 0.85,
+    "ghét": 0.9,
+    "bực": 0.85,
+    "bực mình": 0.9,
+    "khó chịu": 0.85,
+    "lừa đảo": 0.95,
+    "phí tiền": 0.9,
+    "đừng mua": 0.9,
+    "tránh xa": 0.9,
+    "hỏng": 0.85,
+    "hư": 0.8,
+    "rách": 0.8,
+    "vỡ": 0.8,
+    "lỗi": 0.7,
+    "chậm": 0.7,
+    "đắt": 0.6
+}
+
+INTENSIFIERS = ("rất", "quá", "lắm", "cực", "cực kỳ", "siêu", "vô cùng", "thật sự", "thực sự")
+DIMINISHERS = ("hơi", "khá", "tạm")
+CONTRASTS = ("nhưng", "tuy", "tuy nhiên", "song", "mỗi tội")
+FILLERS = (
+    "sản phẩm", "hàng", "cửa hàng", "giao hàng", "đóng gói", "chất lượng", "giá", "dịch vụ", "nhân viên",
+    "phục vụ", "mình", "tôi", "em", "này", "là", "thì", "và", "với", "của", "cho", "được", "nha", "nhé", "ạ",
+    "luôn", "cũng", "đã", "rồi", "nói chung", "mua", "đồ", "món", "cái", "nên", "có", "nhiều", "shop", "admin"
+)
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\w+", text.replace("_", " ").casefold())
+
+
+class LexiconScorer:
+    def __init__(
+        self,
+        positive: Optional[Dict[str, float]] = None,
+        negative: Optional[Dict[str, float]] = None,
+        max_tokens: int = CASCADE_MAX_TOKENS
+    ):
+        self.max_tokens = max_tokens
+        self._vocabulary: Dict[Tuple[str, ...], Tuple[str, float]] = {}
+        for kind, phrases in (
+            ("filler", FILLERS),
+            ("negation", NEGATIONS),
+            ("intensifier", INTENSIFIERS),
+            ("diminisher", DIMINISHERS),
+            ("contrast", CONTRASTS)
+        ):
+            for phrase in phrases:
+                self._vocabulary[tuple(phrase.split())] = (kind, 0.0)
+        for phrase, weight in (positive or POSITIVE_TERMS).items():
+            self._vocabulary[tuple(phrase.split())] = ("term", weight)
+        for phrase, weight in (negative or NEGATIVE_TERMS).items():
+            self._vocabulary[tuple(phrase.split())] = ("term", -weight)
+        self._longest = max(len(phrase) for phrase in self._vocabulary)
+
+        self._lock = threading.Lock()
+        self._answered = 0
+        self._deferred = 0
+
+    def _segment(self, tokens: List[str]) -> List[Tuple[str, float, int]]:
+        spans = []
+        index = 0
+        while index < len(tokens):
+            for length in range(min(self._longest, len(tokens) - index), 0, -1):
+                match = self._vocabulary.get(tuple(tokens[index:index + length]))
+                if match is not None:
+                    spans.append((match[0], match[1], length))
+                    index += length
+                    break
+            else:
+                spans.append(("unknown", 0.0, 1))
+                index += 1
+        return spans
+
+    def score(self, text: str) -> Optional[Dict[str, Any]]:
+        if "?" in text:
+            return None
+        tokens = _tokens(text)
+        if not tokens or len(tokens) > self.max_tokens:
+            return None
+
+        spans = self._segment(tokens)
+        kinds = [kind for kind, _, _ in spans]
+        if "contrast" in kinds or kinds[-1] == "negation":
+            return None
+
+        content = explained = 0
+        remaining = {True: 1.0, False: 1.0}
+        for index, (kind, weight, length) in enumerate(spans):
+            if kind == "filler":
+                continue
+            content += length
+            if kind == "unknown":
+                continue
+            explained += length
+            if kind != "term":
+                continue
+
+            before = kinds[max(0, index - 2):index]
+            after = kinds[index + 1] if index + 1 < len(kinds) else None
+            positive = weight > 0
+            evidence = abs(weight)
+            if "negation" in before:
+                evidence *= NEGATED_POSITIVE_WEIGHT if positive else NEGATED_NEGATIVE_WEIGHT
+                positive = not positive
+            elif "intensifier" in before or after == "intensifier":
+                evidence = 1 - (1 - evidence) ** 2
+            elif "diminisher" in before:
+                evidence *= DIMINISHED_WEIGHT
+            remaining[positive] *= 1 - evidence
+
+        positive_mass, negative_mass = 1 - remaining[True], 1 - remaining[False]
+        if (positive_mass > 0) == (negative_mass > 0):
+            return None
+        return {
+            "sentiment": "POSITIVE" if positive_mass > 0 else "NEGATIVE",
+            "confidence": max(positive_mass, negative_mass) * explained / content
+        }
+
+    def answer_many(self, texts: Sequence[str], threshold: float = CASCADE_THRESHOLD) -> Dict[str, Dict[str, Any]]:
+        answered: Dict[str, Dict[str, Any]] = {}
+        for text in texts:
+            prediction = self.score(text)
+            if prediction is not None and prediction["confidence"] >= threshold:
+                answered[text] = prediction
+
+        with self._lock:
+            self._answered += len(answered)
+            self._deferred += len(texts) - len(answered)
+        return answered
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self._answered + self._deferred
+            return {
+                "cascade_answered": self._answered,
+                "cascade_fallthrough": self._deferred,
+                "cascade_fallthrough_rate": self._deferred / total if total else 0.0
+            }
+
+
+lexicon_scorer = LexiconScorer()
+
+
+def evaluate_cascade(
+    texts: Sequence[str],
+    thresholds: Sequence[float],
+    batch_size: int = 32,
+    scorer: Optional[LexiconScorer] = None
+) -> Dict[str, Any]:
+    from modules.sentiment import _predict, load_sentiment_model
+
+    scorer = scorer or LexiconScorer()
+    load_sentiment_model()
+
+    started = time.perf_counter()
+    reference: List[Dict[str, Any]] = []
+    for start in range(0, len(texts), batch_size):
+        reference.extend(_predict(list(texts[start:start + batch_size])))
+    model_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first_stage = [scorer.score(text) for text in texts]
+    lexicon_seconds = time.perf_counter() - started
+
+    per_text = model_seconds / len(texts)
+    report: Dict[str, Any] = {
+        "samples": len(texts),
+        "model_ms_per_text": per_text * 1000,
+        "lexicon_ms_per_text": lexicon_seconds / len(texts) * 1000,
+        "thresholds": []
+    }
+    for threshold in thresholds:
+        answered = agreed = 0
+        disagreements: List[Dict[str, Any]] = []
+        for text, prediction, expected in zip(texts, first_stage, reference):
+            if prediction is None or prediction["confidence"] < threshold:
+                continue
+            answered += 1
+            if prediction["sentiment"] == expected["sentiment"]:
+                agreed += 1
+            elif len(disagreements) < 10:
+                disagreements.append({
+                    "text": text,
+                    "lexicon": prediction["sentiment"],
+                    "confidence": round(prediction["confidence"], 3),
+                    "model": expected["sentiment"]
+                })
+
+        cascade_seconds = lexicon_seconds + per_text * (len(texts) - answered)
+        report["thresholds"].append({
+            "threshold": threshold,
+            "fallthrough_rate": 1 - answered / len(texts),
+            "answered_agreement": agreed / answered if answered else 1.0,
+            "overall_agreement": (len(texts) - answered + agreed) / len(texts),
+            "estimated_latency_saving": 1 - cascade_seconds / model_seconds if model_seconds > 0 else 0.0,
+            "disagreements": disagreements
+        })
+    return report
+
+
+def _load_texts(path: Optional[str], size: int) -> List[str]:
+    from modules.preprocessing import preprocess
+
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()][:size]
+    else:
+        from modules.storage import get_history
+
+        lines = [row["text"] for row in get_history(limit=size)]
+    return [text for text in (preprocess(line) for line in lines) if text]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the lexicon cascade against model-only classification")
+    parser.add_argument("--texts", default=None, help="Texts, one per line (default: recent history)")
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--thresholds", default="0.6,0.7,0.8,0.9")
+    args = parser.parse_args(argv)
+
+    texts = _load_texts(args.texts, args.size)
+    if not texts:
+        parser.error("No texts to evaluate")
+
+    thresholds = [float(value) for value in args.thresholds.split(",") if value.strip()]
+    report = evaluate_cascade(texts, thresholds, max(1, args.batch_size))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+import bisect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_enabled = os.environ.get("SENTIMENT_METRICS", "0") == "1"
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, _Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = _Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def register_collector(self, collector: Callable[[], Dict[str, float]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _gauges(self) -> Dict[str, float]:
+        gauges: Dict[str, float] = {}
+        for collector in list(self._collectors):
+            gauges.update(collector())
+        return gauges
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "total_s": histogram.total,
+                    "mean_ms": histogram.total / histogram.count * 1000 if histogram.count else 0.0,
+                    "p50_ms": histogram.quantile(0.50) * 1000,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                    "p99_ms": histogram.quantile(0.99) * 1000
+                }
+                for stage, histogram in sorted(self._histograms.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {"stages": stages, "counters": counters, "gauges": self._gauges()}
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP sentiment_stage_seconds Time spent in each classification pipeline stage",
+            "# TYPE sentiment_stage_seconds histogram"
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'sentiment_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'sentiment_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'sentiment_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'sentiment_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE sentiment_{name}_total counter")
+                lines.append(f"sentiment_{name}_total {value}")
+
+        for name, value in sorted(self._gauges().items()):
+            lines.append(f"# TYPE sentiment_{name} gauge")
+            lines.append(f"sentiment_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+class _StageTimer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.started = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        registry.observe(self.stage, time.perf_counter() - self.started)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+registry = MetricsRegistry()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = enabled
+
+
+def timer(stage: str):
+    if _enabled:
+        return _StageTimer(stage)
+    return _NULL_TIMER
+
+
+def increment(name: str, value: float = 1) -> None:
+    if _enabled:
+        registry.increment(name, value)
+
+
+def register_collector(collector: Callable[[], Dict[str, float]]) -> None:
+    registry.register_collector(collector)
+
+
+def snapshot() -> Dict[str, Any]:
+    return registry.snapshot()
+
+
+def render_prometheus() -> str:
+    return registry.render_prometheus()
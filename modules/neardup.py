@@ -0,0 +1,285 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from modules.preprocessing import NEGATIONS
+
+NEARDUP_ENABLED = os.environ.get("SENTIMENT_NEARDUP", "0") == "1"
+NEARDUP_THRESHOLD = float(os.environ.get("SENTIMENT_NEARDUP_THRESHOLD", "0.8"))
+NEARDUP_PERMUTATIONS = int(os.environ.get("SENTIMENT_NEARDUP_PERMUTATIONS", "128"))
+NEARDUP_BANDS = int(os.environ.get("SENTIMENT_NEARDUP_BANDS", "32"))
+NEARDUP_MAX_ENTRIES = int(os.environ.get("SENTIMENT_NEARDUP_SIZE", "50000"))
+
+SEED_SOURCES = ("model", "cache")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+logger = logging.getLogger(__name__)
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    tokens = re.findall(r"\w+", text.replace("_", " ").casefold())
+    return frozenset(tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])])
+
+
+def jaccard(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    def __init__(self, permutations: int = NEARDUP_PERMUTATIONS, seed: int = 1):
+        generator = random.Random(seed)
+        self.permutations = max(1, permutations)
+        self._params = [
+            (generator.randint(1, _MERSENNE_PRIME - 1), generator.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(self.permutations)
+        ]
+
+    def signature(self, tokens: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [_token_hash(token) for token in tokens]
+        if not hashes:
+            return (_MAX_HASH,) * self.permutations
+        return tuple(
+            min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+            for a, b in self._params
+        )
+
+
+class NearDuplicateIndex:
+    def __init__(
+        self,
+        threshold: float = NEARDUP_THRESHOLD,
+        permutations: int = NEARDUP_PERMUTATIONS,
+        bands: int = NEARDUP_BANDS,
+        max_entries: int = NEARDUP_MAX_ENTRIES
+    ):
+        self.threshold = threshold
+        self.hasher = MinHasher(permutations)
+        self.bands = max(1, min(bands, self.hasher.permutations))
+        self.rows = self.hasher.permutations // self.bands
+        self.max_entries = max(0, max_entries)
+
+        self._entries: "OrderedDict[FrozenSet[str], Tuple[Tuple[int, ...], Dict[str, Any]]]" = OrderedDict()
+        self._buckets: List[Dict[Tuple[int, ...], set]] = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [signature[band * self.rows:(band + 1) * self.rows] for band in range(self.bands)]
+
+    def _forget(self, tokens: FrozenSet[str], signature: Tuple[int, ...]) -> None:
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            members = buckets.get(key)
+            if members is not None:
+                members.discard(tokens)
+                if not members:
+                    del buckets[key]
+
+    def _match(self, tokens: FrozenSet[str]) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if tokens in self._entries:
+            return 1.0, self._entries[tokens][1]
+
+        negations = tokens & NEGATIONS
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(self.hasher.signature(tokens))):
+            candidates.update(buckets.get(key, ()))
+
+        best: Optional[Tuple[float, Dict[str, Any]]] = None
+        for candidate in candidates:
+            if candidate & NEGATIONS != negations:
+                continue
+            similarity = jaccard(tokens, candidate)
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = similarity, self._entries[candidate][1]
+        return best
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        tokens = shingles(text)
+        if not tokens:
+            return None
+
+        with self._lock:
+            match = self._match(tokens)
+            if match is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return {**match[1], "similarity": match[0]}
+
+    def lookup_many(self, texts: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        for text in texts:
+            match = self.lookup(text)
+            if match is not None:
+                found[text] = match
+        return found
+
+    def add(self, text: str, prediction: Dict[str, Any], recent: bool = True) -> None:
+        tokens = shingles(text)
+        if not tokens or self.max_entries == 0:
+            return
+
+        signature = self.hasher.signature(tokens)
+        entry = {"sentiment": prediction["sentiment"], "confidence": prediction["confidence"], "matched": text}
+        with self._lock:
+            previous = self._entries.get(tokens)
+            if previous is not None:
+                if not recent:
+                    return
+                del self._entries[tokens]
+                self._forget(tokens, previous[0])
+            self._entries[tokens] = (signature, entry)
+            if not recent:
+                self._entries.move_to_end(tokens, last=False)
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(key, set()).add(tokens)
+
+            while len(self._entries) > self.max_entries:
+                evicted, (evicted_signature, _) = self._entries.popitem(last=False)
+                self._forget(evicted, evicted_signature)
+                self._evictions += 1
+
+    def add_many(self, predictions: Dict[str, Dict[str, Any]]) -> None:
+        for text, prediction in predictions.items():
+            self.add(text, prediction)
+
+    def load_history(self, limit: Optional[int] = None) -> int:
+        from modules.storage import get_recent_results
+
+        rows = get_recent_results(SEED_SOURCES, limit or self.max_entries)
+        for row in rows:
+            self.add(row["text"], row, recent=False)
+        return len(rows)
+
+    def _load_in_background(self) -> None:
+        try:
+            logger.info("Seeded the near-duplicate index with %d results", self.load_history())
+        except Exception:
+            logger.exception("Seeding the near-duplicate index failed")
+
+    def start_loading(self) -> threading.Thread:
+        thread = threading.Thread(target=self._load_in_background, name="sentiment-neardup-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "neardup_entries": len(self._entries),
+                "neardup_hits": self._hits,
+                "neardup_misses": self._misses,
+                "neardup_evictions": self._evictions,
+                "neardup_hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+
+near_duplicate_index = NearDuplicateIndex()
+
+
+def evaluate(
+    samples: Sequence[Tuple[str, str]],
+    thresholds: Sequence[float],
+    permutations: int = NEARDUP_PERMUTATIONS,
+    bands: int = NEARDUP_BANDS
+) -> List[Dict[str, Any]]:
+    report = []
+    for threshold in thresholds:
+        index = NearDuplicateIndex(threshold, permutations, bands, max_entries=len(samples))
+        seen = set()
+        exact = near = correct = 0
+        mismatches: List[Dict[str, Any]] = []
+
+        for text, sentiment in samples:
+            tokens = shingles(text)
+            if tokens in seen:
+                exact += 1
+            else:
+                match = index.lookup(text)
+                if match is not None:
+                    near += 1
+                    if match["sentiment"] == sentiment:
+                        correct += 1
+                    elif len(mismatches) < 10:
+                        mismatches.append({
+                            "text": text,
+                            "matched": match["matched"],
+                            "expected": sentiment,
+                            "reused": match["sentiment"],
+                            "similarity": round(match["similarity"], 3)
+                        })
+            seen.add(tokens)
+            index.add(text, {"sentiment": sentiment, "confidence": 0.0})
+
+        lookups = len(samples) - exact
+        report.append({
+            "threshold": threshold,
+            "samples": len(samples),
+            "exact_duplicates": exact,
+            "near_hits": near,
+            "near_hit_rate": near / lookups if lookups else 0.0,
+            "near_accuracy": correct / near if near else 1.0,
+            "model_calls_saved": near / len(samples) if samples else 0.0,
+            "mismatches": mismatches
+        })
+    return report
+
+
+def _load_samples(path: Optional[str], size: int) -> List[Tuple[str, str]]:
+    if not path:
+        from modules.storage import get_history
+
+        return [(row["text"], row["sentiment"]) for row in reversed(get_history(limit=size))]
+
+    from modules.preprocessing import preprocess
+    from modules.sentiment import classify_batch
+
+    with open(path, "r", encoding="utf-8") as f:
+        texts = [text for text in (preprocess(line) for line in f if line.strip()) if text][:size]
+    results = classify_batch(texts, reuse_near_duplicates=False, cascade=False)
+    return [(text, result["sentiment"]) for text, result in zip(texts, results)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report hit rate and label accuracy of near-duplicate reuse")
+    parser.add_argument("--texts", default=None, help="Texts to score, one per line (default: recent history)")
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--thresholds", default="0.5,0.6,0.7,0.8,0.9")
+    parser.add_argument("--permutations", type=int, default=NEARDUP_PERMUTATIONS)
+    parser.add_argument("--bands", type=int, default=NEARDUP_BANDS)
+    args = parser.parse_args(argv)
+
+    samples = _load_samples(args.texts, args.size)
+    if not samples:
+        parser.error("No texts to evaluate")
+
+    thresholds = [float(value) for value in args.thresholds.split(",") if value.strip()]
+    report = evaluate(samples, thresholds, args.permutations, args.bands)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
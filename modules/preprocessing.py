@@ -1,7 +1,13 @@
+import json
+import math
+import multiprocessing
+import os
 import re
-from typing import Dict
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Mapping, Optional, Pattern, Sequence
 
-import underthesea
+from modules.metrics import timer
 
 
 ABBREVIATION_DICT: Dict[str, str] = {
@@ -64,9 +70,41 @@ NON_DIACRITIC_DICT: Dict[str, str] = {
 
 COMBINED_NORMALIZATION_DICT: Dict[str, str] = {**ABBREVIATION_DICT, **NON_DIACRITIC_DICT}
 
+NEGATIONS = frozenset({"không", "chẳng", "chả", "chưa", "đừng", "chớ", "ko", "k"})
+
+NORMALIZATION_FILES_ENV = "SENTIMENT_NORMALIZATION_FILES"
+TOKEN_CACHE_SIZE = 50000
+
+_TOKEN_START = r"(?<![^\s\"'(\[{])"
+_TOKEN_END = r"(?=[.,!?;:…)\]}\"']*(?:\s|$))"
+
+PARALLEL_MIN_TEXTS = 512
+TARGET_CHUNK_CHARS = 32768
+MIN_CHUNK_SIZE = 64
+CHUNKS_PER_WORKER = 4
+
+_token_cache: Dict[str, str] = {}
+_word_normalizer: Optional[Pattern[str]] = None
+_phrase_normalizer: Optional[Pattern[str]] = None
+
+_tokenizer: Optional[Callable[..., str]] = None
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_tokenizer() -> Callable[..., str]:
+    global _tokenizer
+
+    if _tokenizer is None:
+        import underthesea
+
+        _tokenizer = underthesea.word_tokenize
+    return _tokenizer
+
 
 def _word_tokenize(text: str) -> str:
-    tokenized = underthesea.word_tokenize(text, format="text")
+    tokenized = _get_tokenizer()(text, format="text")
     return tokenized
 
 
@@ -81,19 +119,100 @@ def _apply_case_pattern(original: str, replacement: str) -> str:
         return replacement
 
 
-def _normalize_all(text: str) -> str:
-    words = text.split()
-    result = []
-    
+def _trie_regex(words: Sequence[str]) -> str:
+    trie: Dict[str, dict] = {}
     for word in words:
-        lower_word = word.lower()
-        if lower_word in COMBINED_NORMALIZATION_DICT:
-            replacement = COMBINED_NORMALIZATION_DICT[lower_word]
-            result.append(_apply_case_pattern(word, replacement))
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return emit(trie)
+
+
+def _compile_normalizer(keys: Sequence[str]) -> Optional[Pattern[str]]:
+    if not keys:
+        return None
+    return re.compile(_TOKEN_START + "(?:" + _trie_regex(keys) + ")" + _TOKEN_END, re.IGNORECASE)
+
+
+def _build_normalizers() -> None:
+    global _word_normalizer, _phrase_normalizer
+
+    words = [key for key in COMBINED_NORMALIZATION_DICT if " " not in key]
+    phrases = [key for key in COMBINED_NORMALIZATION_DICT if " " in key]
+    _word_normalizer = _compile_normalizer(words)
+    _phrase_normalizer = _compile_normalizer(phrases)
+    _token_cache.clear()
+
+
+_build_normalizers()
+
+
+def register_normalizations(mapping: Mapping[str, str]) -> None:
+    for key, value in mapping.items():
+        key = " ".join(key.split()).lower()
+        if key and value:
+            COMBINED_NORMALIZATION_DICT[key] = value
+    _build_normalizers()
+
+
+def load_normalization_file(path: str) -> Dict[str, str]:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            mapping = json.load(f)
+            if not isinstance(mapping, dict):
+                raise ValueError(f"Normalization file must contain a JSON object: {path}")
         else:
-            result.append(word)
-    
-    return " ".join(result)
+            mapping = {}
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "\t" not in line:
+                    continue
+                key, value = line.split("\t", 1)
+                mapping[key.strip()] = value.strip()
+
+    register_normalizations(mapping)
+    return mapping
+
+
+def _replace_match(match: "re.Match[str]") -> str:
+    original = match.group(0)
+    replacement = COMBINED_NORMALIZATION_DICT.get(" ".join(original.split()).lower())
+    if replacement is None:
+        return original
+    return _apply_case_pattern(original, replacement)
+
+
+def _normalize_token(token: str) -> str:
+    normalizer = _word_normalizer
+    normalized = normalizer.sub(_replace_match, token) if normalizer is not None else token
+
+    if len(_token_cache) >= TOKEN_CACHE_SIZE:
+        _token_cache.clear()
+    _token_cache[token] = normalized
+    return normalized
+
+
+def _normalize_all(text: str) -> str:
+    if _phrase_normalizer is not None:
+        text = _phrase_normalizer.sub(_replace_match, text)
+
+    cached = _token_cache.get
+    return " ".join([cached(word) or _normalize_token(word) for word in text.split()])
+
+
+for _path in filter(None, os.environ.get(NORMALIZATION_FILES_ENV, "").split(os.pathsep)):
+    load_normalization_file(_path)
 
 
 def _clean_text(text: str) -> str:
@@ -111,10 +230,65 @@ def preprocess(text: str) -> str:
     if not text.strip():
         return ""
 
-    processed_text = _clean_text(text)
+    with timer("clean_text"):
+        processed_text = _clean_text(text)
 
-    processed_text = _normalize_all(processed_text)
+    with timer("normalize"):
+        processed_text = _normalize_all(processed_text)
     
-    processed_text = _word_tokenize(processed_text)
+    with timer("word_tokenize"):
+        processed_text = _word_tokenize(processed_text)
     
-    return processed_text
\ No newline at end of file
+    return processed_text
+
+
+def _init_worker() -> None:
+    _word_tokenize("khởi động")
+
+
+def _preprocess_chunk(texts: List[str]) -> List[str]:
+    return [preprocess(text) for text in texts]
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return _pools[workers]
+
+
+def _chunk_size(texts: Sequence[str], workers: int) -> int:
+    average_chars = max(1.0, sum(len(text) for text in texts) / len(texts))
+    by_payload = int(TARGET_CHUNK_CHARS / average_chars)
+    by_balance = math.ceil(len(texts) / (workers * CHUNKS_PER_WORKER))
+    return max(MIN_CHUNK_SIZE, min(by_payload, by_balance))
+
+
+def preprocess_many(texts: Sequence[str], workers: Optional[int] = None) -> List[str]:
+    texts = list(texts)
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    if workers <= 1 or len(texts) < PARALLEL_MIN_TEXTS:
+        return _preprocess_chunk(texts)
+
+    size = _chunk_size(texts, workers)
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    if len(chunks) == 1:
+        return _preprocess_chunk(texts)
+
+    pool = _get_pool(workers)
+    results: List[str] = []
+    for chunk_result in pool.map(_preprocess_chunk, chunks):
+        results.extend(chunk_result)
+    return results
+
+
+def shutdown_preprocess_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=True)
+        _pools.clear()
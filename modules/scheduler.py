@@ -0,0 +1,163 @@
+import math
+import os
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+SCHEDULER_ENABLED = os.environ.get("SENTIMENT_SCHEDULER", "0") == "1"
+BUCKET_WIDTH = int(os.environ.get("SENTIMENT_BUCKET_WIDTH", "16"))
+MAX_BATCH_TOKENS = int(os.environ.get("SENTIMENT_MAX_BATCH_TOKENS", "8192"))
+MAX_SCHEDULED_BATCH = int(os.environ.get("SENTIMENT_SCHEDULER_MAX_BATCH", "64"))
+MAX_SEQUENCE_LENGTH = int(os.environ.get("SENTIMENT_MAX_SEQUENCE_LENGTH", "256"))
+LONG_TEXT_MODE = os.environ.get("SENTIMENT_LONG_TEXT", "chunk")
+CHUNK_STRIDE = int(os.environ.get("SENTIMENT_CHUNK_STRIDE", "32"))
+CHUNK_AGGREGATION = os.environ.get("SENTIMENT_CHUNK_AGGREGATION", "mean")
+
+LONG_TEXT_MODES = ("truncate", "chunk")
+
+Chunk = Tuple[Tuple[int, int], List[int]]
+AGGREGATIONS = ("mean", "max", "first")
+
+
+def _window_chunks(ids: List[int], window: int, stride: int) -> List[List[int]]:
+    if len(ids) <= window:
+        return [ids]
+
+    step = max(1, window - min(stride, window // 2))
+    chunks = []
+    for start in range(0, len(ids), step):
+        chunks.append(ids[start:start + window])
+        if start + window >= len(ids):
+            break
+    return chunks
+
+
+def aggregate(chunk_scores: List[List[float]], method: str) -> List[float]:
+    if method == "first" or len(chunk_scores) == 1:
+        return chunk_scores[0]
+    if method == "max":
+        return max(chunk_scores, key=max)
+    return [sum(column) / len(chunk_scores) for column in zip(*chunk_scores)]
+
+
+def padding_efficiency(batches: Sequence[Sequence[int]]) -> Dict[str, float]:
+    real = sum(sum(lengths) for lengths in batches)
+    padded = sum(max(lengths) * len(lengths) for lengths in batches if lengths)
+    return {
+        "real_tokens": real,
+        "padded_tokens": padded,
+        "efficiency": real / padded if padded else 1.0
+    }
+
+
+class LengthBucketScheduler:
+    def __init__(
+        self,
+        tokenizer,
+        model=None,
+        bucket_width: int = BUCKET_WIDTH,
+        max_batch_tokens: int = MAX_BATCH_TOKENS,
+        max_batch_size: int = MAX_SCHEDULED_BATCH,
+        max_length: int = MAX_SEQUENCE_LENGTH,
+        long_text: str = LONG_TEXT_MODE,
+        stride: int = CHUNK_STRIDE,
+        aggregation: str = CHUNK_AGGREGATION
+    ):
+        if long_text not in LONG_TEXT_MODES:
+            raise ValueError(f"Unknown long text mode '{long_text}', expected one of {', '.join(LONG_TEXT_MODES)}")
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown chunk aggregation '{aggregation}', expected one of {', '.join(AGGREGATIONS)}")
+
+        self.tokenizer = tokenizer
+        self.model = model
+        self.bucket_width = max(1, bucket_width)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_length = min(max_length, getattr(tokenizer, "model_max_length", max_length) or max_length)
+        self.special_tokens = tokenizer.num_special_tokens_to_add(pair=False)
+        self.long_text = long_text
+        self.stride = max(0, stride)
+        self.aggregation = aggregation
+
+        self._lock = threading.Lock()
+        self._real_tokens = 0
+        self._padded_tokens = 0
+        self._batches = 0
+        self._chunked_texts = 0
+
+    def _encode(self, texts: Sequence[str]) -> List[Chunk]:
+        window = self.max_length - self.special_tokens
+        encoded = self.tokenizer(list(texts), add_special_tokens=False, truncation=False)["input_ids"]
+
+        chunks: List[Chunk] = []
+        chunked = 0
+        for index, ids in enumerate(encoded):
+            if len(ids) > window and self.long_text == "chunk":
+                pieces = _window_chunks(ids, window, self.stride)
+                chunked += 1
+            else:
+                pieces = [ids[:window]]
+            for position, piece in enumerate(pieces):
+                chunks.append(((index, position), self.tokenizer.build_inputs_with_special_tokens(piece)))
+
+        with self._lock:
+            self._chunked_texts += chunked
+        return chunks
+
+    def plan(self, texts: Sequence[str]) -> List[List[Chunk]]:
+        buckets: Dict[int, List[Chunk]] = {}
+        for chunk in self._encode(texts):
+            buckets.setdefault(math.ceil(len(chunk[1]) / self.bucket_width), []).append(chunk)
+
+        batches: List[List[Chunk]] = []
+        for key in sorted(buckets):
+            batch: List[Chunk] = []
+            for chunk in sorted(buckets[key], key=lambda item: len(item[1])):
+                full = len(batch) >= self.max_batch_size
+                if batch and (full or len(chunk[1]) * (len(batch) + 1) > self.max_batch_tokens):
+                    batches.append(batch)
+                    batch = []
+                batch.append(chunk)
+            if batch:
+                batches.append(batch)
+        return batches
+
+    def _forward(self, batch: List[Chunk]) -> List[List[float]]:
+        import torch
+
+        encoded = self.tokenizer.pad({"input_ids": [ids for _, ids in batch]}, return_tensors="pt")
+        with torch.inference_mode():
+            logits = self.model(**encoded).logits
+        return torch.softmax(logits.float(), dim=-1).tolist()
+
+    def predict(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        if self.model is None:
+            raise RuntimeError("Scheduler was created without a model")
+
+        scores: Dict[int, Dict[int, List[float]]] = {}
+        for batch in self.plan(texts):
+            lengths = [len(ids) for _, ids in batch]
+            with self._lock:
+                self._real_tokens += sum(lengths)
+                self._padded_tokens += max(lengths) * len(lengths)
+                self._batches += 1
+            for ((index, position), _), probabilities in zip(batch, self._forward(batch)):
+                scores.setdefault(index, {})[position] = probabilities
+
+        id2label = self.model.config.id2label
+        predictions = []
+        for index in range(len(texts)):
+            chunk_scores = scores[index]
+            probabilities = aggregate([chunk_scores[position] for position in sorted(chunk_scores)], self.aggregation)
+            best = max(range(len(probabilities)), key=probabilities.__getitem__)
+            predictions.append({"label": id2label[best], "score": probabilities[best]})
+        return predictions
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "scheduled_batches": self._batches,
+                "chunked_texts": self._chunked_texts,
+                "real_tokens": self._real_tokens,
+                "padded_tokens": self._padded_tokens,
+                "padding_efficiency": self._real_tokens / self._padded_tokens if self._padded_tokens else 1.0
+            }
@@ -1,39 +1,328 @@
-import streamlit as st
-from transformers import pipeline
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from modules.backends import build_pipeline, configured_backend, validate_backend
+from modules.cache import CACHE_ENABLED, make_key, result_cache
+from modules.lexicon import CASCADE_ENABLED, CASCADE_THRESHOLD, lexicon_scorer
+from modules.metrics import increment, register_collector, timer
+from modules.neardup import NEARDUP_ENABLED, near_duplicate_index
+from modules.preprocessing import preprocess
+from modules.singleflight import SingleFlight
+from modules.scheduler import SCHEDULER_ENABLED, LengthBucketScheduler
+from modules.workers import WORKER_PROCESSES, WorkerPool, build_worker_pool
+
+MODEL_NAME = 'wonrax/phobert-base-vietnamese-sentiment'
+BACKEND = configured_backend()
+MODEL_ID = f"{MODEL_NAME}@{BACKEND}"
+
+MAX_BATCH_SIZE = int(os.environ.get("SENTIMENT_MAX_BATCH_SIZE", "32"))
+MAX_WAIT_MS = float(os.environ.get("SENTIMENT_MAX_WAIT_MS", "10"))
+COALESCE_TIMEOUT_S = float(os.environ.get("SENTIMENT_COALESCE_TIMEOUT_S", "30"))
+
+WARMUP_TEXT = "sản phẩm rất tốt"
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_scheduler: Optional[LengthBucketScheduler] = None
+_model_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_error: Optional[BaseException] = None
+_startup_marks: Dict[str, float] = {"module_imported": time.perf_counter()}
+
+LABEL_MAPPING = {
+    'POS': 'POSITIVE',
+    'NEU': 'NEUTRAL',
+    'NEG': 'NEGATIVE'
+}
+
+
+class ClassificationResult(dict):
+    __slots__ = ("source",)
+
+    def __init__(self, *args: Any, source: Optional[str] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.source = source
+
+
+def _mark(event: str) -> None:
+    _startup_marks.setdefault(event, time.perf_counter())
 
 
-@st.cache_resource(show_spinner=False)
 def load_sentiment_model():
-    return pipeline('sentiment-analysis', model='wonrax/phobert-base-vietnamese-sentiment')
+    global _model, _scheduler
+
+    if _model is not None:
+        return _model
+
+    with _model_lock:
+        if _model is None:
+            validate_backend(BACKEND)
+            if WORKER_PROCESSES > 0:
+                model = build_worker_pool(MODEL_NAME, BACKEND)
+            else:
+                model = build_pipeline(MODEL_NAME, BACKEND)
+            if SCHEDULER_ENABLED and getattr(model, "tokenizer", None) is not None:
+                _scheduler = LengthBucketScheduler(model.tokenizer, model.model)
+            if CACHE_ENABLED:
+                result_cache.set_model(MODEL_ID)
+            if NEARDUP_ENABLED:
+                near_duplicate_index.start_loading()
+            _model = model
+            _mark("model_loaded")
+    return _model
 
-def classify(text: str) -> Dict[str, Any]:
+
+def is_model_ready() -> bool:
+    return _model is not None
+
+
+def _warm_up() -> None:
+    global _warmup_error
 
     try:
+        warmup_text = preprocess(WARMUP_TEXT)
         model = load_sentiment_model()
-        result = model(text)
-        print(f"Model output: {result}")
-        
-        label = result[0]['label']
-        confidence = result[0]['score']
-
-        label_mapping = {
-            'POS': 'POSITIVE',
-            'NEU': 'NEUTRAL',
-            'NEG': 'NEGATIVE'
-        }
-        sentiment = label_mapping.get(label, 'NEUTRAL')
+        model([warmup_text], batch_size=1, truncation=True)
+        _mark("warmup_done")
+    except Exception as e:
+        _warmup_error = e
+        logger.exception("Sentiment model warm-up failed")
+
+
+def start_model_warmup() -> None:
+    global _warmup_thread
+
+    with _model_lock:
+        if _warmup_thread is not None or _model is not None:
+            return
+        _warmup_thread = threading.Thread(target=_warm_up, name="sentiment-model-warmup", daemon=True)
+        _warmup_thread.start()
+
+
+def get_warmup_error() -> Optional[BaseException]:
+    return _warmup_error
+
+
+def get_startup_report() -> Dict[str, Optional[float]]:
+    started = _startup_marks["module_imported"]
+    return {
+        event: round(_startup_marks[event] - started, 4) if event in _startup_marks else None
+        for event in ("model_loaded", "warmup_done", "first_classification")
+    }
+
 
-        text = text.replace('_', ' ')
-        text = ' '.join(text.split())
+def _build_result(text: str, prediction: Dict[str, Any], source: str) -> ClassificationResult:
+    text = text.replace('_', ' ')
+    text = ' '.join(text.split())
 
-        return {
-            'text': text,
-            'sentiment': sentiment,
-            'confidence': float(confidence),
-            'timestamp': datetime.now().isoformat()
+    return ClassificationResult({
+        'text': text,
+        'sentiment': prediction['sentiment'],
+        'confidence': prediction['confidence'],
+        'timestamp': datetime.now().isoformat()
+    }, source=source)
+
+
+def _predict(texts: List[str]) -> List[Dict[str, Any]]:
+    model = load_sentiment_model()
+    with timer("inference"):
+        if _scheduler is not None and _scheduler.model is getattr(model, "model", None):
+            outputs = _scheduler.predict(texts)
+        else:
+            outputs = model(texts, batch_size=len(texts), truncation=True)
+    increment("inference_batches")
+    increment("inference_texts", len(texts))
+    logger.debug("Model output: %s", outputs)
+
+    return [
+        {
+            'sentiment': LABEL_MAPPING.get(output['label'], 'NEUTRAL'),
+            'confidence': float(output['score'])
         }
-        
+        for output in outputs
+    ]
+
+
+def classify_batch(
+    texts: Sequence[str],
+    reuse_near_duplicates: bool = NEARDUP_ENABLED,
+    cascade: bool = CASCADE_ENABLED
+) -> List[Dict[str, Any]]:
+    texts = list(texts)
+    if not texts:
+        return []
+
+    try:
+        unique_texts = list(dict.fromkeys(texts))
+        predictions: Dict[str, Dict[str, Any]] = {}
+        sources: Dict[str, str] = {}
+
+        if CACHE_ENABLED:
+            keys = {text: make_key(text, MODEL_ID) for text in unique_texts}
+            cached = result_cache.get_many(list(keys.values()))
+            for text, key in keys.items():
+                if key in cached:
+                    predictions[text] = cached[key]
+                    sources[text] = "cache"
+
+        pending = [text for text in unique_texts if text not in predictions]
+        if pending and reuse_near_duplicates:
+            reused = near_duplicate_index.lookup_many(pending)
+            predictions.update(reused)
+            sources.update(dict.fromkeys(reused, "near_duplicate"))
+            pending = [text for text in pending if text not in predictions]
+
+        if pending and cascade:
+            with timer("cascade"):
+                answered = lexicon_scorer.answer_many(pending, CASCADE_THRESHOLD)
+            predictions.update(answered)
+            sources.update(dict.fromkeys(answered, "lexicon"))
+            pending = [text for text in pending if text not in predictions]
+
+        if pending:
+            fresh = dict(zip(pending, _predict(pending)))
+            predictions.update(fresh)
+            sources.update(dict.fromkeys(fresh, "model"))
+            if CACHE_ENABLED:
+                result_cache.put_many({keys[text]: entry for text, entry in fresh.items()}, MODEL_ID)
+            if reuse_near_duplicates:
+                near_duplicate_index.add_many(fresh)
+
+        _mark("first_classification")
+        return [_build_result(text, predictions[text], sources[text]) for text in texts]
+
     except Exception as e:
-        raise RuntimeError(f"Sentiment classification failed: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Sentiment classification failed: {str(e)}")
+
+
+class _MicroBatcher:
+    def __init__(self, max_batch_size: int, max_wait_ms: float, dispatchers: int = 1):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.dispatchers = max(1, dispatchers)
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_started(self) -> None:
+        if len(self._threads) == self.dispatchers and all(thread.is_alive() for thread in self._threads):
+            return
+
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.dispatchers:
+                thread = threading.Thread(
+                    target=self._run,
+                    name=f"sentiment-micro-batcher-{len(self._threads)}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = [
+                (text, future) for text, future in self._collect()
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+
+            try:
+                results = classify_batch([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+_batcher = _MicroBatcher(MAX_BATCH_SIZE, MAX_WAIT_MS, dispatchers=WORKER_PROCESSES)
+
+
+_text_flight = SingleFlight("coalesced_texts")
+_classify_flight = SingleFlight("coalesced_classifications")
+
+
+def _coalesce(flight: SingleFlight, key: str, fn, *args: Any) -> Dict[str, Any]:
+    try:
+        return flight.do(key, fn, *args, timeout=COALESCE_TIMEOUT_S)
+    except TimeoutError as e:
+        raise RuntimeError(f"Sentiment classification failed: {str(e)}")
+
+
+def _submit(text: str) -> Dict[str, Any]:
+    future = _batcher.submit(text)
+    try:
+        return future.result(timeout=COALESCE_TIMEOUT_S)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def classify(text: str) -> Dict[str, Any]:
+    with timer("classify"):
+        return _coalesce(_classify_flight, text, _submit, text)
+
+
+def _preprocess_and_classify(text: str) -> Dict[str, Any]:
+    processed_text = preprocess(text)
+    if not processed_text:
+        raise ValueError("Text is empty after preprocessing")
+    return classify(processed_text)
+
+
+def classify_text(text: str) -> Dict[str, Any]:
+    key = " ".join(text.split())
+    return _coalesce(_text_flight, key, _preprocess_and_classify, key)
+
+
+def _collect_gauges() -> Dict[str, float]:
+    stats = result_cache.stats()
+    return {
+        "micro_batch_queue_depth": _batcher._queue.qsize(),
+        "cache_entries": stats["size"],
+        "cache_hits": stats["hits"],
+        "cache_misses": stats["misses"],
+        "cache_evictions": stats["evictions"],
+        **_text_flight.stats(),
+        **_classify_flight.stats(),
+        **(near_duplicate_index.stats() if NEARDUP_ENABLED else {}),
+        **(lexicon_scorer.stats() if CASCADE_ENABLED else {}),
+        **(_scheduler.stats() if _scheduler is not None else {}),
+        **(_model.stats() if isinstance(_model, WorkerPool) else {})
+    }
+
+
+register_collector(_collect_gauges)
@@ -0,0 +1,57 @@
+import copy
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._deduplicated = 0
+        self._timeouts = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._executed += 1
+            else:
+                self._deduplicated += 1
+
+        if not leader:
+            try:
+                return copy.copy(future.result(timeout=timeout))
+            except FutureTimeoutError:
+                with self._lock:
+                    self._timeouts += 1
+                raise TimeoutError(f"Timed out after {timeout}s waiting for an identical in-flight request")
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+            raise
+
+        self._forget(key)
+        future.set_result(result)
+        return result
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                f"{self.name}_in_flight": len(self._calls),
+                f"{self.name}_executed": self._executed,
+                f"{self.name}_deduplicated": self._deduplicated,
+                f"{self.name}_wait_timeouts": self._timeouts
+            }
@@ -1,35 +1,249 @@
+import atexit
+import contextlib
+import heapq
+import json
+import logging
+import os
+import queue
+import re
 import sqlite3
+import sys
 import threading
+import time
+from collections import deque
+from collections.abc import Mapping
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from modules.metrics import register_collector, timer
 
 DB_PATH = Path("data/sentiments.db")
 
-_connection_pool = {}
-_pool_lock = threading.Lock()
+FTS_TOKENIZERS = {
+    "vietnamese": "unicode61 remove_diacritics 2",
+    "unicode61": "unicode61 remove_diacritics 0"
+}
+FTS_TOKENIZER = os.environ.get("SENTIMENT_FTS_TOKENIZER", "vietnamese")
 
+SYNCHRONOUS_MODE = os.environ.get("SENTIMENT_SQLITE_SYNCHRONOUS", "NORMAL").upper()
+WRITE_BEHIND = os.environ.get("SENTIMENT_WRITE_BEHIND", "0") == "1"
+WRITE_BATCH_SIZE = int(os.environ.get("SENTIMENT_WRITE_BATCH_SIZE", "256"))
+WRITE_FLUSH_MS = float(os.environ.get("SENTIMENT_WRITE_FLUSH_MS", "200"))
+WRITE_QUEUE_SIZE = int(os.environ.get("SENTIMENT_WRITE_QUEUE_SIZE", "10000"))
+WRITE_RETRIES = int(os.environ.get("SENTIMENT_WRITE_RETRIES", "3"))
+WRITE_SPILL_PATH = Path(os.environ.get("SENTIMENT_WRITE_SPILL_PATH", "data/write_behind_spill.jsonl"))
 
-def _get_connection() -> sqlite3.Connection:
-    thread_id = threading.current_thread().ident
-    
-    with _pool_lock:
-        if thread_id in _connection_pool:
+POOL_SIZE = int(os.environ.get("SENTIMENT_DB_POOL_SIZE", "8"))
+POOL_IDLE_SECONDS = float(os.environ.get("SENTIMENT_DB_POOL_IDLE_S", "60"))
+POOL_TIMEOUT_SECONDS = float(os.environ.get("SENTIMENT_DB_POOL_TIMEOUT_S", "5"))
+
+ARCHIVE_DIR = Path(os.environ.get("SENTIMENT_ARCHIVE_DIR", "data/archive"))
+RETENTION_MONTHS = int(os.environ.get("SENTIMENT_RETENTION_MONTHS", "0"))
+EXPORT_BATCH_SIZE = int(os.environ.get("SENTIMENT_EXPORT_BATCH_SIZE", "50000"))
+HISTORY_FETCH_SIZE = int(os.environ.get("SENTIMENT_HISTORY_FETCH_SIZE", "1000"))
+
+INSERT_SENTIMENT_SQL = "INSERT INTO sentiments (text, sentiment, confidence, timestamp, source) VALUES (?, ?, ?, ?, ?)"
+
+HISTORY_COLUMNS = ("id", "text", "sentiment", "confidence", "timestamp")
+HISTORY_SELECT = ", ".join(f"s.{column}" for column in HISTORY_COLUMNS)
+
+logger = logging.getLogger(__name__)
+
+_fts_available = False
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+
+class _Connection(sqlite3.Connection):
+    pool_generation = -1
+
+
+class HistoryRecord(Mapping):
+    __slots__ = HISTORY_COLUMNS
+
+    def __init__(self, id: int, text: str, sentiment: str, confidence: float, timestamp: str):
+        self.id = id
+        self.text = text
+        self.sentiment = sentiment
+        self.confidence = confidence
+        self.timestamp = timestamp
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in HISTORY_COLUMNS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(HISTORY_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(HISTORY_COLUMNS)
+
+    def __reduce__(self):
+        return HistoryRecord, tuple(getattr(self, column) for column in HISTORY_COLUMNS)
+
+    def __repr__(self) -> str:
+        return f"HistoryRecord({', '.join(f'{column}={getattr(self, column)!r}' for column in HISTORY_COLUMNS)})"
+
+
+def _history_record(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> HistoryRecord:
+    return HistoryRecord(*row)
+
+
+class ConnectionPool:
+    def __init__(self, max_size: int, idle_timeout: float, acquire_timeout: float):
+        self.max_size = max(1, max_size)
+        self.idle_timeout = max(0.0, idle_timeout)
+        self.acquire_timeout = max(0.0, acquire_timeout)
+        self._idle: "deque[Tuple[sqlite3.Connection, float]]" = deque()
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._size = 0
+        self._generation = 0
+        self._opened = 0
+        self._evicted = 0
+        self._waits = 0
+        self._timeouts = 0
+
+    def _evict_idle(self) -> List[sqlite3.Connection]:
+        expired = []
+        deadline = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < deadline:
+            expired.append(self._idle.popleft()[0])
+        self._size -= len(expired)
+        self._evicted += len(expired)
+        return expired
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._condition:
+            expired = self._evict_idle()
+            waited = False
+            while not self._idle and self._size >= self.max_size:
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                if not self._condition.wait_for(
+                    lambda: self._idle or self._size < self.max_size,
+                    timeout=self.acquire_timeout
+                ):
+                    self._timeouts += 1
+                    raise sqlite3.OperationalError("Timed out waiting for a database connection")
+            
+            conn = self._idle.pop()[0] if self._idle else None
+            if conn is None:
+                self._size += 1
+            generation = self._generation
+        
+        for stale in expired:
+            stale.close()
+        
+        if conn is not None:
+            return conn
+        
+        try:
+            conn = _open_connection()
+        except BaseException:
+            with self._condition:
+                if generation == self._generation:
+                    self._size -= 1
+                self._condition.notify()
+            raise
+        
+        conn.pool_generation = generation
+        with self._condition:
+            self._opened += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False) -> None:
+        if conn.in_transaction:
             try:
-                _connection_pool[thread_id].execute("SELECT 1")
+                conn.rollback()
             except sqlite3.Error:
-                del _connection_pool[thread_id]
+                discard = True
         
-        if thread_id not in _connection_pool:
-            DB_PATH.parent.mkdir(exist_ok=True)
-            
-            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            _connection_pool[thread_id] = conn
-            
-            _init_database(conn)
+        with self._condition:
+            current = getattr(conn, "pool_generation", None) == self._generation
+            if current and not discard:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            elif current:
+                self._size -= 1
+            self._condition.notify()
         
-        return _connection_pool[thread_id]
+        if conn is not None:
+            conn.close()
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+        
+        conn = self.acquire()
+        self._local.conn = conn
+        discard = False
+        try:
+            yield conn
+        except (sqlite3.InterfaceError, sqlite3.ProgrammingError):
+            discard = True
+            raise
+        finally:
+            self._local.conn = None
+            self.release(conn, discard=discard)
+
+    def close_idle(self) -> None:
+        with self._condition:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def close_all(self) -> None:
+        with self._condition:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size = 0
+            self._generation += 1
+            self._condition.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "max_size": self.max_size,
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "opened": self._opened,
+                "evicted": self._evicted,
+                "waits": self._waits,
+                "timeouts": self._timeouts
+            }
+
+
+_pool = ConnectionPool(POOL_SIZE, POOL_IDLE_SECONDS, POOL_TIMEOUT_SECONDS)
+
+
+def _open_connection() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(exist_ok=True)
+    
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=_Connection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    if SYNCHRONOUS_MODE in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        conn.execute(f"PRAGMA synchronous={SYNCHRONOUS_MODE}")
+    conn.execute("PRAGMA busy_timeout=5000")
+    
+    with _init_lock:
+        if DB_PATH not in _initialized_paths:
+            _init_database(conn)
+            _initialized_paths.add(DB_PATH)
+    return conn
 
 
 def _init_database(conn: sqlite3.Connection) -> None:
@@ -41,122 +255,1108 @@ def _init_database(conn: sqlite3.Connection) -> None:
             text TEXT NOT NULL,
             sentiment TEXT NOT NULL,
             confidence REAL NOT NULL,
-            timestamp TEXT NOT NULL
+            timestamp TEXT NOT NULL,
+            source TEXT
+        )
+    """)
+    
+    if "source" not in {column[1] for column in cursor.execute("PRAGMA table_info(sentiments)")}:
+        try:
+            cursor.execute("ALTER TABLE sentiments ADD COLUMN source TEXT")
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e):
+                raise
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_timestamp_id ON sentiments(timestamp, id)
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sentiment_timestamp_id ON sentiments(sentiment, timestamp, id)
+    """)
+    
+    cursor.execute("DROP INDEX IF EXISTS idx_timestamp")
+    cursor.execute("DROP INDEX IF EXISTS idx_sentiment")
+    cursor.execute("DROP INDEX IF EXISTS idx_text")
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scoring_checkpoints (
+            job TEXT PRIMARY KEY,
+            offset INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
         )
     """)
     
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_timestamp ON sentiments(timestamp)
+        CREATE TABLE IF NOT EXISTS result_cache (
+            key TEXT PRIMARY KEY,
+            model_id TEXT NOT NULL,
+            sentiment TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            created_at TEXT NOT NULL
+        )
     """)
     
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_sentiment ON sentiments(sentiment)
+        CREATE INDEX IF NOT EXISTS idx_result_cache_model ON result_cache(model_id)
     """)
     
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_text ON sentiments(text)
+        CREATE TABLE IF NOT EXISTS history_partitions (
+            path TEXT PRIMARY KEY,
+            month TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            min_timestamp TEXT NOT NULL,
+            max_timestamp TEXT NOT NULL,
+            archived_at TEXT NOT NULL
+        )
     """)
     
     conn.commit()
+    
+    _init_search_index(conn)
+    _init_aggregates(conn)
 
 
-def save_result(result: Dict[str, Any]) -> bool:
+@contextlib.contextmanager
+def _immediate_transaction(conn: sqlite3.Connection) -> Iterator[None]:
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        conn = _get_connection()
-        cursor = conn.cursor()
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _fold_sql(column: str) -> str:
+    if FTS_TOKENIZER == "vietnamese":
+        return f"replace(replace({column}, 'đ', 'd'), 'Đ', 'D')"
+    return column
+
+
+def _fold_text(text: str) -> str:
+    if FTS_TOKENIZER == "vietnamese":
+        return text.replace("đ", "d").replace("Đ", "D")
+    return text
+
+
+def _init_search_index(conn: sqlite3.Connection) -> None:
+    global _fts_available
+    
+    tokenizer = FTS_TOKENIZERS.get(FTS_TOKENIZER, FTS_TOKENIZERS["vietnamese"])
+    definition = f"CREATE VIRTUAL TABLE sentiments_fts USING fts5(text, tokenize = '{tokenizer}')"
+    
+    def is_current() -> bool:
+        existing = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'sentiments_fts'").fetchone()
+        return existing is not None and existing[0] == definition
+    
+    if is_current():
+        _fts_available = True
+        return
+    
+    try:
+        with _immediate_transaction(conn):
+            if is_current():
+                _fts_available = True
+                return
+            
+            conn.execute("DROP TRIGGER IF EXISTS sentiments_fts_insert")
+            conn.execute("DROP TRIGGER IF EXISTS sentiments_fts_delete")
+            conn.execute("DROP TRIGGER IF EXISTS sentiments_fts_update")
+            conn.execute("DROP TABLE IF EXISTS sentiments_fts")
+            conn.execute(definition)
+            
+            conn.execute(f"""
+                CREATE TRIGGER sentiments_fts_insert AFTER INSERT ON sentiments BEGIN
+                    INSERT INTO sentiments_fts (rowid, text) VALUES (new.id, {_fold_sql("new.text")});
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER sentiments_fts_delete AFTER DELETE ON sentiments BEGIN
+                    DELETE FROM sentiments_fts WHERE rowid = old.id;
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER sentiments_fts_update AFTER UPDATE OF text ON sentiments BEGIN
+                    DELETE FROM sentiments_fts WHERE rowid = old.id;
+                    INSERT INTO sentiments_fts (rowid, text) VALUES (new.id, {_fold_sql("new.text")});
+                END
+            """)
+            
+            conn.execute(f"INSERT INTO sentiments_fts (rowid, text) SELECT id, {_fold_sql('text')} FROM sentiments")
+        _fts_available = True
+    except sqlite3.Error:
+        logger.exception("Building the history search index failed")
+        _fts_available = False
+
+
+AGGREGATE_GRANULARITIES = {
+    "hour": "substr({column}, 1, 13)",
+    "day": "substr({column}, 1, 10)"
+}
+
+
+def _aggregate_buckets(row: str) -> List[Tuple[str, str]]:
+    buckets = [("'all'", "''")]
+    for granularity, expression in AGGREGATE_GRANULARITIES.items():
+        buckets.append((f"'{granularity}'", expression.format(column=f"{row}.timestamp")))
+    return buckets
+
+
+def _aggregate_increment_sql(row: str) -> str:
+    values = ", ".join(
+        f"({granularity}, {bucket}, {row}.sentiment, 1)" for granularity, bucket in _aggregate_buckets(row)
+    )
+    return (
+        f"INSERT INTO sentiment_aggregates (granularity, bucket, sentiment, count) VALUES {values} "
+        "ON CONFLICT(granularity, bucket, sentiment) DO UPDATE SET count = count + 1;"
+    )
+
+
+def _aggregate_decrement_sql(row: str) -> str:
+    statements = []
+    for granularity, bucket in _aggregate_buckets(row):
+        condition = f"granularity = {granularity} AND bucket = {bucket} AND sentiment = {row}.sentiment"
+        statements.append(f"UPDATE sentiment_aggregates SET count = count - 1 WHERE {condition};")
+        statements.append(f"DELETE FROM sentiment_aggregates WHERE {condition} AND count <= 0;")
+    return "\n".join(statements)
+
+
+def _aggregates_exist(conn: sqlite3.Connection) -> bool:
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sentiment_aggregates'")
+    return cursor.fetchone() is not None
+
+
+def _init_aggregates(conn: sqlite3.Connection) -> None:
+    if _aggregates_exist(conn):
+        return
+    
+    try:
+        with _immediate_transaction(conn):
+            if _aggregates_exist(conn):
+                return
+            
+            conn.execute("""
+                CREATE TABLE sentiment_aggregates (
+                    granularity TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (granularity, bucket, sentiment)
+                ) WITHOUT ROWID
+            """)
+            
+            conn.execute(f"""
+                CREATE TRIGGER sentiment_aggregates_insert AFTER INSERT ON sentiments BEGIN
+                    {_aggregate_increment_sql("new")}
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER sentiment_aggregates_delete AFTER DELETE ON sentiments BEGIN
+                    {_aggregate_decrement_sql("old")}
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER sentiment_aggregates_update AFTER UPDATE OF sentiment, timestamp ON sentiments BEGIN
+                    {_aggregate_decrement_sql("old")}
+                    {_aggregate_increment_sql("new")}
+                END
+            """)
+            
+            conn.execute(
+                "INSERT INTO sentiment_aggregates (granularity, bucket, sentiment, count) "
+                "SELECT 'all', '', sentiment, COUNT(*) FROM sentiments GROUP BY sentiment"
+            )
+            for granularity, expression in AGGREGATE_GRANULARITIES.items():
+                bucket = expression.format(column="timestamp")
+                conn.execute(
+                    "INSERT INTO sentiment_aggregates (granularity, bucket, sentiment, count) "
+                    f"SELECT '{granularity}', {bucket}, sentiment, COUNT(*) FROM sentiments "
+                    f"GROUP BY {bucket}, sentiment"
+                )
+    except sqlite3.Error:
+        logger.exception("Building sentiment aggregates failed")
+
+
+def _fts_query(search_query: str) -> Optional[str]:
+    terms = re.findall(r"\w+", _fold_text(search_query))
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+def _filter_clause(
+    search_query: Optional[str],
+    sentiment_filter: Optional[str],
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Tuple[str, str, List[Any], bool]:
+    source = "sentiments s"
+    conditions: List[str] = []
+    params: List[Any] = []
+    ranked = False
+    
+    if search_query:
+        match = _fts_query(search_query) if _fts_available else None
+        if match is not None:
+            source = "sentiments_fts f JOIN sentiments s ON s.id = f.rowid"
+            conditions.append("sentiments_fts MATCH ?")
+            params.append(match)
+            ranked = True
+        else:
+            conditions.append("s.text LIKE ?")
+            params.append(f"%{search_query}%")
+    
+    if sentiment_filter:
+        conditions.append("s.sentiment = ?")
+        params.append(sentiment_filter)
+    
+    if since:
+        conditions.append("s.timestamp >= ?")
+        params.append(since)
+    
+    if until:
+        conditions.append("s.timestamp < ?")
+        params.append(until)
+    
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return source, where, params, ranked
+
+
+def _result_row(result: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (result["text"], result["sentiment"], result["confidence"], result["timestamp"], getattr(result, "source", None))
+
+
+class _WriteBehindWriter:
+    def __init__(self, batch_size: int, flush_ms: float, max_queue: int, retries: int = WRITE_RETRIES):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_ms) / 1000
+        self.retries = max(0, retries)
+        self._queue: "queue.Queue[Optional[Tuple[Any, ...]]]" = queue.Queue(maxsize=max(1, max_queue))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._written = 0
+        self._failed = 0
+        self._retried = 0
+        self._spilled = 0
+        self._replayed = 0
+        self._batches = 0
+        self._last_error: Optional[str] = None
+
+    def submit(self, row: Tuple[Any, ...]) -> bool:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sentiment-storage-writer", daemon=True)
+                self._thread.start()
+            try:
+                self._queue.put_nowait(row)
+                return True
+            except queue.Full:
+                return False
+
+    def _collect(self) -> Tuple[List[Tuple[Any, ...]], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
         
-        cursor.execute(
-            "INSERT INTO sentiments (text, sentiment, confidence, timestamp) VALUES (?, ?, ?, ?)",
-            (result["text"], result["sentiment"], result["confidence"], result["timestamp"])
-        )
+        rows = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                row = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is None:
+                return rows, True
+            rows.append(row)
+        return rows, False
+
+    def _insert(self, conn: sqlite3.Connection, rows: List[Tuple[Any, ...]]) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                with timer("write_behind_flush"), conn:
+                    conn.executemany(INSERT_SENTIMENT_SQL, rows)
+                return
+            except sqlite3.Error as e:
+                self._last_error = str(e)
+                if attempt == self.retries:
+                    raise
+                self._retried += 1
+                time.sleep(0.05 * 2 ** attempt)
+
+    def _append_spill(self, rows: List[Tuple[Any, ...]]) -> None:
+        WRITE_SPILL_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(WRITE_SPILL_PATH, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(list(row), ensure_ascii=False) + "\n" for row in rows)
+
+    def _spill(self, rows: List[Tuple[Any, ...]]) -> None:
+        try:
+            self._append_spill(rows)
+        except OSError:
+            self._failed += len(rows)
+            logger.exception("Write-behind flush of %d rows failed and could not be spilled", len(rows))
+            return
+        self._spilled += len(rows)
+        logger.error("Write-behind flush failed; spilled %d rows to %s", len(rows), WRITE_SPILL_PATH)
+
+    def _replay(self, conn: sqlite3.Connection) -> None:
+        if not WRITE_SPILL_PATH.exists():
+            return
+        
+        replaying = WRITE_SPILL_PATH.with_name(f"{WRITE_SPILL_PATH.name}.{os.getpid()}.replay")
+        try:
+            os.replace(WRITE_SPILL_PATH, replaying)
+            with open(replaying, "r", encoding="utf-8") as f:
+                rows = [tuple(json.loads(line)) for line in f if line.strip()]
+        except (OSError, ValueError):
+            logger.exception("Reading spilled write-behind rows failed")
+            return
         
-        conn.commit()
+        try:
+            self._insert(conn, rows)
+        except sqlite3.Error:
+            try:
+                self._append_spill(rows)
+                replaying.unlink()
+            except OSError:
+                logger.exception("Returning spilled write-behind rows failed; they remain in %s", replaying)
+            return
+        
+        replaying.unlink(missing_ok=True)
+        self._replayed += len(rows)
+        self._written += len(rows)
+        logger.info("Replayed %d spilled write-behind rows", len(rows))
+
+    def _write(self, conn: sqlite3.Connection, rows: List[Tuple[Any, ...]]) -> None:
+        try:
+            self._insert(conn, rows)
+        except sqlite3.Error:
+            self._spill(rows)
+            return
+        
+        self._written += len(rows)
+        self._batches += 1
+        self._replay(conn)
+
+    def _run(self) -> None:
+        conn = _open_connection()
+        try:
+            self._replay(conn)
+            stopping = False
+            while not stopping:
+                rows, stopping = self._collect()
+                if rows:
+                    self._write(conn, rows)
+                for _ in range(len(rows) + (1 if stopping else 0)):
+                    self._queue.task_done()
+        finally:
+            conn.close()
+
+    def flush(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            thread = self._thread
+            if thread is not None and thread.is_alive():
+                self._queue.put(None)
+                thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": WRITE_BEHIND,
+            "queue_depth": self._queue.qsize(),
+            "written": self._written,
+            "failed": self._failed,
+            "retried": self._retried,
+            "spilled": self._spilled,
+            "replayed": self._replayed,
+            "batches": self._batches,
+            "last_error": self._last_error
+        }
+
+
+_writer = _WriteBehindWriter(WRITE_BATCH_SIZE, WRITE_FLUSH_MS, WRITE_QUEUE_SIZE)
+
+
+def save_result(result: Dict[str, Any]) -> bool:
+    try:
+        with timer("save_result"):
+            row = _result_row(result)
+            if WRITE_BEHIND and _writer.submit(row):
+                return True
+            
+            with _pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute(INSERT_SENTIMENT_SQL, row)
+                
+                conn.commit()
         return True
     except (sqlite3.Error, KeyError):
         return False
 
 
+def flush_writes() -> None:
+    _writer.flush()
+
+
+def get_write_queue_depth() -> int:
+    return _writer.stats()["queue_depth"]
+
+
+def get_writer_stats() -> Dict[str, Any]:
+    return _writer.stats()
+
+
+def save_results(
+    results: Iterable[Dict[str, Any]],
+    checkpoint: Optional[Tuple[str, int]] = None
+) -> bool:
+    try:
+        with _pool.connection() as conn:
+            rows = [_result_row(result) for result in results]
+            
+            with timer("save_results"), conn:
+                conn.executemany(INSERT_SENTIMENT_SQL, rows)
+                
+                if checkpoint is not None:
+                    job, offset = checkpoint
+                    conn.execute(
+                        "INSERT INTO scoring_checkpoints (job, offset, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(job) DO UPDATE SET offset = excluded.offset, updated_at = excluded.updated_at",
+                        (job, offset, datetime.now().isoformat())
+                    )
+            return True
+    except (sqlite3.Error, KeyError):
+        return False
+
+
+def get_checkpoint(job: str) -> int:
+    try:
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT offset FROM scoring_checkpoints WHERE job = ?", (job,))
+            result = cursor.fetchone()
+            return result[0] if result else 0
+    except sqlite3.Error as e:
+        raise RuntimeError(f"Could not read the checkpoint for {job}: {e}") from e
+
+
+def clear_checkpoint(job: str) -> bool:
+    try:
+        with _pool.connection() as conn:
+            with conn:
+                conn.execute("DELETE FROM scoring_checkpoints WHERE job = ?", (job,))
+            return True
+    except sqlite3.Error:
+        return False
+
+
+def get_cached_results(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    if not keys:
+        return {}
+    
+    try:
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            found: Dict[str, Dict[str, Any]] = {}
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                cursor.execute(
+                    f"SELECT key, sentiment, confidence FROM result_cache WHERE key IN ({placeholders})",
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    found[row["key"]] = {"sentiment": row["sentiment"], "confidence": row["confidence"]}
+            return found
+    except sqlite3.Error:
+        return {}
+
+
+def save_cached_results(entries: Dict[str, Dict[str, Any]], model_id: str) -> bool:
+    if not entries:
+        return True
+    
+    try:
+        with _pool.connection() as conn:
+            created_at = datetime.now().isoformat()
+            
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO result_cache (key, model_id, sentiment, confidence, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (key, model_id, entry["sentiment"], entry["confidence"], created_at)
+                        for key, entry in entries.items()
+                    ]
+                )
+            return True
+    except (sqlite3.Error, KeyError):
+        return False
+
+
+def clear_result_cache(keep_model_id: Optional[str] = None) -> int:
+    try:
+        with _pool.connection() as conn:
+            with conn:
+                if keep_model_id is None:
+                    cursor = conn.execute("DELETE FROM result_cache")
+                else:
+                    cursor = conn.execute("DELETE FROM result_cache WHERE model_id != ?", (keep_model_id,))
+            return cursor.rowcount
+    except sqlite3.Error:
+        return 0
+
+
+def get_recent_results(sources: Sequence[str], limit: int) -> List[HistoryRecord]:
+    try:
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _history_record
+            
+            placeholders = ", ".join("?" * len(sources))
+            cursor.execute(
+                f"SELECT {HISTORY_SELECT} FROM sentiments s WHERE s.source IN ({placeholders}) ORDER BY s.id DESC LIMIT ?",
+                (*sources, limit)
+            )
+            return cursor.fetchall()
+    except sqlite3.Error:
+        return []
+
+
 def get_history(
     limit: int = 50, 
     offset: int = 0,
     search_query: Optional[str] = None,
-    sentiment_filter: Optional[str] = None
-) -> List[Dict[str, Any]]:
+    sentiment_filter: Optional[str] = None,
+    ranked: bool = True,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    include_archive: bool = False
+) -> List[HistoryRecord]:
     try:
-        conn = _get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM sentiments WHERE 1=1"
-        params: List[Any] = []
-        
-        if search_query:
-            query += " AND text LIKE ?"
-            params.append(f"%{search_query}%")
-        
-        if sentiment_filter:
-            query += " AND sentiment = ?"
-            params.append(sentiment_filter)
-        
-        query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            source, where, params, has_rank = _filter_clause(search_query, sentiment_filter, since, until)
+            if ranked and has_rank and not include_archive:
+                order = "f.rank, s.timestamp DESC, s.id DESC"
+            else:
+                order = "s.timestamp DESC, s.id DESC"
+            
+            query = f"SELECT {HISTORY_SELECT} FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?"
+            if include_archive:
+                params.extend([limit + offset, 0])
+            else:
+                params.extend([limit, offset])
+            
+            cursor.row_factory = _history_record
+            cursor.execute(query, params)
+            
+            rows = cursor.fetchall()
+            if include_archive:
+                rows = _merge_archived(rows, limit + offset, search_query, sentiment_filter, since, until)[offset:]
+            return rows
+    except sqlite3.Error:
+        return []
+
+
+def encode_cursor(record: Mapping) -> str:
+    return f"{record['timestamp']}|{record['id']}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    timestamp, _, row_id = cursor.rpartition("|")
+    if not timestamp:
+        raise ValueError(f"Invalid history cursor: {cursor}")
+    return timestamp, int(row_id)
+
+
+def get_history_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    direction: str = "next",
+    search_query: Optional[str] = None,
+    sentiment_filter: Optional[str] = None,
+    include_archive: bool = False
+) -> Dict[str, Any]:
+    if direction not in ("next", "prev"):
+        raise ValueError(f"Invalid pagination direction: {direction}")
+    
+    page: Dict[str, Any] = {"rows": [], "next_cursor": None, "prev_cursor": None}
+    try:
+        with _pool.connection() as conn:
+            db_cursor = conn.cursor()
+            
+            source, where, params, _ = _filter_clause(search_query, sentiment_filter)
+            bound = _decode_cursor(cursor) if cursor is not None else None
+            if bound is not None:
+                comparison = "<" if direction == "next" else ">"
+                where += (" AND " if where else " WHERE ") + f"(s.timestamp, s.id) {comparison} (?, ?)"
+                params.extend(bound)
+            
+            order = "DESC" if direction == "next" else "ASC"
+            db_cursor.row_factory = _history_record
+            db_cursor.execute(
+                f"SELECT {HISTORY_SELECT} FROM {source}{where} ORDER BY s.timestamp {order}, s.id {order} LIMIT ?",
+                params + [limit + 1]
+            )
+            rows = db_cursor.fetchall()
+            if include_archive:
+                rows = _merge_archived(
+                    rows, limit + 1, search_query, sentiment_filter,
+                    bound=bound, descending=direction == "next"
+                )
+    except sqlite3.Error:
+        return page
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+    
+    page["rows"] = rows
+    if rows:
+        if direction == "next":
+            page["next_cursor"] = encode_cursor(rows[-1]) if has_more else None
+            page["prev_cursor"] = encode_cursor(rows[0]) if cursor is not None else None
+        else:
+            page["next_cursor"] = encode_cursor(rows[-1])
+            page["prev_cursor"] = encode_cursor(rows[0]) if has_more else None
+    return page
+
+
+def get_partitions(since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    try:
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM history_partitions"
+            conditions: List[str] = []
+            params: List[Any] = []
+            
+            if since:
+                conditions.append("max_timestamp >= ?")
+                params.append(since)
+            
+            if until:
+                conditions.append("min_timestamp < ?")
+                params.append(until)
+            
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            
+            cursor.execute(query + " ORDER BY max_timestamp DESC", params)
+            return [dict(row) for row in cursor.fetchall()]
+    except sqlite3.Error:
+        return []
+
+
+def _merge_archived(
+    rows: List[HistoryRecord],
+    window: int,
+    search_query: Optional[str],
+    sentiment_filter: Optional[str],
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    bound: Optional[Tuple[str, int]] = None,
+    descending: bool = True
+) -> List[HistoryRecord]:
+    partitions = get_partitions(since, until)
+    if not partitions:
+        return rows
+    
+    from modules.archive import read_partition
+    
+    if not descending:
+        partitions.sort(key=lambda partition: partition["min_timestamp"])
+    
+    position = _history_position
+    for partition in partitions:
+        if len(rows) >= window:
+            edge = rows[window - 1]["timestamp"]
+            if edge > partition["max_timestamp"] if descending else edge < partition["min_timestamp"]:
+                break
+        if bound is not None and (
+            partition["min_timestamp"] > bound[0] if descending else partition["max_timestamp"] < bound[0]
+        ):
+            continue
         
-        cursor.execute(query, params)
+        try:
+            archived = read_partition(Path(partition["path"]), search_query, sentiment_filter, since, until)
+        except (OSError, RuntimeError, ValueError):
+            logger.exception("Reading history partition %s failed", partition["path"])
+            continue
         
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        archived = [HistoryRecord(**row) for row in archived]
+        if bound is not None:
+            archived = [
+                row for row in archived
+                if (position(row) < bound if descending else position(row) > bound)
+            ]
+        rows = sorted(rows + archived, key=position, reverse=descending)[:window]
+    
+    return rows
+
+
+def _history_position(row: Mapping) -> Tuple[str, int]:
+    return row["timestamp"], row["id"]
+
+
+def _iter_hot_history(
+    search_query: Optional[str],
+    sentiment_filter: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+    fetch_size: int
+) -> Iterator[HistoryRecord]:
+    conn = _pool.acquire()
+    try:
+        source, where, params, _ = _filter_clause(search_query, sentiment_filter, since, until)
+        cursor = conn.cursor()
+        cursor.row_factory = _history_record
+        cursor.execute(f"SELECT {HISTORY_SELECT} FROM {source}{where} ORDER BY s.timestamp DESC, s.id DESC", params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        _pool.release(conn)
+
+
+def _iter_archived_history(
+    search_query: Optional[str],
+    sentiment_filter: Optional[str],
+    since: Optional[str],
+    until: Optional[str]
+) -> Iterator[HistoryRecord]:
+    from modules.archive import iter_partition
+    
+    for partition in get_partitions(since, until):
+        try:
+            for row in iter_partition(Path(partition["path"]), search_query, sentiment_filter, since, until):
+                yield HistoryRecord(**row)
+        except (OSError, RuntimeError, ValueError):
+            logger.exception("Reading history partition %s failed", partition["path"])
+
+
+def iter_history(
+    search_query: Optional[str] = None,
+    sentiment_filter: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    include_archive: bool = False,
+    fetch_size: int = HISTORY_FETCH_SIZE
+) -> Iterator[HistoryRecord]:
+    rows = _iter_hot_history(search_query, sentiment_filter, since, until, max(1, fetch_size))
+    if include_archive:
+        rows = heapq.merge(
+            rows, _iter_archived_history(search_query, sentiment_filter, since, until),
+            key=_history_position, reverse=True
+        )
+    yield from rows
+
+
+def iter_history_batches(
+    after_id: int = 0,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    until_id: Optional[int] = None
+) -> Iterator[List[HistoryRecord]]:
+    conn = _pool.acquire()
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = _history_record
+        cursor.execute(
+            f"SELECT {HISTORY_SELECT} FROM sentiments s WHERE s.id > ? AND s.id <= ? ORDER BY s.id",
+            (after_id, until_id if until_id is not None else sys.maxsize)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        _pool.release(conn)
+
+
+def get_max_id() -> int:
+    try:
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sentiments")
+            return cursor.fetchone()[0]
     except sqlite3.Error:
-        return []
+        return 0
+
+
+def export_parquet(
+    path: Path,
+    after_id: int = 0,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    until_id: Optional[int] = None
+) -> int:
+    from modules.archive import write_batches
+    
+    flush_writes()
+    with timer("export_parquet"):
+        return write_batches(Path(path), iter_history_batches(after_id, batch_size, until_id))
+
+
+def _month_start(now: datetime, months_back: int) -> str:
+    index = now.year * 12 + now.month - 1 - months_back
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _partition_batches(cursor: sqlite3.Cursor, partition: Dict[str, Any], batch_size: int) -> Iterator[List[HistoryRecord]]:
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        partition["rows"] += len(rows)
+        partition["max_id"] = max(partition["max_id"], max(row["id"] for row in rows))
+        partition["first"] = partition["first"] or rows[0]["timestamp"]
+        partition["last"] = rows[-1]["timestamp"]
+        yield rows
+
+
+def archive_old_partitions(
+    retain_months: int = RETENTION_MONTHS,
+    archive_dir: Path = ARCHIVE_DIR,
+    vacuum: bool = False,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    if retain_months <= 0:
+        raise ValueError("retain_months must be positive")
+    
+    from modules.archive import ARCHIVE_ROW_GROUP_SIZE, write_batches
+    
+    flush_writes()
+    cutoff = _month_start(now or datetime.now(), retain_months - 1)
+    archived: List[Dict[str, Any]] = []
+    
+    try:
+        with _pool.connection() as conn:
+            months = [
+                row[0] for row in conn.execute(
+                    "SELECT DISTINCT substr(timestamp, 1, 7) FROM sentiments WHERE timestamp < ? ORDER BY 1",
+                    (cutoff,)
+                )
+            ]
+            
+            for month in months:
+                upper = _month_start(datetime.strptime(month, "%Y-%m"), -1)
+                cursor = conn.cursor()
+                cursor.row_factory = _history_record
+                cursor.execute(
+                    f"SELECT {HISTORY_SELECT} FROM sentiments s "
+                    "WHERE s.timestamp >= ? AND s.timestamp < ? ORDER BY s.timestamp, s.id",
+                    (month, upper)
+                )
+                partition = {"rows": 0, "max_id": 0, "first": None, "last": None}
+                staging = archive_dir / f"sentiments-{month}.parquet"
+                write_batches(staging, _partition_batches(cursor, partition, max(1, ARCHIVE_ROW_GROUP_SIZE)))
+                if not partition["rows"]:
+                    staging.unlink(missing_ok=True)
+                    continue
+                
+                max_id = partition["max_id"]
+                path = archive_dir / f"sentiments-{month}-{max_id}.parquet"
+                os.replace(staging, path)
+                
+                selection = "FROM sentiments WHERE timestamp >= ? AND timestamp < ? AND id <= ?"
+                bounds = (month, upper, max_id)
+                try:
+                    with timer("archive_partition"), conn:
+                        counts = []
+                        for granularity, bucket in _aggregate_buckets("sentiments"):
+                            counts.extend(
+                                tuple(row) for row in conn.execute(
+                                    f"SELECT {granularity}, {bucket}, sentiment, COUNT(*) {selection} GROUP BY 2, 3",
+                                    bounds
+                                )
+                            )
+                        
+                        conn.execute(f"DELETE {selection}", bounds)
+                        conn.executemany(
+                            "INSERT INTO sentiment_aggregates (granularity, bucket, sentiment, count) VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT(granularity, bucket, sentiment) DO UPDATE SET count = count + excluded.count",
+                            counts
+                        )
+                        conn.execute(
+                            "INSERT INTO history_partitions "
+                            "(path, month, rows, min_timestamp, max_timestamp, archived_at) VALUES (?, ?, ?, ?, ?, ?)",
+                            (str(path), month, partition["rows"], partition["first"], partition["last"], datetime.now().isoformat())
+                        )
+                except sqlite3.Error:
+                    path.unlink(missing_ok=True)
+                    raise
+                
+                archived.append({"month": month, "path": str(path), "rows": partition["rows"]})
+            
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            if vacuum:
+                conn.execute("VACUUM")
+    except sqlite3.Error:
+        logger.exception("Archiving history partitions failed")
+    
+    return archived
+
+
+def get_write_version() -> str:
+    try:
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT (SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'sentiments'), "
+                "(SELECT COUNT(*) FROM history_partitions)"
+            )
+            inserted, partitions = cursor.fetchone()
+            return f"{inserted}:{partitions}"
+    except sqlite3.Error:
+        return ""
 
 
 def get_total_count() -> int:
     try:
-        conn = _get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM sentiments")
-        result = cursor.fetchone()
-        return result[0] if result else 0
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COALESCE(SUM(count), 0) FROM sentiment_aggregates WHERE granularity = 'all'")
+            result = cursor.fetchone()
+            return result[0] if result else 0
     except sqlite3.Error:
         return 0
 
 
+def get_sentiment_counts() -> Dict[str, int]:
+    try:
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT sentiment, count FROM sentiment_aggregates WHERE granularity = 'all'")
+            return {row["sentiment"]: row["count"] for row in cursor.fetchall()}
+    except sqlite3.Error:
+        return {}
+
+
+def get_sentiment_timeseries(
+    granularity: str = "day",
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    if granularity not in AGGREGATE_GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    
+    try:
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT bucket, sentiment, count FROM sentiment_aggregates WHERE granularity = ?"
+            params: List[Any] = [granularity]
+            
+            if since:
+                query += " AND bucket >= ?"
+                params.append(since)
+            
+            if until:
+                query += " AND bucket <= ?"
+                params.append(until)
+            
+            cursor.execute(query + " ORDER BY bucket", params)
+            
+            series: Dict[str, Dict[str, Any]] = {}
+            for row in cursor.fetchall():
+                point = series.setdefault(row["bucket"], {"bucket": row["bucket"]})
+                point[row["sentiment"]] = row["count"]
+            return list(series.values())
+    except sqlite3.Error:
+        return []
+
+
+def _count_archived(search_query: Optional[str], sentiment_filter: Optional[str]) -> int:
+    from modules.archive import count_partition
+    
+    count = 0
+    for partition in get_partitions():
+        try:
+            count += count_partition(Path(partition["path"]), search_query, sentiment_filter)
+        except (OSError, RuntimeError, ValueError):
+            logger.exception("Counting history partition %s failed", partition["path"])
+    return count
+
+
 def get_filtered_count(
     search_query: Optional[str] = None,
-    sentiment_filter: Optional[str] = None
+    sentiment_filter: Optional[str] = None,
+    include_archive: bool = False
 ) -> int:
+    archived = bool(get_partitions())
     try:
-        conn = _get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT COUNT(*) FROM sentiments WHERE 1=1"
-        params: List[Any] = []
-        
-        if search_query:
-            query += " AND text LIKE ?"
-            params.append(f"%{search_query}%")
-        
-        if sentiment_filter:
-            query += " AND sentiment = ?"
-            params.append(sentiment_filter)
-        
-        cursor.execute(query, params)
-        result = cursor.fetchone()
-        return result[0] if result else 0
+        with _pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            if not search_query and (include_archive or not archived):
+                if not sentiment_filter:
+                    return get_total_count()
+                cursor.execute(
+                    "SELECT count FROM sentiment_aggregates WHERE granularity = 'all' AND bucket = '' AND sentiment = ?",
+                    (sentiment_filter,)
+                )
+                result = cursor.fetchone()
+                return result[0] if result else 0
+            
+            source, where, params, _ = _filter_clause(search_query, sentiment_filter)
+            
+            cursor.execute(f"SELECT COUNT(*) FROM {source}{where}", params)
+            result = cursor.fetchone()
+            count = result[0] if result else 0
     except sqlite3.Error:
         return 0
+    
+    if search_query and include_archive and archived:
+        count += _count_archived(search_query, sentiment_filter)
+    return count
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    return _pool.stats()
 
 
 def close_connection() -> None:
-    thread_id = threading.current_thread().ident
-    
-    with _pool_lock:
-        if thread_id in _connection_pool:
-            _connection_pool[thread_id].close()
-            del _connection_pool[thread_id]
+    _pool.close_idle()
 
 
 def close_all_connections() -> None:
-    with _pool_lock:
-        for conn in _connection_pool.values():
-            conn.close()
-        _connection_pool.clear()
\ No newline at end of file
+    _writer.close()
+    _pool.close_all()
+
+
+def _collect_gauges() -> Dict[str, float]:
+    stats = _writer.stats()
+    pool = _pool.stats()
+    return {
+        "write_queue_depth": stats["queue_depth"],
+        "write_behind_failed_rows": stats["failed"],
+        "write_behind_retries": stats["retried"],
+        "write_behind_spilled_rows": stats["spilled"],
+        "db_pool_open": pool["open"],
+        "db_pool_in_use": pool["in_use"],
+        "db_pool_waits": pool["waits"],
+        "db_pool_timeouts": pool["timeouts"],
+        "db_pool_evicted": pool["evicted"]
+    }
+
+
+register_collector(_collect_gauges)
+atexit.register(_writer.close)
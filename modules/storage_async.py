@@ -0,0 +1,48 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from modules import storage
+
+_executor = ThreadPoolExecutor(max_workers=storage.POOL_SIZE, thread_name_prefix="sentiment-storage")
+
+
+async def _run(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def save_result(result: Dict[str, Any]) -> bool:
+    return await _run(storage.save_result, result)
+
+
+async def save_results(results: Iterable[Dict[str, Any]], checkpoint: Optional[Tuple[str, int]] = None) -> bool:
+    return await _run(storage.save_results, list(results), checkpoint)
+
+
+async def get_history(**kwargs: Any) -> List[storage.HistoryRecord]:
+    return await _run(storage.get_history, **kwargs)
+
+
+async def get_history_page(**kwargs: Any) -> Dict[str, Any]:
+    return await _run(storage.get_history_page, **kwargs)
+
+
+async def get_filtered_count(
+    search_query: Optional[str] = None,
+    sentiment_filter: Optional[str] = None,
+    include_archive: bool = False
+) -> int:
+    return await _run(storage.get_filtered_count, search_query, sentiment_filter, include_archive)
+
+
+async def get_sentiment_counts() -> Dict[str, int]:
+    return await _run(storage.get_sentiment_counts)
+
+
+async def get_sentiment_timeseries(**kwargs: Any) -> List[Dict[str, Any]]:
+    return await _run(storage.get_sentiment_timeseries, **kwargs)
+
+
+def shutdown() -> None:
+    _executor.shutdown(wait=True)
@@ -0,0 +1,250 @@
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+WORKER_PROCESSES = int(os.environ.get("SENTIMENT_WORKERS", "0"))
+WORKER_THREADS = int(os.environ.get("SENTIMENT_WORKER_THREADS", "0"))
+SHARED_WEIGHTS_DIR = Path(os.environ.get("SENTIMENT_SHARED_WEIGHTS_DIR", "data/shared_weights"))
+WEIGHTS_FILE = "weights.pt"
+BUFFERS_FILE = "buffers.pt"
+
+logger = logging.getLogger(__name__)
+
+
+def _export_complete(export_dir: Path) -> bool:
+    return (export_dir / WEIGHTS_FILE).exists() and (export_dir / BUFFERS_FILE).exists()
+
+
+def export_shared_weights(model_name: str, directory: Path = SHARED_WEIGHTS_DIR) -> Path:
+    export_dir = directory / model_name.replace("/", "--")
+    if _export_complete(export_dir):
+        return export_dir
+
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    state = model.state_dict()
+    partial = directory / f".{export_dir.name}.{uuid.uuid4().hex}.tmp"
+    partial.mkdir(parents=True)
+    try:
+        model.config.save_pretrained(partial)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(partial)
+        torch.save(state, partial / WEIGHTS_FILE)
+        torch.save({name: buffer for name, buffer in model.named_buffers() if name not in state}, partial / BUFFERS_FILE)
+        if not _export_complete(export_dir):
+            shutil.rmtree(export_dir, ignore_errors=True)
+        os.rename(partial, export_dir)
+    except OSError:
+        if not _export_complete(export_dir):
+            raise
+    finally:
+        shutil.rmtree(partial, ignore_errors=True)
+    return export_dir
+
+
+def _load_mapped_model(export_dir: Path):
+    import torch
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+
+    with torch.device("meta"):
+        model = AutoModelForSequenceClassification.from_config(AutoConfig.from_pretrained(export_dir))
+    state = torch.load(export_dir / WEIGHTS_FILE, map_location="cpu", mmap=True, weights_only=True)
+    model.load_state_dict(state, assign=True)
+    for name, buffer in torch.load(export_dir / BUFFERS_FILE, map_location="cpu", weights_only=True).items():
+        prefix, _, leaf = name.rpartition(".")
+        model.get_submodule(prefix).register_buffer(leaf, buffer, persistent=False)
+
+    missing = [name for name, tensor in itertools.chain(model.named_parameters(), model.named_buffers()) if tensor.is_meta]
+    if missing:
+        raise RuntimeError(f"Shared weights in {export_dir} are missing {', '.join(missing)}")
+    model.eval()
+    return model
+
+
+def _worker_main(export_dir: str, threads: int, index: int, requests, results) -> None:
+    import torch
+    from transformers import AutoTokenizer
+
+    from modules.scheduler import LengthBucketScheduler
+
+    torch.set_num_threads(threads)
+    scheduler = LengthBucketScheduler(AutoTokenizer.from_pretrained(export_dir), _load_mapped_model(Path(export_dir)))
+    results.put(("ready", index, None))
+
+    while True:
+        job = requests.get()
+        if job is None:
+            return
+
+        job_id, texts = job
+        try:
+            results.put(("ok", job_id, scheduler.predict(texts)))
+        except Exception as e:
+            results.put(("error", job_id, str(e)))
+
+
+class WorkerPool:
+    def __init__(self, model_name: str, processes: int = WORKER_PROCESSES, threads: int = WORKER_THREADS):
+        self.processes = max(1, processes)
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.processes)
+        self.export_dir = export_shared_weights(model_name)
+
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._workers: List[Any] = []
+        self._requests: List[Any] = []
+        self._pending: Dict[int, Tuple[int, Future]] = {}
+        self._load = [0] * self.processes
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+        self._ready = 0
+        self._completed = 0
+        self._failed = 0
+        self._restarts = 0
+        self._checked = time.monotonic()
+
+        for index in range(self.processes):
+            requests = self._context.Queue()
+            self._requests.append(requests)
+            self._workers.append(self._spawn(index, requests))
+
+        self._listener = threading.Thread(target=self._listen, name="sentiment-worker-results", daemon=True)
+        self._listener.start()
+        atexit.register(self.close)
+
+    def _spawn(self, index: int, requests):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(str(self.export_dir), self.threads, index, requests, self._results),
+            name=f"sentiment-inference-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def _take_pending(self, worker: Optional[int] = None) -> List[Future]:
+        taken = [job_id for job_id, (index, _) in self._pending.items() if worker is None or index == worker]
+        futures = []
+        for job_id in taken:
+            index, future = self._pending.pop(job_id)
+            self._load[index] -= 1
+            futures.append(future)
+        self._failed += len(futures)
+        return futures
+
+    def _fail_pending(self, message: str, futures: Optional[List[Future]] = None) -> None:
+        if futures is None:
+            with self._lock:
+                futures = self._take_pending()
+        for future in futures:
+            future.set_exception(RuntimeError(message))
+
+    def _replace_dead_workers(self) -> None:
+        self._checked = time.monotonic()
+        dead = [index for index, process in enumerate(self._workers) if not process.is_alive()]
+        if not dead or self._closed:
+            return
+
+        if self._ready == 0:
+            self._closed = True
+            self._fail_pending("Inference workers failed to start")
+            return
+
+        logger.warning("Restarting %d inference worker(s) that exited", len(dead))
+        for index in dead:
+            with self._lock:
+                stale, self._requests[index] = self._requests[index], self._context.Queue()
+                orphaned = self._take_pending(index)
+            stale.cancel_join_thread()
+            stale.close()
+            self._fail_pending("Inference worker exited", orphaned)
+            self._workers[index] = self._spawn(index, self._requests[index])
+            self._restarts += 1
+
+    def _listen(self) -> None:
+        while not self._closed:
+            if time.monotonic() - self._checked >= 1.0:
+                self._replace_dead_workers()
+            try:
+                status, job_id, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+
+            if status == "ready":
+                self._ready += 1
+                continue
+
+            with self._lock:
+                index, future = self._pending.pop(job_id, (None, None))
+                if future is not None:
+                    self._load[index] -= 1
+                    self._completed += 1
+            if future is None:
+                continue
+            if status == "ok":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        if self._closed:
+            raise RuntimeError("Inference worker pool is closed")
+
+        future: Future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            index = min(range(self.processes), key=self._load.__getitem__)
+            self._pending[job_id] = (index, future)
+            self._load[index] += 1
+            self._requests[index].put((job_id, list(texts)))
+        return future
+
+    def __call__(self, texts: Sequence[str], **kwargs: Any) -> List[Dict[str, Any]]:
+        if isinstance(texts, str):
+            texts = [texts]
+        return self.submit(texts).result()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "inference_workers": self.processes,
+                "inference_workers_alive": sum(1 for process in self._workers if process.is_alive()),
+                "inference_workers_ready": self._ready,
+                "inference_worker_pending": len(self._pending),
+                "inference_worker_completed": self._completed,
+                "inference_worker_failed": self._failed,
+                "inference_worker_restarts": self._restarts
+            }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._fail_pending("Inference worker pool is closed")
+
+
+def build_worker_pool(model_name: str, backend: str, processes: int = WORKER_PROCESSES) -> WorkerPool:
+    if backend != "pytorch":
+        raise ValueError(f"Inference workers share fp32 PyTorch weights and do not support the '{backend}' backend")
+    return WorkerPool(model_name, processes=processes)
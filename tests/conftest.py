@@ -0,0 +1,15 @@
+import pytest
+
+from modules import storage
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    storage.close_all_connections()
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "sentiments.db")
+    yield storage
+    storage.close_all_connections()
+
+
+def make_result(text, sentiment="POSITIVE", timestamp="2025-03-10T10:00:00", confidence=0.9):
+    return {"text": text, "sentiment": sentiment, "confidence": confidence, "timestamp": timestamp}
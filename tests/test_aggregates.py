@@ -0,0 +1,54 @@
+import sqlite3
+
+from modules import storage
+from tests.conftest import make_result
+
+
+def _actual_counts(path):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT sentiment, COUNT(*) FROM sentiments GROUP BY sentiment").fetchall())
+
+
+def _seed(path, rows):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE sentiments (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL, "
+            "sentiment TEXT NOT NULL, confidence REAL NOT NULL, timestamp TEXT NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO sentiments (text, sentiment, confidence, timestamp) VALUES (?, ?, ?, ?)",
+            [(row["text"], row["sentiment"], row["confidence"], row["timestamp"]) for row in rows]
+        )
+
+
+def test_counts_follow_inserts_and_deletes(db):
+    db.save_results([make_result(f"tốt {i}") for i in range(5)] + [make_result("tệ", "NEGATIVE")])
+    db.save_result(make_result("bình thường", "NEUTRAL", "2025-03-11T09:00:00"))
+
+    assert db.get_sentiment_counts() == _actual_counts(db.DB_PATH)
+    assert db.get_total_count() == 7
+
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.execute("DELETE FROM sentiments WHERE sentiment = 'POSITIVE' AND id <= 2")
+    assert db.get_sentiment_counts() == _actual_counts(db.DB_PATH)
+    assert {row["bucket"]: row.get("POSITIVE") for row in db.get_sentiment_timeseries("day")}["2025-03-10"] == 3
+
+
+def test_interrupted_setup_leaves_no_partial_aggregates(db, monkeypatch):
+    rows = [make_result(f"văn bản {i}", ["POSITIVE", "NEGATIVE"][i % 2]) for i in range(10)]
+    _seed(db.DB_PATH, rows)
+
+    class FailingBackfill(storage._Connection):
+        def execute(self, sql, *args):
+            if "COUNT(*) FROM sentiments" in sql:
+                raise sqlite3.OperationalError("simulated crash during backfill")
+            return super().execute(sql, *args)
+
+    conn = sqlite3.connect(db.DB_PATH, factory=FailingBackfill)
+    storage._init_aggregates(conn)
+    assert not storage._aggregates_exist(conn)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0] == 0
+    conn.close()
+
+    assert db.get_sentiment_counts() == _actual_counts(db.DB_PATH)
+    assert db.get_total_count() == 10
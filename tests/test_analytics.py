@@ -0,0 +1,57 @@
+import pytest
+
+from modules import analytics
+from tests.conftest import make_result
+
+
+@pytest.fixture
+def snapshot(db, tmp_path, monkeypatch):
+    def export_parquet(path, after_id=0, until_id=None):
+        rows = [row for batch in db.iter_history_batches(after_id, until_id=until_id) for row in batch]
+        path.write_text("\n".join(row["text"] for row in rows))
+        return len(rows)
+
+    monkeypatch.setattr(analytics, "export_parquet", export_parquet)
+    monkeypatch.setattr(analytics, "SNAPSHOT_GRACE_S", 0)
+    db.save_results([make_result(f"văn bản {index}") for index in range(5)])
+    return tmp_path / "analytics"
+
+
+def _paths(directory, manifest):
+    return [directory / part for part in manifest["parts"]]
+
+
+def test_refresh_appends_parts_within_a_generation(db, snapshot):
+    first = analytics.refresh_snapshot(snapshot)
+    db.save_results([make_result("văn bản mới")])
+    second = analytics.refresh_snapshot(snapshot)
+
+    assert second["generation"] == first["generation"]
+    assert second["parts"][:1] == first["parts"]
+    assert len(second["parts"]) == 2
+    assert all(path.exists() for path in _paths(snapshot, second))
+
+
+def test_compaction_keeps_parts_until_readers_finish(db, snapshot):
+    analytics.refresh_snapshot(snapshot)
+    db.save_results([make_result("văn bản mới")])
+    reading = analytics._refresh(snapshot, reader=True)
+
+    compacted = analytics.compact_snapshot(snapshot)
+    assert compacted["generation"] != reading["generation"]
+    assert sum(len(path.read_text().splitlines()) for path in _paths(snapshot, compacted)) == 6
+    assert all(path.exists() for path in _paths(snapshot, reading))
+
+    analytics._release(reading["generation"])
+    analytics.refresh_snapshot(snapshot)
+    assert not any(path.exists() for path in _paths(snapshot, reading))
+    assert all(path.exists() for path in _paths(snapshot, compacted))
+
+
+def test_query_without_snapshot_builds_in_background(snapshot, monkeypatch):
+    monkeypatch.setattr(analytics, "_require_duckdb", lambda: None)
+    with pytest.raises(RuntimeError):
+        analytics.top_texts(directory=snapshot)
+
+    analytics._compaction.join()
+    assert analytics.refresh_snapshot(snapshot)["watermark"] == 5
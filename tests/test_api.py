@@ -0,0 +1,71 @@
+import pytest
+from starlette.testclient import TestClient
+
+import api
+from tests.conftest import make_result
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(api, "preprocess", lambda text: " ".join(text.split()))
+    monkeypatch.setattr(api, "classify_text", lambda text: make_result(text))
+    monkeypatch.setattr(api, "classify_batch", lambda texts: [make_result(text, "NEGATIVE") for text in texts])
+    return TestClient(api.app)
+
+
+def test_classify_returns_and_stores_the_result(db, client):
+    response = client.post("/classify", json={"text": "hàng tốt"})
+    assert response.status_code == 200
+    assert response.json() == make_result("hàng tốt")
+    assert [row["text"] for row in db.get_history()] == ["hàng tốt"]
+
+    assert client.post("/classify", json={"text": "không lưu", "store": False}).status_code == 200
+    assert db.get_total_count() == 1
+
+
+@pytest.mark.parametrize("body", [{"text": ""}, {"text": "   "}, {"text": 5}, {}, {"text": "x" * 11}, ["hàng tốt"]])
+def test_classify_rejects_invalid_input(client, monkeypatch, body):
+    monkeypatch.setattr(api, "API_MAX_TEXT_LENGTH", 10)
+    response = client.post("/classify", json=body)
+    assert response.status_code == 400
+    assert response.json()["error"]
+
+
+def test_classify_rejects_malformed_json(client):
+    assert client.post("/classify", content=b"{", headers={"content-type": "application/json"}).status_code == 400
+
+
+def test_overloaded_service_returns_429(client, monkeypatch):
+    monkeypatch.setattr(api, "_pending", api.API_MAX_PENDING)
+    for path, body in (("/classify", {"text": "hàng tốt"}), ("/classify/batch", {"texts": ["hàng tốt"]})):
+        response = client.post(path, json=body)
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+
+
+def test_batch_scores_every_text_in_order(db, client):
+    response = client.post("/classify/batch", json={"texts": ["hàng tốt", "giao chậm"]})
+    assert response.status_code == 200
+    assert [result["text"] for result in response.json()["results"]] == ["hàng tốt", "giao chậm"]
+    assert db.get_total_count() == 2
+
+
+@pytest.mark.parametrize("texts", [[], None, "hàng tốt", ["hàng tốt", ""], ["a", "b", "c"]])
+def test_batch_rejects_invalid_or_oversized_input(client, monkeypatch, texts):
+    monkeypatch.setattr(api, "API_MAX_BATCH", 2)
+    assert client.post("/classify/batch", json={"texts": texts}).status_code == 400
+
+
+def test_health_and_metrics(client, monkeypatch):
+    monkeypatch.setattr(api, "is_model_ready", lambda: True)
+    client.post("/classify", json={"text": "hàng tốt"})
+
+    health = client.get("/health").json()
+    assert health["status"] == "ok"
+    assert (health["pending"], health["max_pending"]) == (0, api.API_MAX_PENDING)
+    assert {"db_pool", "write_behind"} <= set(health)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE sentiment_stage_seconds histogram" in response.text
@@ -0,0 +1,165 @@
+import json
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from modules import archive
+from tests.conftest import make_result
+
+
+@pytest.fixture
+def json_parquet(monkeypatch):
+    def write_batches(path, batches):
+        rows = [dict(row) for batch in batches for row in batch]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(rows))
+        return len(rows)
+
+    def read_partition(path, search_query=None, sentiment_filter=None, since=None, until=None):
+        matches = archive._matcher(search_query)
+        return [
+            row for row in json.loads(path.read_text())
+            if (not sentiment_filter or row["sentiment"] == sentiment_filter)
+            and (not since or row["timestamp"] >= since)
+            and (not until or row["timestamp"] < until)
+            and (matches is None or matches(row["text"]))
+        ]
+
+    def iter_partition(path, search_query=None, sentiment_filter=None, since=None, until=None):
+        yield from reversed(read_partition(path, search_query, sentiment_filter, since, until))
+
+    def count_partition(path, search_query=None, sentiment_filter=None):
+        return len(read_partition(path, search_query, sentiment_filter))
+
+    monkeypatch.setattr(archive, "write_batches", write_batches)
+    monkeypatch.setattr(archive, "read_partition", read_partition)
+    monkeypatch.setattr(archive, "iter_partition", iter_partition)
+    monkeypatch.setattr(archive, "count_partition", count_partition)
+
+
+@pytest.fixture
+def json_archive(db, json_parquet, tmp_path):
+    rows = []
+    for month in range(1, 7):
+        for day in range(1, 11):
+            sentiment = ["POSITIVE", "NEGATIVE", "NEUTRAL"][day % 3]
+            rows.append(make_result(f"sản phẩm {month} {day} đóng gói", sentiment, f"2025-{month:02d}-{day:02d}T10:00:00"))
+    db.save_results(rows)
+    before = db.get_sentiment_counts(), db.get_sentiment_timeseries("day")
+    archived = db.archive_old_partitions(2, tmp_path / "archive", now=datetime(2025, 6, 15))
+    assert [partition["month"] for partition in archived] == ["2025-01", "2025-02", "2025-03", "2025-04"]
+    return db, rows, before
+
+
+def test_archiving_keeps_counts_and_trends(json_archive):
+    db, rows, (counts, timeseries) = json_archive
+    assert db.get_sentiment_counts() == counts
+    assert db.get_total_count() == len(rows)
+    assert db.get_sentiment_timeseries("day") == timeseries
+
+
+@pytest.mark.parametrize("search_query, sentiment_filter", [
+    (None, "NEGATIVE"),
+    ("dong goi", None),
+    ("san pham 3", "POSITIVE"),
+    ("không có", None)
+])
+def test_filtered_count_matches_archived_rows(json_archive, search_query, sentiment_filter):
+    db, _, _ = json_archive
+    rows = db.get_history(
+        limit=1000, search_query=search_query, sentiment_filter=sentiment_filter, ranked=False, include_archive=True
+    )
+    assert db.get_filtered_count(search_query, sentiment_filter, include_archive=True) == len(rows)
+    hot = db.get_history(limit=1000, search_query=search_query, sentiment_filter=sentiment_filter)
+    assert db.get_filtered_count(search_query, sentiment_filter) == len(hot)
+
+
+def test_partitions_are_streamed_in_row_group_batches(db, json_parquet, tmp_path, monkeypatch):
+    write_batches = archive.write_batches
+    sizes = []
+
+    def recording(path, batches):
+        def counted():
+            for batch in batches:
+                sizes.append(len(batch))
+                yield batch
+        return write_batches(path, counted())
+
+    monkeypatch.setattr(archive, "ARCHIVE_ROW_GROUP_SIZE", 4)
+    monkeypatch.setattr(archive, "write_batches", recording)
+    db.save_results([make_result(f"văn bản {day}", timestamp=f"2025-01-{day:02d}T10:00:00") for day in range(1, 11)])
+
+    archived = db.archive_old_partitions(1, tmp_path / "archive", now=datetime(2025, 6, 15))
+
+    assert sizes == [4, 4, 2]
+    assert archived[0]["rows"] == 10
+    assert archived[0]["path"].endswith("sentiments-2025-01-10.parquet")
+    partition = db.get_partitions()[0]
+    assert (partition["min_timestamp"], partition["max_timestamp"]) == ("2025-01-01T10:00:00", "2025-01-10T10:00:00")
+    assert [path.name for path in (tmp_path / "archive").iterdir()] == ["sentiments-2025-01-10.parquet"]
+
+
+@pytest.mark.parametrize("search_query", ["tot", "dong", "hang tot", "giao_hang"])
+def test_search_matches_the_same_rows_hot_and_archived(db, json_parquet, tmp_path, search_query):
+    texts = ["hàng tốt", "xtotal phí", "totally ổn", "đóng gói kỹ", "giao hàng nhanh", "hàng về tot"]
+    db.save_results([make_result(text, timestamp="2025-01-05T10:00:00") for text in texts])
+    hot = sorted(row["text"] for row in db.get_history(limit=100, search_query=search_query))
+    hot_count = db.get_filtered_count(search_query)
+
+    db.archive_old_partitions(1, tmp_path / "archive", now=datetime(2025, 6, 15))
+    assert db.get_filtered_count(search_query) == 0
+
+    archived = db.get_history(limit=100, search_query=search_query, ranked=False, include_archive=True)
+    assert sorted(row["text"] for row in archived) == hot
+    assert db.get_filtered_count(search_query, include_archive=True) == hot_count == len(hot)
+
+
+def test_history_merges_archive_in_order(json_archive):
+    db, rows, _ = json_archive
+    merged = db.get_history(limit=len(rows), ranked=False, include_archive=True)
+    expected = sorted(rows, key=lambda row: row["timestamp"], reverse=True)
+    assert [row["text"] for row in merged] == [row["text"] for row in expected]
+    assert [row["text"] for row in db.get_history(limit=5, offset=30, include_archive=True)] == \
+        [row["text"] for row in expected[30:35]]
+
+
+def test_pages_skip_partitions_outside_the_cursor(json_archive, monkeypatch):
+    db, rows, _ = json_archive
+    read_partition = archive.read_partition
+    reads = []
+
+    def recording(path, *args):
+        reads.append(path.name)
+        return read_partition(path, *args)
+
+    monkeypatch.setattr(archive, "read_partition", recording)
+    first = db.get_history_page(limit=5, include_archive=True)
+    assert reads == []
+
+    newer = db.get_history_page(limit=5, cursor=first["next_cursor"], direction="prev", include_archive=True)
+    assert [row["text"] for row in newer["rows"]] == [row["text"] for row in first["rows"][:4]]
+    assert reads == []
+
+
+def test_iter_history_streams_archive_in_order(json_archive):
+    db, rows, _ = json_archive
+    expected = sorted(rows, key=lambda row: row["timestamp"], reverse=True)
+    assert [row["text"] for row in db.iter_history(include_archive=True, fetch_size=7)] == [row["text"] for row in expected]
+    assert [row["text"] for row in db.iter_history(sentiment_filter="NEGATIVE", include_archive=True)] == \
+        [row["text"] for row in expected if row["sentiment"] == "NEGATIVE"]
+
+
+def test_iter_history_returns_connections_and_raises_errors(db):
+    db.save_results([make_result(f"văn bản {index}") for index in range(3)])
+    rows = db.iter_history(fetch_size=1)
+    next(rows)
+    assert db.get_pool_stats()["in_use"] == 1
+    rows.close()
+    assert db.get_pool_stats()["in_use"] == 0
+
+    with db._pool.connection() as conn:
+        conn.execute("DROP TABLE sentiments")
+    with pytest.raises(sqlite3.OperationalError):
+        list(db.iter_history())
+    assert db.get_pool_stats()["in_use"] == 0
@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+from modules import bulk
+from tests.conftest import make_result
+
+
+@pytest.fixture
+def scorer(db, monkeypatch):
+    calls = []
+
+    def classify_batch(texts):
+        calls.append(list(texts))
+        if len(calls) == fail_on[0]:
+            raise RuntimeError("simulated crash")
+        return [make_result(text) for text in texts]
+
+    fail_on = [0]
+    monkeypatch.setattr(bulk, "preprocess_many", lambda texts, workers=1: list(texts))
+    monkeypatch.setattr(bulk, "classify_batch", classify_batch)
+    return calls, fail_on
+
+
+def _csv(count):
+    return "id,text\n" + "".join(f"{index},văn bản {index}\n" for index in range(count))
+
+
+def test_resume_continues_after_the_last_saved_chunk(db, scorer):
+    calls, fail_on = scorer
+    fail_on[0] = 3
+    with pytest.raises(RuntimeError):
+        bulk.score_stream(io.StringIO(_csv(10)), "csv", "reviews", chunk_size=4)
+    assert db.get_checkpoint("reviews") == 8
+    assert db.get_total_count() == 8
+
+    fail_on[0] = 0
+    progress = bulk.score_stream(io.StringIO(_csv(10)), "csv", "reviews", chunk_size=4)
+    assert (progress["start_offset"], progress["offset"], progress["processed"]) == (8, 10, 2)
+    assert calls[-1] == ["văn bản 8", "văn bản 9"]
+    assert sorted(row["text"] for row in db.get_history(limit=100)) == sorted(f"văn bản {index}" for index in range(10))
+
+
+def test_restart_clears_the_checkpoint(db, scorer):
+    stream = "\n".join(['{"text": "tốt"}', "không phải json", '{"text": "tệ"}']) + "\n"
+    assert bulk.score_stream(io.StringIO(stream), "jsonl", "reviews")["saved"] == 2
+    assert db.get_checkpoint("reviews") == 3
+
+    progress = bulk.score_stream(io.StringIO(stream), "jsonl", "reviews", resume=False)
+    assert (progress["start_offset"], progress["skipped"]) == (0, 1)
+    assert db.get_total_count() == 4
@@ -0,0 +1,60 @@
+from modules import sentiment
+from modules.cache import ResultCache
+
+POSITIVE = {"sentiment": "POSITIVE", "confidence": 0.9}
+NEGATIVE = {"sentiment": "NEGATIVE", "confidence": 0.8}
+
+
+def test_lru_hit_does_not_read_sqlite(db, monkeypatch):
+    cache = ResultCache(max_entries=2)
+    cache.put_many({"a": POSITIVE}, "model-1")
+    monkeypatch.setattr("modules.cache.get_cached_results", lambda keys: {})
+
+    assert cache.get_many(["a", "b"]) == {"a": POSITIVE}
+    stats = cache.stats()
+    assert (stats["hits"], stats["persistent_hits"], stats["misses"]) == (1, 0, 1)
+
+
+def test_evicted_entries_are_served_from_sqlite(db):
+    cache = ResultCache(max_entries=1)
+    cache.put_many({"a": POSITIVE}, "model-1")
+    cache.put_many({"b": NEGATIVE}, "model-1")
+    assert cache.stats()["evictions"] == 1
+
+    assert cache.get_many(["a"]) == {"a": POSITIVE}
+    assert cache.stats()["persistent_hits"] == 1
+    assert cache.get_many(["a"]) == {"a": POSITIVE}
+    assert cache.stats()["persistent_hits"] == 1
+
+
+def test_set_model_purges_other_models(db):
+    cache = ResultCache()
+    cache.set_model("model-1")
+    cache.put_many({"a": POSITIVE}, "model-1")
+    ResultCache().put_many({"b": NEGATIVE}, "model-2")
+
+    cache.set_model("model-2")
+
+    assert cache.stats()["size"] == 0
+    assert cache.get_many(["a", "b"]) == {"b": NEGATIVE}
+
+
+def test_cache_hit_matches_fresh_classification(db, monkeypatch):
+    from benchmarks.stub_model import StubSentimentPipeline
+
+    stub = StubSentimentPipeline(forward_ms=0, per_item_ms=0, per_char_us=0)
+    cache = ResultCache(max_entries=0)
+    monkeypatch.setattr(sentiment, "_model", stub)
+    monkeypatch.setattr(sentiment, "CACHE_ENABLED", True)
+    monkeypatch.setattr(sentiment, "result_cache", cache)
+
+    texts = ["hàng tốt lắm", "giao chậm quá", "bình thường"]
+    fresh = sentiment.classify_batch(texts)
+    passes = stub.forward_passes
+    cached = sentiment.classify_batch(texts)
+
+    assert stub.forward_passes == passes
+    assert [result.source for result in fresh] == ["model"] * 3
+    assert [result.source for result in cached] == ["cache"] * 3
+    assert [(result["text"], result["sentiment"], result["confidence"]) for result in cached] == \
+        [(result["text"], result["sentiment"], result["confidence"]) for result in fresh]
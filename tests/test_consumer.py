@@ -0,0 +1,87 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from modules import consumer
+from modules.consumer import SpoolSource
+
+
+def _write(path, records):
+    path.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records), encoding="utf-8")
+
+
+def _drain(db, source):
+    texts = []
+    while True:
+        batch = source.poll(2)
+        if batch is None:
+            return texts
+        job, offset, chunk, _ = batch
+        assert db.save_results([], checkpoint=(job, offset))
+        texts.extend(chunk)
+
+
+def test_recreated_file_is_read_from_the_start(db, tmp_path):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    _write(spool / "reviews.jsonl", [{"text": "tốt"}, {"text": "tệ"}, {"text": "bình thường"}])
+    assert _drain(db, SpoolSource(spool)) == ["tốt", "tệ", "bình thường"]
+    assert _drain(db, SpoolSource(spool)) == []
+
+    (spool / "reviews.jsonl").unlink()
+    _write(spool / "reviews.jsonl", [{"text": "hàng đẹp quá"}, {"text": "giao chậm"}, {"text": "ổn"}, {"text": "mới"}])
+    assert _drain(db, SpoolSource(spool)) == ["hàng đẹp quá", "giao chậm", "ổn", "mới"]
+
+
+def test_checkpoint_read_failure_stops_the_source(db, tmp_path, monkeypatch):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    _write(spool / "reviews.jsonl", [{"text": "tốt"}])
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    db.close_all_connections()
+    monkeypatch.setattr(db, "DB_PATH", broken)
+
+    with pytest.raises(RuntimeError):
+        SpoolSource(spool).poll(10)
+
+
+def test_lag_is_measured_from_the_first_unread_record(db, tmp_path):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    _write(spool / "reviews.jsonl", [{"text": "tốt", "timestamp": 1000.0}, {"text": "tệ", "timestamp": "2025-03-10T10:00:00"}])
+
+    source = SpoolSource(spool)
+    assert source.poll(1)[3] == 1000.0
+    assert source.poll(1)[3] == datetime.fromisoformat("2025-03-10T10:00:00").timestamp()
+    assert source.poll(1) is None
+
+
+def test_backlog_reuses_file_keys_until_files_change(db, tmp_path, monkeypatch):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    _write(spool / "a.jsonl", [{"text": "tốt"}])
+    _write(spool / "b.jsonl", [{"text": "tệ"}])
+    hashed = []
+    blake2b = consumer.hashlib.blake2b
+
+    def counting(data, **kwargs):
+        hashed.append(data)
+        return blake2b(data, **kwargs)
+
+    monkeypatch.setattr(consumer.hashlib, "blake2b", counting)
+
+    source = SpoolSource(spool)
+    assert source.backlog() == sum(path.stat().st_size for path in spool.iterdir())
+    assert len(hashed) == 2
+    assert source.backlog() == sum(path.stat().st_size for path in spool.iterdir())
+    assert len(hashed) == 2
+
+    with open(spool / "a.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"text": "ổn"}) + "\n")
+    (spool / "b.jsonl").unlink()
+    _write(spool / "c.jsonl", [{"text": "mới"}])
+    assert source.backlog() == sum(path.stat().st_size for path in spool.iterdir())
+    assert len(hashed) == 4
+    assert sorted(path.name for path in source._jobs) == ["a.jsonl", "c.jsonl"]
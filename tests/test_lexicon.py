@@ -0,0 +1,59 @@
+import pytest
+
+from modules import lexicon, sentiment
+from modules.lexicon import LexiconScorer, evaluate_cascade
+
+
+@pytest.fixture
+def scorer():
+    return LexiconScorer()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("tốt", "POSITIVE"),
+    ("rất hài lòng", "POSITIVE"),
+    ("tệ quá", "NEGATIVE"),
+    ("hàng kém chất lượng", "NEGATIVE")
+])
+def test_polar_text_is_answered(scorer, text, expected):
+    prediction = scorer.score(text)
+    assert prediction["sentiment"] == expected
+    assert prediction["confidence"] >= lexicon.CASCADE_THRESHOLD
+
+
+def test_negation_flips_polarity(scorer):
+    assert scorer.score("không tốt")["sentiment"] == "NEGATIVE"
+    assert scorer.score("chẳng thích")["sentiment"] == "NEGATIVE"
+    assert scorer.score("không tệ")["sentiment"] == "POSITIVE"
+    assert scorer.score("không tệ")["confidence"] < scorer.score("không tốt")["confidence"]
+
+
+@pytest.mark.parametrize("text", ["hàng tốt nhưng giao chậm", "đẹp tuy nhiên hơi đắt", "tốt không", "tốt ?", "đẹp mà xấu"])
+def test_contrast_questions_and_mixed_polarity_defer(scorer, text):
+    assert scorer.score(text) is None
+
+
+def test_low_confidence_answers_fall_through(scorer):
+    assert scorer.score("sản phẩm hơi chậm")["confidence"] < lexicon.CASCADE_THRESHOLD
+    assert scorer.score("hàng này xyz abc tốt")["confidence"] < lexicon.CASCADE_THRESHOLD
+
+    answered = scorer.answer_many(["tốt", "sản phẩm hơi chậm", "hàng tốt nhưng giao chậm"])
+    assert list(answered) == ["tốt"]
+    assert scorer.stats()["cascade_fallthrough"] == 2
+
+
+def test_evaluate_cascade_against_reference_labels(monkeypatch):
+    labels = {"tốt": "POSITIVE", "tệ quá": "NEGATIVE", "không tốt": "POSITIVE", "bình thường": "NEUTRAL"}
+    monkeypatch.setattr(sentiment, "load_sentiment_model", lambda: None)
+    monkeypatch.setattr(sentiment, "_predict", lambda texts: [{"sentiment": labels[text]} for text in texts])
+
+    report = evaluate_cascade(list(labels), thresholds=[0.8, 0.95], batch_size=2, scorer=LexiconScorer())
+
+    assert report["samples"] == 4
+    loose, strict = report["thresholds"]
+    assert loose["fallthrough_rate"] == 0.25
+    assert loose["answered_agreement"] == pytest.approx(2 / 3)
+    assert loose["overall_agreement"] == 0.75
+    assert loose["disagreements"] == [{"text": "không tốt", "lexicon": "NEGATIVE", "confidence": 0.81, "model": "POSITIVE"}]
+    assert strict["fallthrough_rate"] == 0.75
+    assert strict["answered_agreement"] == 1.0
@@ -0,0 +1,67 @@
+import re
+
+import pytest
+
+from modules import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = metrics.MetricsRegistry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+def test_disabled_timer_is_a_shared_no_op(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", False)
+    with metrics.timer("inference"):
+        pass
+    metrics.increment("inference_texts")
+
+    assert metrics.timer("inference") is metrics._NULL_TIMER
+    assert metrics.snapshot() == {"stages": {}, "counters": {}, "gauges": {}}
+
+
+def test_enabled_timer_records_counts_and_percentiles(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    with metrics.timer("inference"):
+        pass
+    for _ in range(97):
+        registry.observe("inference", 0.004)
+    registry.observe("inference", 2.0)
+    registry.observe("inference", 2.0)
+    metrics.increment("inference_texts", 3)
+
+    stage = metrics.snapshot()["stages"]["inference"]
+    assert stage["count"] == 100
+    assert stage["p50_ms"] == 5.0
+    assert stage["p95_ms"] == 5.0
+    assert stage["p99_ms"] == 2500.0
+    assert stage["mean_ms"] == pytest.approx(stage["total_s"] * 10)
+    assert metrics.snapshot()["counters"] == {"inference_texts": 3}
+
+
+def test_prometheus_output_is_well_formed(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    registry.observe("save_result", 0.02)
+    metrics.increment("cache_hits", 2)
+    metrics.register_collector(lambda: {"micro_batch_queue_depth": 4})
+
+    lines = metrics.render_prometheus().splitlines()
+    types = {}
+    for line in lines:
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            types[name] = kind
+    assert types == {
+        "sentiment_stage_seconds": "histogram",
+        "sentiment_cache_hits_total": "counter",
+        "sentiment_micro_batch_queue_depth": "gauge"
+    }
+
+    samples = [line for line in lines if not line.startswith("#")]
+    for sample in samples:
+        assert re.fullmatch(r'[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? \S+', sample)
+    assert 'sentiment_stage_seconds_bucket{stage="save_result",le="+Inf"} 1' in samples
+    assert "sentiment_cache_hits_total 2" in samples
+    assert "sentiment_micro_batch_queue_depth 4" in samples
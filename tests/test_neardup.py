@@ -0,0 +1,36 @@
+from modules.neardup import NearDuplicateIndex
+from modules.sentiment import ClassificationResult
+from tests.conftest import make_result
+
+
+def _result(text, sentiment, source):
+    return ClassificationResult(make_result(text, sentiment), source=source)
+
+
+def test_history_seed_skips_reused_answers(db):
+    db.save_results([
+        _result("giao hàng nhanh đóng gói cẩn thận", "POSITIVE", "model"),
+        _result("sản phẩm dùng rất bền và đẹp", "POSITIVE", "cache"),
+        _result("hàng tệ quá không như mô tả", "NEGATIVE", "lexicon"),
+        _result("giao hàng nhanh đóng gói cẩn thận lắm", "NEGATIVE", "near_duplicate"),
+        make_result("chất lượng bình thường", "NEUTRAL")
+    ])
+
+    index = NearDuplicateIndex(threshold=0.5)
+    index.start_loading().join()
+
+    assert index.stats()["neardup_entries"] == 2
+    assert index.lookup("hàng tệ quá không như mô tả") is None
+    assert index.lookup("giao hàng nhanh đóng gói cẩn thận nha")["sentiment"] == "POSITIVE"
+
+
+def test_history_seed_does_not_replace_live_entries(db):
+    db.save_results([_result("sản phẩm dùng rất bền", "NEGATIVE", "model")])
+
+    index = NearDuplicateIndex(max_entries=2)
+    index.add("sản phẩm dùng rất bền", {"sentiment": "POSITIVE", "confidence": 0.9})
+    index.add("giao hàng nhanh", {"sentiment": "POSITIVE", "confidence": 0.8})
+    assert index.load_history() == 1
+
+    assert index.lookup("sản phẩm dùng rất bền")["sentiment"] == "POSITIVE"
+    assert index.lookup("giao hàng nhanh") is not None
@@ -0,0 +1,57 @@
+import pytest
+
+from tests.conftest import make_result
+
+
+@pytest.fixture
+def history(db):
+    rows = [make_result(f"văn bản {index}", timestamp=f"2025-03-{10 + index // 3:02d}T10:00:00") for index in range(9)]
+    db.save_results(rows)
+    return db, [row["text"] for row in db.get_history(limit=100, ranked=False)]
+
+
+def _walk(db, limit, direction="next", cursor=None):
+    pages = []
+    while True:
+        page = db.get_history_page(limit=limit, cursor=cursor, direction=direction)
+        pages.append(page)
+        cursor = page["next_cursor"] if direction == "next" else page["prev_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 9, 10])
+def test_pages_cover_every_row_once(history, limit):
+    db, expected = history
+    pages = _walk(db, limit)
+
+    assert [row["text"] for page in pages for row in page["rows"]] == expected
+    assert pages[0]["prev_cursor"] is None
+    assert all(len(page["rows"]) == limit for page in pages[:-1])
+    assert len(pages) == -(-len(expected) // limit)
+
+
+def test_paging_back_returns_the_same_pages(history):
+    db, _ = history
+    forward = _walk(db, 3)
+    backward = _walk(db, 3, direction="prev", cursor=forward[-1]["prev_cursor"])
+
+    assert [[row["id"] for row in page["rows"]] for page in reversed(backward)] == \
+        [[row["id"] for row in page["rows"]] for page in forward[:-1]]
+    assert backward[-1]["prev_cursor"] is None
+
+
+def test_cursor_on_tied_timestamps_splits_by_id(history):
+    db, expected = history
+    first = db.get_history_page(limit=1)
+    second = db.get_history_page(limit=1, cursor=first["next_cursor"])
+
+    assert first["rows"][0]["timestamp"] == second["rows"][0]["timestamp"]
+    assert [first["rows"][0]["text"], second["rows"][0]["text"]] == expected[:2]
+
+
+def test_invalid_cursor_is_rejected(db):
+    with pytest.raises(ValueError):
+        db.get_history_page(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        db.get_history_page(direction="sideways")
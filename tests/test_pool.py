@@ -0,0 +1,95 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from modules import storage, storage_async
+from tests.conftest import make_result
+
+
+def test_nested_connections_reuse_the_thread_connection(db):
+    db.save_result(make_result("tốt"))
+    opened = db.get_pool_stats()["opened"]
+
+    with db._pool.connection() as outer:
+        with db._pool.connection() as inner:
+            assert inner is outer
+        assert db.get_total_count() == 1
+        assert db.get_pool_stats()["in_use"] == 1
+
+    stats = db.get_pool_stats()
+    assert (stats["in_use"], stats["opened"]) == (0, opened)
+
+
+def test_threads_get_their_own_connections(db):
+    seen = []
+
+    def other():
+        with db._pool.connection() as conn:
+            seen.append((conn, db.get_pool_stats()["in_use"]))
+
+    with db._pool.connection() as conn:
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join()
+
+    assert seen[0][0] is not conn
+    assert seen[0][1] == 2
+
+
+def test_idle_connections_are_evicted(db):
+    pool = storage.ConnectionPool(2, idle_timeout=0, acquire_timeout=1)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.stats()["idle"] == 1
+
+    second = pool.acquire()
+    assert second is not first
+    stats = pool.stats()
+    assert (stats["evicted"], stats["opened"], stats["open"]) == (1, 2, 1)
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute("SELECT 1")
+    pool.close_all()
+
+
+def test_acquire_times_out_when_the_pool_is_exhausted(db):
+    pool = storage.ConnectionPool(1, idle_timeout=60, acquire_timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError, match="Timed out"):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+    pool.release(held)
+    pool.release(pool.acquire())
+    pool.close_all()
+
+
+def test_close_all_invalidates_connections_in_use(db):
+    held = db._pool.acquire()
+    db.close_all_connections()
+    assert db.get_pool_stats()["open"] == 0
+
+    db._pool.release(held)
+    stats = db.get_pool_stats()
+    assert (stats["open"], stats["idle"], stats["in_use"]) == (0, 0, 0)
+    with pytest.raises(sqlite3.ProgrammingError):
+        held.execute("SELECT 1")
+
+    db.save_result(make_result("tốt"))
+    assert db.get_total_count() == 1
+
+
+def test_async_facade_runs_storage_calls(db):
+    async def scenario():
+        assert await storage_async.save_results([make_result("hàng tốt"), make_result("giao chậm", "NEGATIVE")])
+        assert await storage_async.save_result(make_result("bình thường", "NEUTRAL"))
+        rows = await storage_async.get_history(limit=10, sentiment_filter="NEGATIVE")
+        page = await storage_async.get_history_page(limit=2)
+        counts = await storage_async.get_sentiment_counts()
+        return rows, page, counts, await storage_async.get_filtered_count(sentiment_filter="POSITIVE")
+
+    rows, page, counts, positive = asyncio.run(scenario())
+    assert [row["text"] for row in rows] == ["giao chậm"]
+    assert len(page["rows"]) == 2 and page["next_cursor"] is not None
+    assert counts == {"POSITIVE": 1, "NEGATIVE": 1, "NEUTRAL": 1}
+    assert positive == 1
@@ -0,0 +1,67 @@
+import sys
+
+import pytest
+
+from modules import preprocessing
+from modules.preprocessing import _normalize_all
+
+
+@pytest.fixture
+def normalizations(monkeypatch):
+    monkeypatch.setattr(preprocessing, "COMBINED_NORMALIZATION_DICT", dict(preprocessing.COMBINED_NORMALIZATION_DICT))
+    preprocessing._build_normalizers()
+    yield
+    monkeypatch.undo()
+    preprocessing._build_normalizers()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ko. biết", "không. biết"),
+    ("dc!! lắm", "được!! lắm"),
+    ("(ok) nhé", "(được) nhé"),
+    ("sp ok", "sản phẩm được"),
+    ("KO đẹp", "KHÔNG đẹp"),
+    ("Ko tốt", "Không tốt"),
+    ("kokoro", "kokoro"),
+    ("hok   bik", "hok bik")
+])
+def test_slang_is_normalized_on_token_boundaries(text, expected):
+    assert _normalize_all(text) == expected
+    assert _normalize_all(text) == expected
+
+
+def test_loaded_dictionary_adds_words_and_phrases(normalizations, tmp_path):
+    path = tmp_path / "extra.tsv"
+    path.write_text("# slang\nhok\tkhông\nbik\tbiết\nsiêu phẩm đỉnh\ttuyệt vời\n", encoding="utf-8")
+
+    assert preprocessing.load_normalization_file(str(path)) == {"hok": "không", "bik": "biết", "siêu phẩm đỉnh": "tuyệt vời"}
+    assert _normalize_all("Hok bik, SIÊU PHẨM ĐỈNH!") == "Không biết, TUYỆT VỜI!"
+
+
+@pytest.fixture
+def word_tokenizer(tmp_path, monkeypatch):
+    from benchmarks.stub_model import tokenizer_available
+
+    faked = not tokenizer_available()
+    if faked:
+        (tmp_path / "underthesea.py").write_text(
+            "from benchmarks.stub_model import StubWordTokenizer\n\nword_tokenize = StubWordTokenizer()\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(preprocessing, "_tokenizer", None)
+        monkeypatch.delitem(sys.modules, "underthesea", raising=False)
+    yield
+    preprocessing.shutdown_preprocess_pools()
+    if faked:
+        sys.modules.pop("underthesea", None)
+
+
+def test_parallel_preprocessing_matches_serial_order(word_tokenizer, monkeypatch):
+    monkeypatch.setattr(preprocessing, "PARALLEL_MIN_TEXTS", 0)
+    monkeypatch.setattr(preprocessing, "MIN_CHUNK_SIZE", 1)
+    texts = [f"Sp {index} giao hàng nhanh, chất lượng ok!! 😍" if index % 2 else f"ko thích màu {index}" for index in range(40)]
+
+    parallel = preprocessing.preprocess_many(texts, workers=2)
+
+    assert 2 in preprocessing._pools
+    assert parallel == [preprocessing.preprocess(text) for text in texts]
@@ -0,0 +1,63 @@
+import math
+import random
+from types import SimpleNamespace
+
+from modules.scheduler import LengthBucketScheduler
+
+
+class _WordTokenizer:
+    model_max_length = 64
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False):
+        return {"input_ids": [[len(word) for word in text.split()] for text in texts]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [0] + ids + [0]
+
+
+def _scheduler(**kwargs):
+    model = SimpleNamespace(config=SimpleNamespace(id2label={0: "NEG", 1: "POS"}))
+    scheduler = LengthBucketScheduler(_WordTokenizer(), model, **kwargs)
+    forwarded = []
+
+    def forward(batch):
+        forwarded.append([ids for _, ids in batch])
+        return [[0.0, 1.0] if ids[1] % 2 else [1.0, 0.0] for _, ids in batch]
+
+    scheduler._forward = forward
+    return scheduler, forwarded
+
+
+def _texts(count, seed=7):
+    rng = random.Random(seed)
+    return [" ".join("x" * rng.randint(1, 4) for _ in range(rng.randint(1, 40))) for _ in range(count)]
+
+
+def test_predictions_come_back_in_input_order():
+    texts = _texts(200)
+    texts.insert(50, " ".join(["xxx"] + ["xx"] * 150))
+    scheduler, forwarded = _scheduler(bucket_width=8, max_batch_tokens=256, max_batch_size=16, aggregation="first")
+
+    predictions = scheduler.predict(texts)
+
+    assert [prediction["label"] for prediction in predictions] == \
+        ["POS" if len(text.split()[0]) % 2 else "NEG" for text in texts]
+    assert len(forwarded) > 1
+    assert scheduler.stats()["chunked_texts"] == 1
+    assert scheduler.stats()["padding_efficiency"] > 0.8
+
+
+def test_batches_respect_bucket_and_size_limits():
+    scheduler, _ = _scheduler(bucket_width=8, max_batch_tokens=200, max_batch_size=10)
+
+    batches = scheduler.plan(_texts(300))
+
+    assert sum(len(batch) for batch in batches) == 300
+    for batch in batches:
+        lengths = [len(ids) for _, ids in batch]
+        assert len({math.ceil(length / 8) for length in lengths}) == 1
+        assert len(batch) <= 10
+        assert max(lengths) * len(lengths) <= 200 or len(batch) == 1
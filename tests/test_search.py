@@ -0,0 +1,42 @@
+import sqlite3
+
+from modules import storage
+from tests.conftest import make_result
+
+
+def test_search_ignores_diacritics_and_folds_d(db):
+    db.save_results([
+        make_result("Sản phẩm đóng gói đẹp"),
+        make_result("giao hàng chậm", "NEGATIVE"),
+        make_result("Đồ dùng tốt")
+    ])
+
+    assert [row["text"] for row in db.get_history(search_query="san pham")] == ["Sản phẩm đóng gói đẹp"]
+    assert [row["text"] for row in db.get_history(search_query="dong goi")] == ["Sản phẩm đóng gói đẹp"]
+    assert [row["text"] for row in db.get_history(search_query="đồ dùng")] == ["Đồ dùng tốt"]
+    assert db.get_filtered_count(search_query="giao") == 1
+    assert db.get_filtered_count(search_query="giao", sentiment_filter="POSITIVE") == 0
+
+
+def test_failed_rebuild_keeps_previous_index(db, monkeypatch):
+    db.save_result(make_result("sản phẩm tốt"))
+    storage.close_all_connections()
+    monkeypatch.setattr(storage, "FTS_TOKENIZER", "unicode61")
+
+    class FailingRebuild(storage._Connection):
+        def execute(self, sql, *args):
+            if sql.startswith("INSERT INTO sentiments_fts"):
+                raise sqlite3.OperationalError("simulated crash during rebuild")
+            return super().execute(sql, *args)
+
+    conn = sqlite3.connect(db.DB_PATH, factory=FailingRebuild)
+    storage._init_search_index(conn)
+    definition = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'sentiments_fts'").fetchone()[0]
+    indexed = conn.execute("SELECT COUNT(*) FROM sentiments_fts").fetchone()[0]
+    triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    conn.close()
+
+    assert not storage._fts_available
+    assert "remove_diacritics 2" in definition
+    assert indexed == 1
+    assert {"sentiments_fts_insert", "sentiments_fts_delete", "sentiments_fts_update"} <= triggers
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from modules import sentiment
+
+
+def test_classify_times_out_when_the_batcher_stalls(monkeypatch):
+    release = threading.Event()
+
+    def stalled(texts, **kwargs):
+        release.wait(5)
+        return [{"text": text, "sentiment": "NEUTRAL", "confidence": 0.5} for text in texts]
+
+    monkeypatch.setattr(sentiment, "COALESCE_TIMEOUT_S", 0.2)
+    monkeypatch.setattr(sentiment, "classify_batch", stalled)
+    monkeypatch.setattr(sentiment, "_batcher", sentiment._MicroBatcher(max_batch_size=1, max_wait_ms=0))
+    try:
+        with pytest.raises(RuntimeError, match="Sentiment classification failed"):
+            sentiment.classify("chờ mãi")
+        with pytest.raises(TimeoutError):
+            sentiment._submit("vẫn chờ")
+    finally:
+        release.set()
+
+
+def test_micro_batcher_returns_each_caller_its_own_result(db, monkeypatch):
+    from benchmarks.stub_model import StubSentimentPipeline
+
+    stub = StubSentimentPipeline(forward_ms=5, per_item_ms=0, per_char_us=0)
+    monkeypatch.setattr(sentiment, "_model", stub)
+    monkeypatch.setattr(sentiment, "CACHE_ENABLED", False)
+    batcher = sentiment._MicroBatcher(max_batch_size=8, max_wait_ms=20, dispatchers=2)
+
+    texts = [f"{['hàng tốt', 'giao chậm', 'bình thường'][index % 3]} {index % 10}" for index in range(60)]
+    futures = [batcher.submit(text) for text in texts]
+    results = [future.result(timeout=10) for future in futures]
+
+    labels = {"POS": "POSITIVE", "NEG": "NEGATIVE", "NEU": "NEUTRAL"}
+    assert [result["text"] for result in results] == texts
+    assert [result["sentiment"] for result in results] == [labels[stub._predict(text)["label"]] for text in texts]
+    assert all(result.source == "model" and "source" not in result for result in results)
+    assert stub.forward_passes < len(texts)
+
+
+def test_unknown_backend_is_reported_when_the_model_loads(monkeypatch):
+    monkeypatch.setattr(sentiment, "BACKEND", "tpu")
+    monkeypatch.setattr(sentiment, "_model", None)
+
+    with pytest.raises(ValueError, match="Unknown inference backend 'tpu'"):
+        sentiment.load_sentiment_model()
+
+    monkeypatch.setattr(sentiment, "_warmup_error", None)
+    monkeypatch.setattr(sentiment, "preprocess", lambda text: text)
+    sentiment._warm_up()
+    assert isinstance(sentiment.get_warmup_error(), ValueError)
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from modules.singleflight import SingleFlight
+
+
+def _followers(flight, key, fn, count, timeout=None):
+    outcomes = []
+
+    def follow():
+        try:
+            outcomes.append(flight.do(key, fn, timeout=timeout))
+        except BaseException as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=follow) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_for_followers(flight, count):
+    deadline = time.monotonic() + 5
+    while flight.stats()["test_deduplicated"] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_followers_share_the_leader_result():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+
+    def leader():
+        started.set()
+        release.wait(5)
+        return {"sentiment": "POSITIVE"}
+
+    threads, outcomes = _followers(flight, "key", leader, 1)
+    started.wait(5)
+    more, more_outcomes = _followers(flight, "key", leader, 3)
+    _wait_for_followers(flight, 3)
+    release.set()
+    for thread in threads + more:
+        thread.join()
+
+    results = outcomes + more_outcomes
+    assert results == [{"sentiment": "POSITIVE"}] * 4
+    assert len({id(result) for result in results}) == 4
+    assert flight.stats()["test_executed"] == 1
+    assert flight.stats()["test_in_flight"] == 0
+
+
+def test_leader_error_reaches_every_follower():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("model exploded")
+
+    threads, outcomes = _followers(flight, "key", failing, 1)
+    started.wait(5)
+    more, more_outcomes = _followers(flight, "key", failing, 2)
+    _wait_for_followers(flight, 2)
+    release.set()
+    for thread in threads + more:
+        thread.join()
+
+    assert [type(outcome) for outcome in outcomes + more_outcomes] == [ValueError] * 3
+    assert flight.do("key", lambda: "retried") == "retried"
+
+
+def test_follower_times_out_without_cancelling_the_leader():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    threads, outcomes = _followers(flight, "key", slow, 1)
+    started.wait(5)
+    with pytest.raises(TimeoutError):
+        flight.do("key", slow, timeout=0.05)
+    release.set()
+    threads[0].join()
+
+    assert outcomes == ["done"]
+    assert flight.stats()["test_wait_timeouts"] == 1
@@ -0,0 +1,59 @@
+import os
+import time
+
+import pytest
+
+from modules import workers
+
+
+def _fake_worker(export_dir, threads, index, requests, results):
+    results.put(("ready", index, None))
+    while True:
+        job = requests.get()
+        if job is None:
+            return
+        job_id, texts = job
+        if texts == ["crash"]:
+            os._exit(1)
+        time.sleep(2.0)
+        results.put(("ok", job_id, [{"text": text, "worker": index} for text in texts]))
+
+
+class _SubmitOnClose:
+    def __init__(self, requests, submit):
+        self.requests = requests
+        self.submit = submit
+        self.submitted = []
+
+    def put(self, item):
+        self.requests.put(item)
+
+    def cancel_join_thread(self):
+        self.submitted.append(self.submit(["mới"]))
+        self.requests.cancel_join_thread()
+
+    def close(self):
+        self.requests.close()
+
+
+def test_dead_worker_only_fails_its_own_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(workers, "export_shared_weights", lambda model_name: tmp_path)
+    monkeypatch.setattr(workers, "_worker_main", _fake_worker)
+
+    pool = workers.WorkerPool("stub", processes=2, threads=1)
+    try:
+        stale = pool._requests[0] = _SubmitOnClose(pool._requests[0], pool.submit)
+        crashed = pool.submit(["crash"])
+        survived = pool.submit(["tốt"])
+
+        with pytest.raises(RuntimeError, match="exited"):
+            crashed.result(timeout=10)
+        assert survived.result(timeout=10) == [{"text": "tốt", "worker": 1}]
+        assert stale.submitted[0].result(timeout=10) == [{"text": "mới", "worker": 0}]
+
+        stats = pool.stats()
+        assert stats["inference_worker_failed"] == 1
+        assert stats["inference_worker_restarts"] == 1
+        assert pool.submit(["ổn"]).result(timeout=10)[0]["text"] == "ổn"
+    finally:
+        pool.close()
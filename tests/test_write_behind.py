@@ -0,0 +1,50 @@
+import threading
+
+from tests.conftest import make_result
+
+
+def _writer(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "WRITE_SPILL_PATH", tmp_path / "spill.jsonl")
+    return db._WriteBehindWriter(batch_size=10, flush_ms=0, max_queue=1000, retries=1)
+
+
+def test_failed_flush_is_spilled_and_replayed(db, tmp_path, monkeypatch):
+    writer = _writer(db, tmp_path, monkeypatch)
+    insert = db.INSERT_SENTIMENT_SQL
+    monkeypatch.setattr(db, "INSERT_SENTIMENT_SQL", insert.replace("sentiments", "missing_table"))
+    assert writer.submit(db._result_row(make_result("tốt")))
+    writer.flush()
+
+    stats = writer.stats()
+    assert (stats["written"], stats["retried"], stats["spilled"], stats["failed"]) == (0, 1, 1, 0)
+    assert stats["last_error"]
+    assert (tmp_path / "spill.jsonl").exists()
+
+    monkeypatch.setattr(db, "INSERT_SENTIMENT_SQL", insert)
+    assert writer.submit(db._result_row(make_result("tệ", "NEGATIVE")))
+    writer.close()
+
+    assert writer.stats()["replayed"] == 1
+    assert not (tmp_path / "spill.jsonl").exists()
+    assert sorted(row["text"] for row in db.get_history()) == ["tệ", "tốt"]
+
+
+def test_close_during_submits_loses_no_rows(db, tmp_path, monkeypatch):
+    writer = _writer(db, tmp_path, monkeypatch)
+    accepted = []
+
+    def produce(worker):
+        for index in range(200):
+            if writer.submit(db._result_row(make_result(f"{worker}-{index}"))):
+                accepted.append(index)
+
+    producers = [threading.Thread(target=produce, args=(worker,)) for worker in range(4)]
+    for producer in producers:
+        producer.start()
+    for _ in range(5):
+        writer.close()
+    for producer in producers:
+        producer.join()
+    writer.close()
+
+    assert db.get_total_count() == len(accepted) == writer.stats()["written"]